@@ -2,6 +2,8 @@
 from __future__ import absolute_import
 from abc import ABCMeta, abstractmethod
 from datetime import timedelta
+import hashlib
+import json
 import logging
 import re
 from six import add_metaclass
@@ -12,6 +14,7 @@ from django.core.urlresolvers import resolve
 
 from contentstore.utils import course_image_url
 from contentstore.course_group_config import GroupConfiguration
+from contentstore.models import SearchIndexState
 from course_modes.models import CourseMode
 from eventtracking import tracker
 from search.search_engine_base import SearchEngine
@@ -41,6 +44,11 @@ def strip_html_content_to_text(html_content):
     return text_content
 
 
+def document_digest(document):
+    """ Gets a digest of an index document, to tell whether it has changed since it was last indexed """
+    return hashlib.sha1(json.dumps(document, sort_keys=True, default=unicode)).hexdigest()
+
+
 def indexing_is_enabled():
     """
     Checks to see if the indexing feature is enabled
@@ -99,6 +107,23 @@ class SearchIndexerBase(object):
         """ Modifies usage_id to submit to index """
         return usage_id
 
+    @classmethod
+    def _get_structure_version(cls, structure):
+        """
+        Gets the version of the published structure being indexed, or None if
+        the modulestore does not version its structures
+        """
+        course_entry = getattr(structure.runtime, 'course_entry', None)
+        if course_entry is None:
+            return None
+        return unicode(course_entry.structure['_id'])
+
+    @classmethod
+    def remove_items(cls, searcher, item_ids):
+        """ remove the items with the given ids from the search index """
+        for item_id in item_ids:
+            searcher.remove(cls.DOCUMENT_TYPE, item_id)
+
     @classmethod
     def remove_deleted_items(cls, searcher, structure_key, exclude_items):
         """
@@ -110,9 +135,7 @@ class SearchIndexerBase(object):
             field_dictionary=cls._get_location_info(structure_key),
             exclude_dictionary={"id": list(exclude_items)}
         )
-        result_ids = [result["data"]["id"] for result in response["results"]]
-        for result_id in result_ids:
-            searcher.remove(cls.DOCUMENT_TYPE, result_id)
+        cls.remove_items(searcher, [result["data"]["id"] for result in response["results"]])
 
     @classmethod
     def index(cls, modulestore, structure_key, triggered_at=None, reindex_age=REINDEX_AGE):
@@ -131,6 +154,13 @@ class SearchIndexerBase(object):
             which items may need to be removed from the index
             If None, then a full reindex takes place
 
+        An index update (triggered_at given) compares against what was
+        recorded in SearchIndexState by the last indexing: nothing is done if
+        the published structure is the same version, only items whose
+        documents have changed are sent to the index, and items no longer in
+        the structure are removed by id.  A full reindex sends every item and
+        removes anything else found in the index for the structure.
+
         Returns:
         Number of items that have been added to the index
         """
@@ -142,16 +172,22 @@ class SearchIndexerBase(object):
         structure_key = cls.normalize_structure_key(structure_key)
         location_info = cls._get_location_info(structure_key)
 
-        # Wrap counter in dictionary - otherwise we seem to lose scope inside the embedded function `index_item`
-        indexed_count = {
-            "count": 0
-        }
+        indexed_count = 0
+
+        # indexed_digests maps the id of each item that we wish to remain in the
+        # index, whether or not we are planning to actually update their index,
+        # to the digest of its document (None if the document was not built).
+        # Items not in here are ready to be destroyed
+        indexed_digests = {}
 
-        # indexed_items is a list of all the items that we wish to remain in the
-        # index, whether or not we are planning to actually update their index.
-        # This is used in order to build a query to remove those items not in this
-        # list - those are ready to be destroyed
-        indexed_items = set()
+        # item_documents lists the location and document of each item whose
+        # document is to be sent to the index
+        item_documents = []
+
+        # previous_digests are the digests recorded by the last indexing, if
+        # this is an update; items whose documents are unchanged are not sent
+        index_state = SearchIndexState.get_state(cls.INDEX_NAME, structure_key) if triggered_at is not None else None
+        previous_digests = index_state.indexed_digests if index_state else None
 
         def get_item_location(item):
             """
@@ -203,7 +239,6 @@ class SearchIndexerBase(object):
                 item_content_groups = groups_usage_info.get(unicode(item_location), None)
 
             item_id = unicode(cls._id_modifier(item.scope_ids.usage_id))
-            indexed_items.add(item_id)
             if item.has_children:
                 # determine if it's okay to skip adding the children herein based upon how recently any may have changed
                 skip_child_index = skip_index or \
@@ -221,7 +256,12 @@ class SearchIndexerBase(object):
                 if None in children_groups_usage:
                     item_content_groups = None
 
-            if skip_index or not item_index_dictionary:
+            if not item_index_dictionary:
+                return
+
+            if skip_index:
+                # keep what is already in the index for this item
+                indexed_digests[item_id] = previous_digests.get(item_id) if previous_digests else None
                 return
 
             item_index = {}
@@ -234,26 +274,59 @@ class SearchIndexerBase(object):
                     item_index['start_date'] = item.start
                 item_index['content_groups'] = item_content_groups if item_content_groups else None
                 item_index.update(cls.supplemental_fields(item))
-                searcher.index(cls.DOCUMENT_TYPE, item_index)
-                indexed_count["count"] += 1
+                digest = document_digest(item_index)
+                indexed_digests[item_id] = digest
+                if previous_digests is None or previous_digests.get(item_id) != digest:
+                    item_documents.append((item.location, item_index))
                 return item_content_groups
             except Exception as err:  # pylint: disable=broad-except
                 # broad exception so that index operation does not fail on one item of many
                 log.warning('Could not index item: %s - %r', item.location, err)
                 error_list.append(_('Could not index item: {}').format(item.location))
+                # keep it in the index, and build its document again next time
+                indexed_digests[item_id] = None
 
         try:
             with modulestore.branch_setting(ModuleStoreEnum.RevisionOption.published_only):
                 structure = cls._fetch_top_level(modulestore, structure_key)
-                groups_usage_info = cls.fetch_group_usage(modulestore, structure)
+                structure_version = cls._get_structure_version(structure)
 
                 # First perform any additional indexing from the structure object
                 cls.supplemental_index_information(modulestore, structure)
 
-                # Now index the content
+                # Nothing in the content can have changed if the structure has not
+                if index_state and structure_version is not None and structure_version == index_state.structure_version:
+                    return indexed_count
+
+                groups_usage_info = cls.fetch_group_usage(modulestore, structure)
+
+                # Now gather the content, and send what has changed to the index
                 for item in structure.get_children():
                     index_item(item, groups_usage_info=groups_usage_info)
-                cls.remove_deleted_items(searcher, structure_key, indexed_items)
+
+                for location, item_index in item_documents:
+                    try:
+                        searcher.index(cls.DOCUMENT_TYPE, item_index)
+                        indexed_count += 1
+                    except Exception as err:  # pylint: disable=broad-except
+                        # broad exception so that index operation does not fail on one item of many
+                        log.warning('Could not index item: %s - %r', location, err)
+                        error_list.append(_('Could not index item: {}').format(location))
+                        # so that it is sent again next time
+                        indexed_digests[item_index['id']] = None
+
+                if previous_digests is None:
+                    cls.remove_deleted_items(searcher, structure_key, indexed_digests.keys())
+                else:
+                    cls.remove_items(searcher, set(previous_digests) - set(indexed_digests))
+
+                # An indexing with errors does not record the version, so that the next one is not skipped
+                SearchIndexState.record_state(
+                    cls.INDEX_NAME,
+                    structure_key,
+                    None if error_list else structure_version,
+                    indexed_digests
+                )
         except Exception as err:  # pylint: disable=broad-except
             # broad exception so that index operation does not prevent the rest of the application from working
             log.exception(
@@ -266,7 +339,7 @@ class SearchIndexerBase(object):
         if error_list:
             raise SearchIndexingError('Error(s) present during indexing', error_list)
 
-        return indexed_count["count"]
+        return indexed_count
 
     @classmethod
     def _do_reindex(cls, modulestore, structure_key):
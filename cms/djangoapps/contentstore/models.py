@@ -2,10 +2,13 @@
 Models for contentstore
 """
 # pylint: disable=no-member
+import json
 
-from django.db.models.fields import TextField
+from django.db import models
+from django.db.models.fields import CharField, TextField
 
 from config_models.models import ConfigurationModel
+from xmodule_django.models import CourseKeyField
 
 
 class VideoUploadConfig(ConfigurationModel):
@@ -23,3 +26,56 @@ class VideoUploadConfig(ConfigurationModel):
 
 class PushNotificationConfig(ConfigurationModel):
     """Configuration for mobile push notifications."""
+
+
+class SearchIndexState(models.Model):
+    """
+    What was last sent to a search index for a course or library: the version
+    of the published structure, and a digest of the document of each item.
+
+    Indexing after a publish compares against this, so that only the items
+    whose documents changed are sent again.
+    """
+    index_name = CharField(max_length=255)
+    structure_key = CourseKeyField(max_length=255, db_index=True)
+    structure_version = CharField(max_length=255, null=True)
+    # JSON object mapping the id of each indexed item to the digest of its document
+    indexed_digests_json = TextField(default='{}')
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = ('index_name', 'structure_key')
+
+    @classmethod
+    def get_state(cls, index_name, structure_key):
+        """
+        Return the SearchIndexState of `structure_key` in `index_name`, or None if it hasn't been indexed.
+        """
+        try:
+            return cls.objects.get(index_name=index_name, structure_key=structure_key)
+        except cls.DoesNotExist:
+            return None
+
+    @classmethod
+    def record_state(cls, index_name, structure_key, structure_version, indexed_digests):
+        """
+        Record that `indexed_digests` are in `index_name` for version `structure_version` of `structure_key`.
+        """
+        state, __ = cls.objects.get_or_create(index_name=index_name, structure_key=structure_key)
+        state.structure_version = structure_version
+        state.indexed_digests = indexed_digests
+        state.save()
+
+    @property
+    def indexed_digests(self):
+        """
+        The digest of the document of each indexed item, by item id.  The
+        digest is None for items whose documents weren't looked at.
+        """
+        return json.loads(self.indexed_digests_json)
+
+    @indexed_digests.setter
+    def indexed_digests(self, value):
+        """
+        Set the digests of the documents of the indexed items.
+        """
+        self.indexed_digests_json = json.dumps(value)
@@ -440,16 +440,47 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
 
         before_time = datetime.now(UTC)
         self.publish_item(store, vertical2.location)
-        # index based on time, will include an index of the origin sequential
-        # because it is in a common subtree but not of the original vertical
-        # because the original sequential's subtree is too old
+        # index based on time, will look at the origin sequential because it is
+        # in a common subtree but not the original vertical because the
+        # original sequential's subtree is too old; only the new items have
+        # changed, so only they are sent to the index
         new_indexed_count = self.index_recent_changes(store, before_time)
-        self.assertEqual(new_indexed_count, 5)
+        self.assertEqual(new_indexed_count, 3)
 
         # full index again
         indexed_count = self.reindex_course(store)
         self.assertEqual(indexed_count, 7)
 
+    def _test_index_update_sends_changes(self, store):
+        """ Make sure that updating the index only sends the items that have changed """
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.reindex_course(store), 4)
+
+        # nothing has changed
+        since_time = datetime(2015, 1, 1, tzinfo=UTC)
+        self.assertEqual(self.index_recent_changes(store, since_time), 0)
+
+        self.html_unit.display_name = "Changed Html Content"
+        self.update_item(store, self.html_unit)
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.index_recent_changes(store, since_time), 1)
+        self.assertEqual(self.search()["total"], 4)
+        self.assertEqual(self.search(query_string="Changed")["total"], 1)
+
+        # a full reindex still sends everything
+        self.assertEqual(self.reindex_course(store), 4)
+
+    def _test_index_update_removes_deleted(self, store):
+        """ Make sure that updating the index removes items deleted since it was last indexed """
+        self.publish_item(store, self.vertical.location)
+        self.reindex_course(store)
+        self.assertEqual(self.search()["total"], 4)
+
+        self.delete_item(store, self.html_unit.location)
+        self.publish_item(store, self.vertical.location)
+        self.assertEqual(self.index_recent_changes(store, datetime(2015, 1, 1, tzinfo=UTC)), 0)
+        self.assertEqual(self.search()["total"], 3)
+
     def _test_course_about_property_index(self, store):
         """ Test that informational properties in the course object end up in the course_info index """
         display_name = "Help, I need somebody!"
@@ -582,6 +613,14 @@ class TestCoursewareSearchIndexer(MixedWithOptionsTestCase):
     def test_exception(self, store_type):
         self._perform_test_using_store(store_type, self._test_exception)
 
+    @ddt.data(*WORKS_WITH_STORES)
+    def test_index_update_sends_changes(self, store_type):
+        self._perform_test_using_store(store_type, self._test_index_update_sends_changes)
+
+    @ddt.data(*WORKS_WITH_STORES)
+    def test_index_update_removes_deleted(self, store_type):
+        self._perform_test_using_store(store_type, self._test_index_update_removes_deleted)
+
     @ddt.data(*WORKS_WITH_STORES)
     def test_course_about_property_index(self, store_type):
         self._perform_test_using_store(store_type, self._test_course_about_property_index)
@@ -359,6 +359,7 @@ MODULESTORE = {
                         'default_class': 'xmodule.hidden_module.HiddenDescriptor',
                         'fs_root': DATA_DIR,
                         'render_template': 'edxmako.shortcuts.render_to_string',
+                        'structure_cache_max_bytes': 64 * 1024 * 1024,
                     }
                 },
                 {
@@ -376,6 +377,17 @@ MODULESTORE = {
     }
 }
 
+# Large assets (1MB or more), which aren't cached in memcached, are cached in files
+# in this directory, using at most MAX_BYTES, when DIRECTORY is set.
+STATIC_CONTENT_DISK_CACHE = {
+    'DIRECTORY': None,
+    'MAX_BYTES': 1024 * 1024 * 1024,
+}
+
+# How long (in seconds) a process keeps the configuration model entries it has read
+# before checking in the cache whether they have been changed; 0 disables this.
+CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT = 0
+
 ############################ DJANGO_BUILTINS ################################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -740,6 +752,7 @@ INSTALLED_APPS = (
     # Additional problem types
     'edx_jsme',    # Molecular Structure
 
+    'openedx.core.djangoapps.content.course_overviews',
     'openedx.core.djangoapps.content.course_structures',
 
     # Credit courses
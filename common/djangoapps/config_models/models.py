@@ -1,6 +1,12 @@
 """
 Django Model baseclass for database-backed configuration.
 """
+from copy import deepcopy
+import threading
+import time
+import uuid
+
+from django.conf import settings
 from django.db import connection, models
 from django.contrib.auth.models import User
 from django.core.cache import get_cache, InvalidCacheBackendError
@@ -11,6 +17,18 @@ try:
 except InvalidCacheBackendError:
     from django.core.cache import cache
 
+# The configuration entries this process has read, kept for
+# CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT seconds between checks of their
+# model's version stamp in the cache: a dict, by model name, of dicts with
+# the 'version' stamp, when it was 'checked_at', and the 'entries' by cache key.
+_local_cache = {}  # pylint: disable=invalid-name
+_local_cache_lock = threading.Lock()  # pylint: disable=invalid-name
+
+# How long (in seconds) version stamps are kept in the cache. They must outlive any
+# process's entries, since an expired stamp is replaced by a new one, which makes
+# every process drop its entries. (Without a timeout, the cache's default is used.)
+VERSION_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
 
 class ConfigurationModelManager(models.Manager):
     """
@@ -91,12 +109,16 @@ class ConfigurationModel(models.Model):
 
     def save(self, *args, **kwargs):
         """
-        Clear the cached value when saving a new configuration entry
+        Clear the cached value when saving a new configuration entry, and
+        change the version stamp so that other processes drop their entries
         """
         super(ConfigurationModel, self).save(*args, **kwargs)
         cache.delete(self.cache_key_name(*[getattr(self, key) for key in self.KEY_FIELDS]))
         if self.KEY_FIELDS:
             cache.delete(self.key_values_cache_key_name())
+        cache.set(self.version_cache_key_name(), uuid.uuid4().hex, VERSION_CACHE_TIMEOUT)
+        with _local_cache_lock:
+            _local_cache.pop(self.__class__.__name__, None)
 
     @classmethod
     def cache_key_name(cls, *args):
@@ -110,24 +132,98 @@ class ConfigurationModel(models.Model):
         else:
             return 'configuration/{}/current'.format(cls.__name__)
 
+    @classmethod
+    def version_cache_key_name(cls):
+        """Return the name of the key of the version stamp, which changes whenever an entry is saved"""
+        return 'configuration/{}/version'.format(cls.__name__)
+
+    @classmethod
+    def _local_entries(cls):
+        """
+        Return the dict of this model's cached values kept by this process, or
+        None if CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT turns that off.
+
+        Once the entries are older than the timeout, the version stamp in the
+        cache is checked, and they are dropped if it has changed.  Each entry is
+        also dropped once it has been kept for cls.cache_timeout seconds, as it
+        would have expired from the cache.
+        """
+        timeout = getattr(settings, 'CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return None
+
+        now = time.time()
+        local = _local_cache.get(cls.__name__)
+        if local is not None and now - local['checked_at'] < timeout:
+            return local['entries']
+
+        version = cache.get(cls.version_cache_key_name())
+        if version is None:
+            # Never keep entries under a missing stamp: once one is set, it must differ
+            new_version = uuid.uuid4().hex
+            cache.add(cls.version_cache_key_name(), new_version, VERSION_CACHE_TIMEOUT)
+            # Another process may have added its own stamp first
+            version = cache.get(cls.version_cache_key_name()) or new_version
+        with _local_cache_lock:
+            local = _local_cache.get(cls.__name__)
+            if local is None or local['version'] != version:
+                local = {'version': version, 'entries': {}}
+                _local_cache[cls.__name__] = local
+            local['checked_at'] = now
+            return local['entries']
+
+    @classmethod
+    def _get_local_entry(cls, local_entries, cache_key):
+        """
+        Return the value kept for `cache_key` in `local_entries` (from _local_entries),
+        or None if there isn't one, or it was kept for longer than cls.cache_timeout.
+        """
+        if local_entries is None:
+            return None
+        stored_at, value = local_entries.get(cache_key, (None, None))
+        if stored_at is None:
+            return None
+        if time.time() - stored_at >= cls.cache_timeout:
+            local_entries.pop(cache_key, None)
+            return None
+        return value
+
+    @classmethod
+    def _set_local_entry(cls, local_entries, cache_key, value):
+        """
+        Keep `value` for `cache_key` in `local_entries` (from _local_entries), if
+        they're kept at all.
+        """
+        if local_entries is not None:
+            local_entries[cache_key] = (time.time(), value)
+
     @classmethod
     def current(cls, *args):
         """
-        Return the active configuration entry, either from cache,
-        from the database, or by creating a new empty entry (which is not
-        persisted).
+        Return the active configuration entry, either from this process,
+        from cache, from the database, or by creating a new empty entry
+        (which is not persisted).
+
+        Entries kept by this process are copied, so that callers can't change
+        each other's.
         """
-        cached = cache.get(cls.cache_key_name(*args))
-        if cached is not None:
-            return cached
+        cache_key = cls.cache_key_name(*args)
+        local_entries = cls._local_entries()
+        local_entry = cls._get_local_entry(local_entries, cache_key)
+        if local_entry is not None:
+            return deepcopy(local_entry)
 
-        key_dict = dict(zip(cls.KEY_FIELDS, args))
-        try:
-            current = cls.objects.filter(**key_dict).order_by('-change_date')[0]
-        except IndexError:
-            current = cls(**key_dict)
+        current = cache.get(cache_key)
+        if current is None:
+            key_dict = dict(zip(cls.KEY_FIELDS, args))
+            try:
+                current = cls.objects.filter(**key_dict).order_by('-change_date')[0]
+            except IndexError:
+                current = cls(**key_dict)
 
-        cache.set(cls.cache_key_name(*args), current, cls.cache_timeout)
+            cache.set(cache_key, current, cls.cache_timeout)
+
+        cls._set_local_entry(local_entries, cache_key, deepcopy(current))
         return current
 
     @classmethod
@@ -168,9 +264,15 @@ class ConfigurationModel(models.Model):
         assert not kwargs, "'flat' is the only kwarg accepted"
         key_fields = key_fields or cls.KEY_FIELDS
         cache_key = cls.key_values_cache_key_name(*key_fields)
-        cached = cache.get(cache_key)
-        if cached is not None:
-            return cached
-        values = list(cls.objects.values_list(*key_fields, flat=flat).order_by().distinct())
-        cache.set(cache_key, values, cls.cache_timeout)
+        local_entries = cls._local_entries()
+        local_entry = cls._get_local_entry(local_entries, cache_key)
+        if local_entry is not None:
+            return list(local_entry)
+
+        values = cache.get(cache_key)
+        if values is None:
+            values = list(cls.objects.values_list(*key_fields, flat=flat).order_by().distinct())
+            cache.set(cache_key, values, cls.cache_timeout)
+
+        cls._set_local_entry(local_entries, cache_key, list(values))
         return values
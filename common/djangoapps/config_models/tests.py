@@ -7,9 +7,11 @@ import ddt
 from django.contrib.auth.models import User
 from django.db import models
 from django.test import TestCase
+from django.test.utils import override_settings
 from freezegun import freeze_time
 
 from mock import patch
+from config_models import models as config_models
 from config_models.models import ConfigurationModel
 
 
@@ -282,3 +284,91 @@ class KeyedConfigurationModelTests(TestCase):
         fake_result = [('a', 'b'), ('c', 'd')]
         mock_cache.get.return_value = fake_result
         self.assertEquals(ExampleKeyedConfig.key_values(), fake_result)
+
+
+@override_settings(CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT=60)
+@patch.dict(config_models._local_cache, clear=True)  # pylint: disable=protected-access
+class LocalCacheTests(TestCase):
+    """
+    Tests of the process-local tier of the ConfigurationModel cache
+    """
+    def setUp(self):
+        super(LocalCacheTests, self).setUp()
+        config_models.cache.clear()
+        config_models._local_cache.clear()  # pylint: disable=protected-access
+
+    def test_local_hit(self):
+        ExampleConfig.objects.create(string_field='first')
+        self.assertEqual(ExampleConfig.current().string_field, 'first')
+        self.assertEqual(ExampleKeyedConfig.key_values(), [])
+
+        with patch('config_models.models.cache') as mock_cache:
+            self.assertEqual(ExampleConfig.current().string_field, 'first')
+            self.assertEqual(ExampleKeyedConfig.key_values(), [])
+            self.assertFalse(mock_cache.get.called)
+
+    def test_saved_in_process(self):
+        self.assertEqual(ExampleConfig.current().string_field, '')
+        ExampleConfig(string_field='second').save()
+        self.assertEqual(ExampleConfig.current().string_field, 'second')
+
+    def test_saved_in_other_process(self):
+        with freeze_time('2015-01-01 00:00:00'):
+            self.assertEqual(ExampleKeyedConfig.current('left', 'right').string_field, '')
+
+        # Another process saves an entry, which changes the version stamp
+        # but can't drop the entries kept by this one
+        entry = ExampleKeyedConfig(left='left', right='right', string_field='second')
+        super(ConfigurationModel, entry).save()
+        config_models.cache.delete(ExampleKeyedConfig.cache_key_name('left', 'right'))
+        config_models.cache.set(ExampleKeyedConfig.version_cache_key_name(), 'other')
+
+        with freeze_time('2015-01-01 00:00:59'):
+            self.assertEqual(ExampleKeyedConfig.current('left', 'right').string_field, '')
+        with freeze_time('2015-01-01 00:01:01'):
+            self.assertEqual(ExampleKeyedConfig.current('left', 'right').string_field, 'second')
+
+    def test_missing_version_stamp(self):
+        with freeze_time('2015-01-01 00:00:00'):
+            self.assertEqual(ExampleKeyedConfig.current('left', 'right').string_field, '')
+
+        # Another process saves an entry, and then the version stamp expires
+        entry = ExampleKeyedConfig(left='left', right='right', string_field='second')
+        super(ConfigurationModel, entry).save()
+        config_models.cache.delete(ExampleKeyedConfig.cache_key_name('left', 'right'))
+        config_models.cache.delete(ExampleKeyedConfig.version_cache_key_name())
+
+        with freeze_time('2015-01-01 00:01:01'):
+            self.assertEqual(ExampleKeyedConfig.current('left', 'right').string_field, 'second')
+
+    def test_entries_expire(self):
+        with freeze_time('2015-01-01 00:00:00'):
+            self.assertEqual(ExampleConfig.current().string_field, '')
+            self.assertEqual(ExampleKeyedConfig.key_values(), [])
+
+        # Another process saves entries, and they expire from the cache, but the
+        # version stamp is unchanged
+        super(ConfigurationModel, ExampleConfig(string_field='second')).save()
+        super(ConfigurationModel, ExampleKeyedConfig(left='left', right='right')).save()
+        config_models.cache.delete(ExampleConfig.cache_key_name())
+        config_models.cache.delete(ExampleKeyedConfig.key_values_cache_key_name())
+
+        with freeze_time('2015-01-01 00:04:59'):
+            self.assertEqual(ExampleConfig.current().string_field, '')
+            self.assertEqual(ExampleKeyedConfig.key_values(), [])
+        with freeze_time('2015-01-01 00:05:00'):
+            self.assertEqual(ExampleConfig.current().string_field, 'second')
+            self.assertEqual(ExampleKeyedConfig.key_values(), [('left', 'right')])
+
+    def test_entries_are_copied(self):
+        ExampleConfig.objects.create(string_field='first')
+        ExampleConfig.current().string_field = 'changed'
+        self.assertEqual(ExampleConfig.current().string_field, 'first')
+
+    @override_settings(CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        ExampleConfig.current()
+        with patch('config_models.models.cache') as mock_cache:
+            mock_cache.get.return_value = None
+            ExampleConfig.current()
+            mock_cache.get.assert_called_with(ExampleConfig.cache_key_name())
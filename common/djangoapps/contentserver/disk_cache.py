@@ -0,0 +1,200 @@
+"""
+A cache of large assets in files on local disk.
+
+Assets of 1MB or more are too big for memcached, so without this every request
+for one reads it from GridFS again.  Here an asset is written to a file the
+first time it's served, and then served from that file, memory-mapped, until
+the asset changes.  A file is named after the asset's location and the digest
+of its content, so a changed asset gets a new file, and the old one is evicted
+in time: when the files add up to more than `max_bytes`, the ones used least
+recently are removed.
+
+Several processes can share a directory: files are written under a temporary
+name and renamed into place, and an open file can still be read after another
+process removes it.
+
+The cache is off unless STATIC_CONTENT_DISK_CACHE['DIRECTORY'] is set::
+
+  STATIC_CONTENT_DISK_CACHE = {
+      'DIRECTORY': '/var/cache/edx/assets',
+      'MAX_BYTES': 1024 * 1024 * 1024,
+  }
+
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+# How much of a file is handed to the server at a time.
+CHUNK_SIZE = 64 * 1024
+
+TEMP_FILE_SUFFIX = '.tmp'
+
+
+class AssetDiskCache(object):
+    """
+    Files in `directory` holding the content of assets, using at most `max_bytes`.
+    """
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, location, digest):
+        """
+        The file holding the content of the asset at `location` with `digest`.
+        """
+        key = u'{}|{}'.format(location, digest).encode('utf-8')
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest())
+
+    def get(self, content):
+        """
+        Return a DiskCachedContent for `content`, a StaticContentStream.
+
+        If the content isn't in the cache yet, it is read from the stream and
+        added.  Return None if it can't be cached.
+        """
+        digest = getattr(content, 'content_digest', None)
+        if not digest or content.length is None or content.length > self.max_bytes:
+            return None
+
+        path = self._path(content.location, digest)
+        try:
+            # Touching the file marks it as recently used.
+            os.utime(path, None)
+        except OSError:
+            try:
+                self._add(path, content.stream_data())
+            except (IOError, OSError):
+                log.exception(u"Couldn't cache content %s on disk", unicode(content.location))
+                return None
+        try:
+            return DiskCachedContent(content, path)
+        except (IOError, OSError, ValueError):
+            # Another process evicted it already.
+            log.warning(u"Couldn't open content %s cached on disk", unicode(content.location))
+            return None
+
+    def _add(self, path, chunks):
+        """
+        Write `chunks` to the file at `path`, then make room for it.
+        """
+        handle, temp_path = tempfile.mkstemp(suffix=TEMP_FILE_SUFFIX, dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+            os.rename(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used files until the rest fit in `max_bytes`.
+        """
+        with self._lock:
+            files = []
+            for name in os.listdir(self.directory):
+                if name.endswith(TEMP_FILE_SUFFIX):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # Another process removed it.
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for __, size, __ in files)
+            for __, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+    def clear(self):
+        """
+        Remove every file in the cache.
+        """
+        with self._lock:
+            for name in os.listdir(self.directory):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+class DiskCachedContent(object):
+    """
+    The content of an asset, served from its file in an AssetDiskCache.
+
+    Has the same attributes as the StaticContent it was made from, and streams
+    the data the same way, from a memory map of the file.  The map stays valid
+    if the file is evicted, until this is closed or garbage collected.
+    """
+    def __init__(self, content, path):
+        self.location = content.location
+        self.content_type = content.content_type
+        self.length = content.length
+        self.last_modified_at = content.last_modified_at
+        self.locked = content.locked
+        self.content_digest = content.content_digest
+        self.path = path
+        with open(path, 'rb') as cached_file:
+            # A zero-length file can't be mapped.
+            self._mapped = mmap.mmap(cached_file.fileno(), 0, access=mmap.ACCESS_READ) if self.length else ''
+
+    def stream_data(self):
+        """
+        Stream all of the data.
+        """
+        return self.stream_data_in_range(0, self.length - 1)
+
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        for position in xrange(first_byte, last_byte + 1, CHUNK_SIZE):
+            yield self._mapped[position:min(position + CHUNK_SIZE, last_byte + 1)]
+
+    def close(self):
+        """
+        Unmap the file.
+        """
+        if self.length:
+            self._mapped.close()
+
+
+_disk_cache = None
+_disk_cache_lock = threading.Lock()
+
+
+def get_disk_cache():
+    """
+    Return the AssetDiskCache to use, or None if large assets shouldn't be cached on disk.
+    """
+    global _disk_cache  # pylint: disable=global-statement
+    config = getattr(settings, 'STATIC_CONTENT_DISK_CACHE', None) or {}
+    directory = config.get('DIRECTORY')
+    if not directory:
+        return None
+    max_bytes = config.get('MAX_BYTES', 1024 * 1024 * 1024)
+    with _disk_cache_lock:
+        if _disk_cache is None or (_disk_cache.directory, _disk_cache.max_bytes) != (directory, max_bytes):
+            _disk_cache = AssetDiskCache(directory, max_bytes)
+        return _disk_cache
@@ -2,15 +2,18 @@
 Middleware to serve assets.
 """
 
+import calendar
 import logging
+from uuid import uuid4
 
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden
 )
+from django.utils.http import parse_http_date_safe
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
+from xmodule.contentstore.content import StaticContent, StaticContentStream, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
@@ -18,11 +21,16 @@ from cache_toolbox.core import get_cached_content, set_cached_content
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
+from contentserver.disk_cache import get_disk_cache
+
 # TODO: Soon as we have a reasonable way to serialize/deserialize AssetKeys, we need
 # to change this file so instead of using course_id_partial, we're just using asset keys
 
 log = logging.getLogger(__name__)
 
+# How long, in seconds, browsers and CDNs may cache the content of a versioned url.
+VERSIONED_ASSET_MAX_AGE = 365 * 24 * 60 * 60
+
 
 class StaticContentServer(object):
     def process_request(self, request):
@@ -81,12 +89,43 @@ class StaticContentServer(object):
             # timestamp, so we can simply compare the strings
             last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
 
+            # The ETag is the digest of the content computed when it was saved.
+            # getattr b/c caching may mean some pickled instances don't have attr
+            content_digest = getattr(content, 'content_digest', None)
+            etag = '"{}"'.format(content_digest) if content_digest else None
+
+            # A versioned url (see static_replace) always has the same content, so it can be cached for long.
+            if content_digest and request.GET.get('v') == content_digest and not getattr(content, 'locked', False):
+                cache_control = 'public, max-age={}'.format(VERSIONED_ASSET_MAX_AGE)
+            else:
+                cache_control = None
+
             # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            # ETags, or else the timestamps, and if they match just return a 304 (Not Modified)
+            if 'HTTP_IF_NONE_MATCH' in request.META:
+                not_modified = etag is not None and etag_matches(request.META['HTTP_IF_NONE_MATCH'], etag)
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+                if_modified_since_time = parse_http_date_safe(if_modified_since)
+                not_modified = if_modified_since == last_modified_at_str or (
+                    if_modified_since_time is not None and
+                    if_modified_since_time >= calendar.timegm(content.last_modified_at.utctimetuple())
+                )
+            else:
+                not_modified = False
+            if not_modified:
+                response = HttpResponseNotModified()
+                if etag:
+                    response['ETag'] = etag
+                if cache_control:
+                    response['Cache-Control'] = cache_control
+                return response
+
+            # Large content isn't cached in memcached, so serve it from the disk cache, if there is one
+            if isinstance(content, StaticContentStream):
+                disk_cache = get_disk_cache()
+                if disk_cache is not None:
+                    content = disk_cache.get(content) or content
 
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
@@ -95,11 +134,8 @@ class StaticContentServer(object):
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
+            content_type = content.content_type
             if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -112,29 +148,28 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
+                    elif not all(0 <= first <= last < content.length for first, last in ranges):
                         log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
                         )
+                        return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                    elif len(ranges) > 1:
+                        # Content for multiple ranges is sent as a multipart message.
+                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                        boundary = uuid4().hex
+                        parts, length = multipart_byteranges(content, ranges, boundary)
+                        response = HttpResponse(parts)
+                        response['Content-Length'] = str(length)
+                        response.status_code = 206  # Partial Content
+                        content_type = 'multipart/byteranges; boundary={}'.format(boundary)
                     else:
                         first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
-                            response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
-                                first=first, last=last, length=content.length
-                            )
-                            response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
-                        else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                        response = HttpResponse(content.stream_data_in_range(first, last))
+                        response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
+                            first=first, last=last, length=content.length
+                        )
+                        response['Content-Length'] = str(last - first + 1)
+                        response.status_code = 206  # Partial Content
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
@@ -143,12 +178,62 @@ class StaticContentServer(object):
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
+            response['Content-Type'] = content_type
             response['Last-Modified'] = last_modified_at_str
+            if etag:
+                response['ETag'] = etag
+            if cache_control:
+                response['Cache-Control'] = cache_control
 
             return response
 
 
+def etag_matches(header_value, etag):
+    """
+    Returns whether an If-None-Match header value matches the etag.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.26
+    """
+    for tag in header_value.split(','):
+        tag = tag.strip()
+        # Weak comparison is fine for If-None-Match.
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag in ('*', etag):
+            return True
+    return False
+
+
+def multipart_byteranges(content, ranges, boundary):
+    """
+    Returns an iterator over a multipart/byteranges message body holding the
+    given ranges of the content, and the length of the body.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec19.html#sec19.2
+    """
+    headers = [
+        '--{boundary}\r\nContent-Type: {content_type}\r\nContent-Range: bytes {first}-{last}/{length}\r\n\r\n'.format(
+            boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+        )
+        for first, last in ranges
+    ]
+    closing = '--{boundary}--\r\n'.format(boundary=boundary)
+
+    def parts():
+        """
+        Stream each range, after its headers.
+        """
+        for header, (first, last) in zip(headers, ranges):
+            yield header
+            for chunk in content.stream_data_in_range(first, last):
+                yield chunk
+            yield '\r\n'
+        yield closing
+
+    length = sum(len(header) + last - first + 1 + 2 for header, (first, last) in zip(headers, ranges)) + len(closing)
+    return parts(), length
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
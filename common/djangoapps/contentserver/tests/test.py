@@ -4,20 +4,26 @@ Tests for StaticContentServer
 import copy
 import ddt
 import logging
+import os
 import unittest
+from mock import Mock, patch
+from shutil import rmtree
+from tempfile import mkdtemp
 from uuid import uuid4
 
 from django.conf import settings
 from django.test.client import Client
 from django.test.utils import override_settings
 
+from xmodule.contentstore.content import StaticContent
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_course_from_xml
 
-from contentserver.middleware import parse_range_header
+from contentserver.disk_cache import AssetDiskCache
+from contentserver.middleware import parse_range_header, etag_matches, VERSIONED_ASSET_MAX_AGE
 from student.models import CourseEnrollment
 
 log = logging.getLogger(__name__)
@@ -110,6 +116,59 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         resp = self.client.get(self.url_locked)
         self.assertEqual(resp.status_code, 200)
 
+    def test_etag(self):
+        """
+        Test that the ETag is the digest of the content, and that a matching If-None-Match gets a 304.
+        """
+        content = self.contentstore.find(self.unlocked_asset)
+        etag = '"{}"'.format(content.content_digest)
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp['ETag'], etag)
+        self.assertNotIn('Cache-Control', resp)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other", {}'.format(etag))
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(resp.status_code, 200)
+
+        # If-None-Match wins over If-Modified-Since
+        last_modified = self.client.get(self.url_unlocked)['Last-Modified']
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other"', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, 200)
+
+    def test_if_modified_since(self):
+        """
+        Test that an If-Modified-Since at or after the modification time gets a 304.
+        """
+        last_modified = self.client.get(self.url_unlocked)['Last-Modified']
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, 304)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(resp.status_code, 304)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE='Sat, 01 Jan 2000 00:00:00 GMT')
+        self.assertEqual(resp.status_code, 200)
+
+    def test_versioned_url(self):
+        """
+        Test that a url with the current version of unlocked content can be cached for long.
+        """
+        content_digest = self.contentstore.find(self.unlocked_asset).content_digest
+        resp = self.client.get(self.url_unlocked, {'v': content_digest})
+        self.assertEqual(resp['Cache-Control'], 'public, max-age={}'.format(VERSIONED_ASSET_MAX_AGE))
+
+        resp = self.client.get(self.url_unlocked, {'v': 'old'})
+        self.assertNotIn('Cache-Control', resp)
+
+        self.client.login(username=self.staff_usr, password=self.staff_pwd)
+        content_digest = self.contentstore.find(self.locked_asset).content_digest
+        resp = self.client.get(self.url_locked, {'v': content_digest})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn('Cache-Control', resp)
+
     def test_range_request_full_file(self):
         """
         Test that a range request from byte 0 to last,
@@ -146,7 +205,7 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart message with each range.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
@@ -154,9 +213,53 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
             first=first_byte, last=last_byte)
         )
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)
         self.assertNotIn('Content-Range', resp)
-        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
+        boundary = resp['Content-Type'].split('boundary=')[1]
+        self.assertEqual(resp['Content-Length'], str(len(resp.content)))
+
+        data = self.contentstore.find(self.unlocked_asset).data
+        parts = resp.content.split('--{}'.format(boundary))
+        self.assertEqual(parts[0], '')
+        self.assertEqual(parts[-1], '--\r\n')
+        for part, (first, last) in zip(parts[1:-1], [(first_byte, last_byte), (self.length_unlocked - 100, None)]):
+            headers, body = part.split('\r\n\r\n', 1)
+            self.assertIn('Content-Range: bytes {}-'.format(first), headers)
+            self.assertEqual(body, data[first:last + 1 if last else None] + '\r\n')
+
+    def test_range_request_cached_content(self):
+        """
+        Test that a range request for content in the cache doesn't fetch it again.
+        """
+        self.client.get(self.url_unlocked)
+        with patch('contentserver.middleware.AssetManager.find') as mock_find:
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9')
+        self.assertFalse(mock_find.called)
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.content, self.contentstore.find(self.unlocked_asset).data[:10])
+
+    def test_large_asset_disk_cache(self):
+        """
+        Test that large assets are served from the disk cache, when there is one.
+        """
+        data = ''.join(chr(i % 256) for i in xrange(2 * 1024 * 1024 + 17))
+        asset_key = self.course_key.make_asset_key('asset', 'large_static.bin')
+        self.contentstore.save(StaticContent(asset_key, 'large_static.bin', 'application/octet-stream', data))
+        url = unicode(asset_key)
+
+        directory = mkdtemp()
+        self.addCleanup(rmtree, directory)
+        with override_settings(STATIC_CONTENT_DISK_CACHE={'DIRECTORY': directory, 'MAX_BYTES': 10 * 1024 * 1024}):
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.content, data)
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+            resp = self.client.get(url, HTTP_RANGE='bytes=1000-1999')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.content, data[1000:2000])
+            self.assertEqual(len(os.listdir(directory)), 1)
 
     @ddt.data(
         'bytes 0-',
@@ -193,6 +296,79 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         self.assertEqual(resp.status_code, 416)
 
 
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for the AssetDiskCache.
+    """
+    def setUp(self):
+        super(AssetDiskCacheTestCase, self).setUp()
+        self.directory = mkdtemp()
+        self.addCleanup(rmtree, self.directory)
+        self.cache = AssetDiskCache(self.directory, max_bytes=250)
+
+    def content(self, name, data, digest=None):
+        """
+        A stand-in for a StaticContentStream.
+        """
+        content = Mock(
+            location=name, content_type='text/plain', length=len(data), content_digest=digest or name,
+            last_modified_at=None, locked=False,
+        )
+        content.stream_data.side_effect = lambda: iter([data[:50], data[50:]])
+        return content
+
+    def test_get(self):
+        content = self.content('a', 'x' * 100)
+        cached = self.cache.get(content)
+        self.assertEqual(''.join(cached.stream_data()), 'x' * 100)
+        self.assertEqual(''.join(cached.stream_data_in_range(10, 19)), 'x' * 10)
+        cached.close()
+
+        # The second time, the data isn't read again
+        self.assertIsNotNone(self.cache.get(content))
+        self.assertEqual(content.stream_data.call_count, 1)
+
+    def test_changed_content(self):
+        self.cache.get(self.content('a', 'x' * 100, digest='1'))
+        cached = self.cache.get(self.content('a', 'y' * 100, digest='2'))
+        self.assertEqual(''.join(cached.stream_data()), 'y' * 100)
+
+    def test_evicts_least_recently_used(self):
+        path_a = self.cache._path('a', 'a')  # pylint: disable=protected-access
+        path_b = self.cache._path('b', 'b')  # pylint: disable=protected-access
+        self.cache.get(self.content('a', 'a' * 100))
+        self.cache.get(self.content('b', 'b' * 100))
+        os.utime(path_a, (1, 1))
+        os.utime(path_b, (2, 2))
+
+        # Using 'a' makes 'b' the least recently used
+        self.cache.get(self.content('a', 'a' * 100))
+        self.cache.get(self.content('c', 'c' * 100))
+        self.assertTrue(os.path.exists(path_a))
+        self.assertFalse(os.path.exists(path_b))
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_too_large(self):
+        self.assertIsNone(self.cache.get(self.content('a', 'x' * 251)))
+        self.assertIsNone(self.cache.get(self.content('b', 'x' * 10, digest='')))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_empty(self):
+        self.assertEqual(list(self.cache.get(self.content('a', '')).stream_data()), [])
+
+
+class EtagMatchesTestCase(unittest.TestCase):
+    """
+    Tests for the etag_matches function.
+    """
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"abc"', '"abc"'))
+        self.assertTrue(etag_matches('"xyz", W/"abc"', '"abc"'))
+        self.assertTrue(etag_matches('*', '"abc"'))
+        self.assertFalse(etag_matches('"xyz"', '"abc"'))
+        self.assertFalse(etag_matches('abc', '"abc"'))
+
+
 @ddt.ddt
 class ParseRangeHeaderTestCase(unittest.TestCase):
     """
@@ -11,6 +11,7 @@ file and check it in at the same time as your model changes. To do that,
 3. Add the migration file created in edx-platform/common/djangoapps/embargo/migrations/
 """
 
+import bisect
 import ipaddr
 import json
 import logging
@@ -675,11 +676,26 @@ class IPFilter(ConfigurationModel):
     class IPFilterList(object):
         """
         Represent a list of IP addresses with support of networks.
+
+        The networks are merged into sorted ranges of addresses that don't
+        overlap, one list for each IP version, so that checking an address is
+        a binary search.
         """
 
         def __init__(self, ips):
             self.networks = [ipaddr.IPNetwork(ip) for ip in ips]
 
+            # The first and last addresses of each range, as integers, by IP version
+            self._ranges = {4: ([], []), 6: ([], [])}
+            for network in sorted(self.networks, key=lambda network: (network.version, int(network.network))):
+                firsts, lasts = self._ranges[network.version]
+                first, last = int(network.network), int(network.broadcast)
+                if lasts and first <= lasts[-1] + 1:
+                    lasts[-1] = max(lasts[-1], last)
+                else:
+                    firsts.append(first)
+                    lasts.append(last)
+
         def __iter__(self):
             for network in self.networks:
                 yield network
@@ -690,11 +706,27 @@ class IPFilter(ConfigurationModel):
             except ValueError:
                 return False
 
-            for network in self.networks:
-                if network.Contains(ip):
-                    return True
+            firsts, lasts = self._ranges[ip.version]
+            index = bisect.bisect_right(firsts, int(ip)) - 1
+            return index >= 0 and int(ip) <= lasts[index]
 
-            return False
+    # The IPFilterList of each comma-separated list of addresses seen by this
+    # process, so that the current lists aren't parsed on every request.
+    _ip_filter_lists = {}
+
+    @classmethod
+    def _get_ip_filter_list(cls, addresses):
+        """
+        Return the IPFilterList of `addresses`, a comma-separated list of IP addresses and networks.
+        """
+        ip_filter_list = cls._ip_filter_lists.get(addresses)
+        if ip_filter_list is None:
+            ip_filter_list = cls.IPFilterList([addr.strip() for addr in addresses.split(',')])
+            # Lists are only replaced when the configuration is changed, but don't keep them all
+            if len(cls._ip_filter_lists) >= 100:
+                cls._ip_filter_lists.clear()
+            cls._ip_filter_lists[addresses] = ip_filter_list
+        return ip_filter_list
 
     @property
     def whitelist_ips(self):
@@ -703,7 +735,7 @@ class IPFilter(ConfigurationModel):
         """
         if self.whitelist == '':
             return []
-        return self.IPFilterList([addr.strip() for addr in self.whitelist.split(',')])  # pylint: disable=no-member
+        return self._get_ip_filter_list(self.whitelist)
 
     @property
     def blacklist_ips(self):
@@ -712,4 +744,4 @@ class IPFilter(ConfigurationModel):
         """
         if self.blacklist == '':
             return []
-        return self.IPFilterList([addr.strip() for addr in self.blacklist.split(',')])  # pylint: disable=no-member
+        return self._get_ip_filter_list(self.blacklist)
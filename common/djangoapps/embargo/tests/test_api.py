@@ -25,6 +25,7 @@ from embargo.models import (
 
 from util.testing import UrlResetMixin
 from embargo import api as embargo_api
+from geoinfo.api import clear_country_code_cache
 from embargo.exceptions import InvalidAccessPoint
 from mock import patch
 
@@ -52,6 +53,7 @@ class EmbargoCheckAccessApiTests(ModuleStoreTestCase):
 
         # Clear the cache to prevent interference between tests
         cache.clear()
+        clear_country_code_cache()
 
     @ddt.data(
         # IP country, profile_country, blacklist, whitelist, allow_access
@@ -100,6 +100,16 @@ class EmbargoModelsTest(TestCase):
         self.assertTrue('1.1.1.0' in cblacklist)
         self.assertFalse('1.2.0.0' in cblacklist)
 
+    def test_ip_overlapping_network_blocking(self):
+        whitelist = '1.0.0.0/24, 1.0.0.128/25, 1.0.1.0/24, 2001:db8::/32, 2001:db8::1, 3.0.0.5'
+        IPFilter(whitelist=whitelist).save()
+
+        cwhitelist = IPFilter.current().whitelist_ips
+        for addr in ('1.0.0.0', '1.0.0.200', '1.0.1.255', '2001:db8::1', '2001:db8:ffff::1', '3.0.0.5'):
+            self.assertIn(addr, cwhitelist)
+        for addr in ('0.255.255.255', '1.0.2.0', '2001:db9::', '3.0.0.4', '3.0.0.6', '::1.0.0.1', 'not an ip'):
+            self.assertNotIn(addr, cwhitelist)
+
 
 class RestrictedCourseTest(TestCase):
     """Test RestrictedCourse model. """
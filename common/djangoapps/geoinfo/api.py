@@ -0,0 +1,70 @@
+"""
+Country lookups by IP address, used by the geoinfo middleware and the embargo app.
+
+The GeoIP databases are opened once per process, memory-mapped, and the
+countries of the addresses seen most recently are kept, so that a lookup
+doesn't read a database file.
+"""
+from collections import OrderedDict
+import threading
+
+import pygeoip
+from django.conf import settings
+
+# The number of addresses whose countries are kept
+COUNTRY_CODE_CACHE_SIZE = 10000
+
+_readers = {}  # pylint: disable=invalid-name
+_readers_lock = threading.Lock()  # pylint: disable=invalid-name
+
+_country_codes = OrderedDict()  # pylint: disable=invalid-name
+_country_codes_lock = threading.Lock()  # pylint: disable=invalid-name
+
+
+def _get_reader(path):
+    """
+    Return the GeoIP reader of the database at `path`, opening it the first time.
+    """
+    with _readers_lock:
+        reader = _readers.get(path)
+        if reader is None:
+            reader = pygeoip.GeoIP(path, pygeoip.MMAP_CACHE)
+            _readers[path] = reader
+        return reader
+
+
+def country_code_from_ip(ip_addr):
+    """
+    Return the country code associated with an IP address.
+    Handles both IPv4 and IPv6 addresses.
+
+    Args:
+        ip_addr (str): The IP address to look up.
+
+    Returns:
+        str: A 2-letter country code.
+
+    """
+    path = str(settings.GEOIPV6_PATH if ip_addr.find(':') >= 0 else settings.GEOIP_PATH)
+    key = (path, ip_addr)
+    with _country_codes_lock:
+        if key in _country_codes:
+            # Move it to the end, as the most recently used
+            country_code = _country_codes.pop(key)
+            _country_codes[key] = country_code
+            return country_code
+
+    country_code = _get_reader(path).country_code_by_addr(ip_addr)
+    with _country_codes_lock:
+        _country_codes[key] = country_code
+        while len(_country_codes) > COUNTRY_CODE_CACHE_SIZE:
+            _country_codes.popitem(last=False)
+    return country_code
+
+
+def clear_country_code_cache():
+    """
+    Forget the countries of the addresses looked up so far.
+    """
+    with _country_codes_lock:
+        _country_codes.clear()
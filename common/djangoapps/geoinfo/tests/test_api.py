@@ -0,0 +1,50 @@
+"""
+Tests for the country lookups of geoinfo.api.
+"""
+from mock import patch
+import pygeoip
+
+from django.test import TestCase
+
+from geoinfo import api as geoinfo_api
+
+
+class CountryCodeFromIpTests(TestCase):
+    """
+    Tests of country_code_from_ip.
+    """
+    def setUp(self):
+        super(CountryCodeFromIpTests, self).setUp()
+        geoinfo_api.clear_country_code_cache()
+        self.addCleanup(geoinfo_api.clear_country_code_cache)
+
+    @patch.object(pygeoip.GeoIP, 'country_code_by_addr')
+    def test_lookup_cached(self, mock_country_code_by_addr):
+        mock_country_code_by_addr.return_value = 'CN'
+        self.assertEqual(geoinfo_api.country_code_from_ip('117.79.83.1'), 'CN')
+        self.assertEqual(geoinfo_api.country_code_from_ip('117.79.83.1'), 'CN')
+        self.assertEqual(mock_country_code_by_addr.call_count, 1)
+
+        # IPv6 addresses are looked up in the other database
+        self.assertEqual(geoinfo_api.country_code_from_ip('2001:da8:20f:1502:edcf:550b:4a9c:207d'), 'CN')
+        self.assertEqual(mock_country_code_by_addr.call_count, 2)
+
+    @patch.object(geoinfo_api, 'COUNTRY_CODE_CACHE_SIZE', 2)
+    @patch.object(pygeoip.GeoIP, 'country_code_by_addr')
+    def test_least_recently_used_evicted(self, mock_country_code_by_addr):
+        mock_country_code_by_addr.return_value = 'US'
+        for ip_addr in ('4.0.0.1', '4.0.0.2', '4.0.0.1', '4.0.0.3'):
+            geoinfo_api.country_code_from_ip(ip_addr)
+        self.assertEqual(mock_country_code_by_addr.call_count, 3)
+
+        mock_country_code_by_addr.reset_mock()
+        geoinfo_api.country_code_from_ip('4.0.0.1')
+        self.assertFalse(mock_country_code_by_addr.called)
+        geoinfo_api.country_code_from_ip('4.0.0.2')
+        self.assertTrue(mock_country_code_by_addr.called)
+
+    def test_reader_opened_once(self):
+        with patch('geoinfo.api.pygeoip.GeoIP', wraps=pygeoip.GeoIP) as mock_geoip:
+            geoinfo_api.country_code_from_ip('4.0.0.1')
+            geoinfo_api.country_code_from_ip('4.0.0.2')
+        self.assertLessEqual(mock_geoip.call_count, 1)
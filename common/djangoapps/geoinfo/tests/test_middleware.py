@@ -7,6 +7,7 @@ import pygeoip
 from django.contrib.sessions.middleware import SessionMiddleware
 from django.test import TestCase
 from django.test.client import RequestFactory
+from geoinfo.api import clear_country_code_cache
 from geoinfo.middleware import CountryMiddleware
 
 from student.tests.factories import UserFactory, AnonymousUserFactory
@@ -26,6 +27,7 @@ class CountryMiddlewareTests(TestCase):
         self.patcher = patch.object(pygeoip.GeoIP, 'country_code_by_addr', self.mock_country_code_by_addr)
         self.patcher.start()
         self.addCleanup(self.patcher.stop)
+        clear_country_code_cache()
 
     def mock_country_code_by_addr(self, ip_addr):
         """
@@ -1,18 +1,97 @@
+import hashlib
 import logging
 import re
+import threading
+import time
+from collections import OrderedDict
+from urlparse import urlparse, urlunparse
 
 from staticfiles.storage import staticfiles_storage
 from staticfiles import finders
 from django.conf import settings
 
+from util.cache import cache
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.contentstore.content import StaticContent
+from xmodule.contentstore.django import contentstore
 
 from opaque_keys.edx.locator import AssetLocator
 
 log = logging.getLogger(__name__)
 
+# How long, in seconds, to cache the versions of a course's assets.
+ASSET_VERSIONS_CACHE_TIMEOUT = 5 * 60
+
+# How many resolved urls, and how many characters of rewritten text, replace_urls keeps.
+RESOLVED_URL_CACHE_SIZE = 10000
+REWRITTEN_TEXT_CACHE_SIZE = 8 * 1024 * 1024
+
+
+class LRUCache(object):
+    """
+    A thread-safe dict of at most `max_size`, dropping the least recently used
+    items to make room.  An item's size is given by `sizeof`, or is 1.
+    """
+    def __init__(self, max_size, sizeof=None):
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda value: 1)
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the value for `key`, or `default` if it isn't cached.
+        """
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+            self._items[key] = value
+            return value
+
+    def set(self, key, value):
+        """
+        Cache `value` for `key`, unless it's bigger than the whole cache.
+        """
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return
+        with self._lock:
+            if key in self._items:
+                self.size -= self.sizeof(self._items.pop(key))
+            self._items[key] = value
+            self.size += size
+            while self.size > self.max_size:
+                __, dropped = self._items.popitem(last=False)
+                self.size -= self.sizeof(dropped)
+
+    def clear(self):
+        """
+        Drop everything.
+        """
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+
+_url_regexes = {}
+_staticfiles_urls = LRUCache(RESOLVED_URL_CACHE_SIZE)
+_resolved_static_urls = LRUCache(RESOLVED_URL_CACHE_SIZE)
+# Values are (expiry time, rewritten text)
+_rewritten_texts = LRUCache(REWRITTEN_TEXT_CACHE_SIZE, sizeof=lambda value: len(value[1]))
+
+
+def clear_caches():
+    """
+    Forget all the urls and text resolved and rewritten so far.
+    """
+    _staticfiles_urls.clear()
+    _resolved_static_urls.clear()
+    _rewritten_texts.clear()
+
 
 def _url_replace_regex(prefix):
     """
@@ -30,11 +109,36 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+def _compiled_url_replace_regex(prefix):
+    """
+    The compiled _url_replace_regex for the prefix, compiled only once.
+    """
+    regex = _url_regexes.get(prefix)
+    if regex is None:
+        regex = _url_regexes[prefix] = re.compile(_url_replace_regex(prefix))
+    return regex
+
+
+def _static_prefix_regex(data_dir):
+    """
+    The prefix of the static urls to replace, for the data directory.
+    """
+    return u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    )
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
     a dead link instead of raising an exception.
     """
+    # The url of a path doesn't change, except while developing
+    url = None if settings.DEBUG else _staticfiles_urls.get(path)
+    if url is not None:
+        return url
+
     try:
         url = staticfiles_storage.url(path)
     except Exception as err:
@@ -42,6 +146,7 @@ def try_staticfiles_lookup(path):
             path, str(err)))
         # Just return the original path; don't kill everything.
         url = path
+    _staticfiles_urls.set(path, url)
     return url
 
 
@@ -71,7 +176,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _compiled_url_replace_regex('/jump_to_id/').sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -91,7 +196,7 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _compiled_url_replace_regex('/course/').sub(replace_course_url, text)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -110,14 +215,7 @@ def process_static_urls(text, replacement_function, data_dir=None):
         rest = match.group('rest')
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    return _compiled_url_replace_regex(_static_prefix_regex(data_dir)).sub(wrap_part_extraction, text)
 
 
 def make_static_urls_absolute(request, html):
@@ -137,6 +235,114 @@ def make_static_urls_absolute(request, html):
     )
 
 
+def get_asset_versions(course_id, paths):
+    """
+    Returns a dict of the versions (content digests) of the course's assets at
+    `paths`, the paths they have in /static/ urls, by asset name.  Assets that
+    don't exist are left out.
+
+    Each asset's version is cached on its own, for a few minutes, so a url may
+    have an old version for a while after the asset changes; the content server
+    only lets the current version be cached for long.  The versions that aren't
+    cached are read from the contentstore in one query.
+    """
+    cache_keys = {}
+    for path in paths:
+        location = StaticContent.compute_location(course_id, urlparse(path).path)
+        cache_keys[u'static_replace.asset_version.{}'.format(location)] = location
+
+    versions = cache.get_many(cache_keys.keys())
+    missing = {location: cache_key for cache_key, location in cache_keys.iteritems() if cache_key not in versions}
+    if missing:
+        attrs_by_location = contentstore().get_attrs_many(missing.keys())
+        new_versions = {}
+        for location, cache_key in missing.iteritems():
+            attrs = attrs_by_location.get(location, {})
+            # Missing assets are cached too, with no version
+            new_versions[cache_key] = attrs.get('content_digest') or attrs.get('md5') or ''
+        cache.set_many(new_versions, ASSET_VERSIONS_CACHE_TIMEOUT)
+        versions.update(new_versions)
+
+    return {
+        cache_keys[cache_key].name: version
+        for cache_key, version in versions.iteritems()
+        if version
+    }
+
+
+def add_asset_version(url, path, course_id, versions):
+    """
+    Adds the version of the asset at path to its url, as the 'v' query parameter.
+
+    url: The url of the asset in the contentstore
+    path: The path of the asset, as it was in the /static/ url
+    versions: The versions of the course's assets by name, from get_asset_versions
+    """
+    name = StaticContent.compute_location(course_id, urlparse(path).path).name
+    version = versions.get(name)
+    if not version:
+        return url
+    scheme, netloc, url_path, params, query, fragment = urlparse(url)
+    query = u'{}&v={}'.format(query, version) if query else u'v={}'.format(version)
+    return urlunparse((scheme, netloc, url_path, params, query, fragment))
+
+
+def _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path):
+    """
+    Returns the url for a static url, and whether it's an asset in the contentstore;
+    or None if the static url should be left as it is.
+
+    See replace_static_urls for the arguments.
+    """
+    # Don't mess with things that end in '?raw'
+    if rest.endswith('?raw'):
+        return None
+
+    # In debug mode, if we can find the url as is,
+    if settings.DEBUG and finders.find(rest, True):
+        return None
+    # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+    elif (not static_asset_path) \
+            and course_id \
+            and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
+        # first look in the static file pipeline and see if we are trying to reference
+        # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+
+        exists_in_staticfiles_storage = False
+        try:
+            exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+
+        if exists_in_staticfiles_storage:
+            return staticfiles_storage.url(rest), False
+        else:
+            # if not, then assume it's courseware specific content and then look in the
+            # Mongo-backed database
+            url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
+
+            if AssetLocator.CANONICAL_NAMESPACE in url:
+                url = url.replace('block@', 'block/', 1)
+            return url, True
+
+    # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+    else:
+        course_path = "/".join((static_asset_path or data_directory, rest))
+
+        try:
+            if staticfiles_storage.exists(rest):
+                url = staticfiles_storage.url(rest)
+            else:
+                url = staticfiles_storage.url(course_path)
+        # And if that fails, assume that it's course content, and add manually data directory
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+            url = "".join([prefix, course_path])
+        return url, False
+
+
 def replace_static_urls(text, data_directory=None, course_id=None, static_asset_path=''):
     """
     Replace /static/$stuff urls either with their correct url as generated by collectstatic,
@@ -148,58 +354,152 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
     data_directory: The directory in which course data is stored
     course_id: The course identifier used to distinguish static content for this course in studio
     static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
+
+    If the ENABLE_VERSIONED_ASSET_URLS feature is on, contentstore urls also get
+    the version of the asset (see add_asset_version).
     """
+    data_dir = static_asset_path or data_directory
+    resolved_urls = {}
+
+    def resolve(prefix, rest):
+        """
+        Resolve a static url, once for each time it appears in text.
+        """
+        if (prefix, rest) not in resolved_urls:
+            resolved_urls[(prefix, rest)] = _resolve_static_url(
+                prefix, rest, data_directory, course_id, static_asset_path
+            )
+        return resolved_urls[(prefix, rest)]
+
+    versioned = settings.FEATURES.get('ENABLE_VERSIONED_ASSET_URLS', False)
+    asset_versions = {}
+    if versioned:
+        # Resolve every url first, so that the versions of all of the assets they
+        # reference are read together
+        asset_paths = set()
+
+        def collect_asset_path(original, prefix, quote, rest):  # pylint: disable=unused-argument
+            """
+            Note the path of a matched url, if it's in the contentstore.
+            """
+            resolved = resolve(prefix, rest)
+            if resolved is not None and resolved[1]:
+                asset_paths.add(rest)
+            return original
+
+        process_static_urls(text, collect_asset_path, data_dir=data_dir)
+        if asset_paths:
+            asset_versions = get_asset_versions(course_id, asset_paths)
 
     def replace_static_url(original, prefix, quote, rest):
         """
         Replace a single matched url.
         """
-        # Don't mess with things that end in '?raw'
-        if rest.endswith('?raw'):
+        resolved = resolve(prefix, rest)
+        if resolved is None:
             return original
+        url, in_contentstore = resolved
 
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
-            return original
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) \
-                and course_id \
-                and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
-
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
+        if in_contentstore and versioned:
+            url = add_asset_version(url, rest, course_id, asset_versions)
 
-            if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
+        return "".join([quote, url, quote])
 
-                if AssetLocator.CANONICAL_NAMESPACE in url:
-                    url = url.replace('block@', 'block/', 1)
+    return process_static_urls(text, replace_static_url, data_dir=data_dir)
 
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
-        else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
 
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
+def replace_urls(text, data_directory=None, course_id=None, static_asset_path='', jump_to_id_base_url=None):
+    """
+    Does what replace_static_urls, replace_course_urls and (if jump_to_id_base_url
+    is given) replace_jump_to_id_urls do, in one pass over the text.
+
+    As the text is only read once, a url inside the quotes of another url is
+    left alone, where the separate passes could have replaced both.
+
+    This is for rewriting the same fragments of course content again and again:
+    the urls that static urls resolve to, and the rewritten text, are cached,
+    for up to ASSET_VERSIONS_CACHE_TIMEOUT seconds.
+
+    See replace_static_urls and replace_jump_to_id_urls for the arguments.
+    """
+    use_caches = not settings.DEBUG
+    versioned = settings.FEATURES.get('ENABLE_VERSIONED_ASSET_URLS', False)
+    # How static urls resolve depends on these
+    resolve_args = (
+        data_directory, course_id, static_asset_path,
+        modulestore().get_modulestore_type(course_id) if course_id else None,
+    )
+    text_key = None
+    if use_caches:
+        text_key = (
+            hashlib.sha1(text.encode('utf-8') if isinstance(text, unicode) else text).digest(),
+            resolve_args, jump_to_id_base_url, versioned,
+        )
+        cached = _rewritten_texts.get(text_key)
+        if cached is not None and cached[0] > time.time():
+            return cached[1]
+
+    data_dir = static_asset_path or data_directory
+    prefixes = [_static_prefix_regex(data_dir), '/course/']
+    if jump_to_id_base_url is not None:
+        prefixes.append('/jump_to_id/')
+    regex = _compiled_url_replace_regex(u'|'.join(prefixes))
+    course_url_base = '/courses/' + course_id.to_deprecated_string() + '/' if course_id else None
+
+    def resolve(prefix, rest):
+        """
+        Resolve a static url, or return () if it should be left as it is.
+        """
+        resolved_key = (prefix, rest, resolve_args)
+        resolved = _resolved_static_urls.get(resolved_key) if use_caches else None
+        if resolved is None:
+            resolved = _resolve_static_url(prefix, rest, data_directory, course_id, static_asset_path) or ()
+            if use_caches:
+                _resolved_static_urls.set(resolved_key, resolved)
+        return resolved
+
+    asset_versions = {}
+    if versioned:
+        # Resolve every static url first, so that the versions of all of the assets
+        # they reference are read together
+        asset_paths = set()
+        for match in regex.finditer(text):
+            prefix, rest = match.group('prefix'), match.group('rest')
+            if prefix in ('/course/', '/jump_to_id/'):
+                continue
+            resolved = resolve(prefix, rest)
+            if resolved and resolved[1]:
+                asset_paths.add(rest)
+        if asset_paths:
+            asset_versions = get_asset_versions(course_id, asset_paths)
+
+    def replace_url(match):
+        """
+        Replace a single matched url.
+        """
+        original = match.group(0)
+        prefix = match.group('prefix')
+        quote = match.group('quote')
+        rest = match.group('rest')
+
+        if prefix == '/course/':
+            if course_url_base is None:
+                return original
+            return "".join([quote, course_url_base, rest, quote])
+        if prefix == '/jump_to_id/':
+            return "".join([quote, jump_to_id_base_url + rest, quote])
+
+        resolved = resolve(prefix, rest)
+        if not resolved:
+            return original
+        url, in_contentstore = resolved
+
+        if in_contentstore and versioned:
+            url = add_asset_version(url, rest, course_id, asset_versions)
 
         return "".join([quote, url, quote])
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    rewritten = regex.sub(replace_url, text)
+    if use_caches:
+        _rewritten_texts.set(text_key, (time.time() + ASSET_VERSIONS_CACHE_TIMEOUT, rewritten))
+    return rewritten
@@ -6,11 +6,19 @@ from static_replace import (
     replace_course_urls,
     _url_replace_regex,
     process_static_urls,
-    make_static_urls_absolute
+    make_static_urls_absolute,
+    add_asset_version,
+    get_asset_versions,
+    replace_urls,
+    replace_jump_to_id_urls,
+    clear_caches,
+    LRUCache,
 )
+from django.core.cache.backends.locmem import LocMemCache
 from mock import patch, Mock
 
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from xmodule.contentstore.content import StaticContent
 from xmodule.modulestore.mongo import MongoModuleStore
 from xmodule.modulestore.xml import XMLModuleStore
 
@@ -143,6 +151,137 @@ def test_static_url_with_query(mock_modulestore, mock_storage):
     assert_equals(post_text, replace_static_urls(pre_text, DATA_DIRECTORY, COURSE_KEY))
 
 
+@patch('static_replace.get_asset_versions')
+@patch('static_replace.staticfiles_storage')
+@patch('static_replace.modulestore')
+def test_versioned_asset_urls(mock_modulestore, mock_storage, mock_get_asset_versions):
+    """
+    Make sure that contentstore urls get the version of the asset, when that's enabled
+    """
+    mock_storage.exists.return_value = False
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+    mock_get_asset_versions.return_value = {'file.png': 'abc123', 'dir_other.png': 'def456'}
+
+    text = '"/static/file.png" "/static/dir/other.png?a=b" "/static/unknown.png"'
+    with patch.dict('django.conf.settings.FEATURES', {'ENABLE_VERSIONED_ASSET_URLS': True}):
+        assert_equals(
+            '"/c4x/org/course/asset/file.png?v=abc123" "/c4x/org/course/asset/dir_other.png?a=b&v=def456" '
+            '"/c4x/org/course/asset/unknown.png"',
+            replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY)
+        )
+    mock_get_asset_versions.assert_called_once_with(COURSE_KEY, {'file.png', 'dir/other.png?a=b', 'unknown.png'})
+
+    with patch.dict('django.conf.settings.FEATURES', {'ENABLE_VERSIONED_ASSET_URLS': False}):
+        assert_equals(
+            '"/c4x/org/course/asset/file.png"',
+            replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY, COURSE_KEY)
+        )
+
+
+@patch('static_replace.cache', LocMemCache('test_get_asset_versions', {}))
+@patch('static_replace.contentstore')
+def test_get_asset_versions(mock_contentstore):
+    """
+    Make sure only the versions of the given assets are read, and that each is cached
+    """
+    get_attrs_many = mock_contentstore.return_value.get_attrs_many
+    file_location = StaticContent.compute_location(COURSE_KEY, 'file.png')
+    missing_location = StaticContent.compute_location(COURSE_KEY, 'missing.png')
+    get_attrs_many.return_value = {file_location: {'content_digest': 'abc123'}}
+
+    for __ in range(2):
+        assert_equals({'file.png': 'abc123'}, get_asset_versions(COURSE_KEY, ['file.png?a=b', 'missing.png']))
+    assert_equals(get_attrs_many.call_count, 1)
+    assert_equals(set(get_attrs_many.call_args[0][0]), {file_location, missing_location})
+
+    # Only the asset that isn't cached yet is read
+    get_asset_versions(COURSE_KEY, ['file.png', 'other.png'])
+    assert_equals(get_attrs_many.call_count, 2)
+    assert_equals(list(get_attrs_many.call_args[0][0]), [StaticContent.compute_location(COURSE_KEY, 'other.png')])
+
+
+def test_add_asset_version():
+    versions = {'file.png': 'abc123'}
+    assert_equals(
+        '/c4x/org/course/asset/file.png?v=abc123',
+        add_asset_version('/c4x/org/course/asset/file.png', 'file.png', COURSE_KEY, versions)
+    )
+    assert_equals(
+        '/c4x/org/course/asset/other.png',
+        add_asset_version('/c4x/org/course/asset/other.png', 'other.png', COURSE_KEY, versions)
+    )
+
+
+@patch('static_replace.staticfiles_storage')
+@patch('static_replace.modulestore')
+def test_replace_urls(mock_modulestore, mock_storage):
+    """
+    Make sure replace_urls does what the separate replacements do
+    """
+    clear_caches()
+    mock_storage.exists.return_value = False
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+
+    text = (
+        '<img src="/static/file.png"/><a href="/course/info">info</a>'
+        '<a href=\'/jump_to_id/abc\'>abc</a><a href="/static/file.png?raw">raw</a>'
+    )
+    separately = replace_jump_to_id_urls(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY), COURSE_KEY),
+        COURSE_KEY, '/courses/org/course/run/jump_to_id/'
+    )
+    assert_equals(
+        separately,
+        replace_urls(text, DATA_DIRECTORY, COURSE_KEY, jump_to_id_base_url='/courses/org/course/run/jump_to_id/')
+    )
+    assert_equals(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY), COURSE_KEY),
+        replace_urls(text, DATA_DIRECTORY, COURSE_KEY)
+    )
+
+
+@patch('static_replace.staticfiles_storage')
+@patch('static_replace.modulestore')
+def test_replace_urls_caching(mock_modulestore, mock_storage):
+    """
+    Make sure replace_urls resolves each url, and rewrites each text, only once
+    """
+    clear_caches()
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/file.abc123.png'
+    mock_modulestore.return_value = Mock(XMLModuleStore)
+
+    for __ in range(2):
+        assert_equals('"/static/file.abc123.png"', replace_urls(STATIC_SOURCE, DATA_DIRECTORY))
+    assert_equals(mock_storage.exists.call_count, 1)
+
+    # The same url in different text is resolved once
+    assert_equals('x "/static/file.abc123.png"', replace_urls('x ' + STATIC_SOURCE, DATA_DIRECTORY))
+    assert_equals(mock_storage.exists.call_count, 1)
+
+    # ...but not for another course
+    replace_urls(STATIC_SOURCE, 'other_data_dir')
+    assert_equals(mock_storage.exists.call_count, 2)
+
+    with patch('static_replace.settings.DEBUG', True):
+        with patch('static_replace.finders.find', return_value=None):
+            replace_urls(STATIC_SOURCE, DATA_DIRECTORY)
+    assert_equals(mock_storage.exists.call_count, 3)
+
+
+def test_lru_cache():
+    cache = LRUCache(10, sizeof=len)
+    cache.set('a', 'aaaa')
+    cache.set('b', 'bbbb')
+    assert_equals(cache.get('a'), 'aaaa')
+    cache.set('c', 'cccc')
+    assert_equals(cache.get('b'), None)
+    assert_equals(cache.get('a'), 'aaaa')
+    assert_equals(cache.size, 8)
+    cache.set('d', 'd' * 11)
+    assert_equals(cache.get('d'), None)
+
+
 def test_regex():
     yes = ('"/static/foo.png"',
            '"/static/foo.png"',
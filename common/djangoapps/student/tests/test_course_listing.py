@@ -9,12 +9,13 @@ from student.tests.factories import UserFactory
 from student.roles import GlobalStaff
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, check_mongo_calls
 from xmodule.modulestore.django import modulestore
 from xmodule.error_module import ErrorDescriptor
 from django.test.client import Client
 from student.models import CourseEnrollment
 from student.views import get_course_enrollment_pairs
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from util.milestones_helpers import (
     get_pre_requisite_courses_not_completed,
     set_prerequisite_courses,
@@ -82,6 +83,18 @@ class TestCourseListing(ModuleStoreTestCase):
         courses_list = list(get_course_enrollment_pairs(self.student, None, []))
         self.assertEqual(len(courses_list), 0)
 
+    def test_course_list_reads_overviews(self):
+        """
+        Test that listing courses reads their overviews, not the modulestore
+        """
+        course_location = self.store.make_course_key('Org1', 'Course1', 'Run1')
+        self._create_course_with_access_groups(course_location)
+
+        with check_mongo_calls(0):
+            courses_list = list(get_course_enrollment_pairs(self.student, None, []))
+        self.assertEqual(len(courses_list), 1)
+        self.assertIsInstance(courses_list[0][0], CourseOverview)
+
     def test_errored_course_regular_access(self):
         """
         Test the course list for regular staff when get_course returns an ErrorDescriptor
@@ -90,6 +103,8 @@ class TestCourseListing(ModuleStoreTestCase):
         mongo_store = modulestore()._get_modulestore_by_type(ModuleStoreEnum.Type.mongo)
         course_key = mongo_store.make_course_key('Org1', 'Course1', 'Run1')
         self._create_course_with_access_groups(course_key, default_store=ModuleStoreEnum.Type.mongo)
+        # The course broke before its overview was made
+        CourseOverview.objects.all().delete()
 
         with patch('xmodule.modulestore.mongo.base.MongoKeyValueStore', Mock(side_effect=Exception)):
             self.assertIsInstance(modulestore().get_course(course_key), ErrorDescriptor)
@@ -97,3 +97,12 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+    def send_batch(self, events):
+        """Insert the events in to the Mongo collection with a single bulk insert"""
+        try:
+            # Don't let one bad event lose the rest of the batch.
+            self.collection.insert(events, manipulate=False, continue_on_error=True)
+        except (PyMongoError, BSONError):
+            msg = 'Error inserting batch of {} events to MongoDB event tracker backend'.format(len(events))
+            log.exception(msg)
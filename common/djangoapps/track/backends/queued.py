@@ -0,0 +1,183 @@
+"""
+Event tracker backend that sends events to other backends from a background thread.
+
+Tracking is done while handling requests, so a slow backend (say, a Mongo
+server that's having a bad day) slows down every request.  This backend just
+puts the event in a bounded queue; a thread takes the events off the queue and
+sends them, in batches, to the backends it wraps::
+
+  TRACKING_BACKENDS = {
+      'queued': {
+          'ENGINE': 'track.backends.queued.QueuedBackend',
+          'OPTIONS': {
+              'backends': {
+                  'mongo': {
+                      'ENGINE': 'track.backends.mongodb.MongoBackend',
+                      'OPTIONS': {...},
+                  },
+              },
+              'max_queue_size': 10000,
+              'when_full': 'drop',
+          }
+      }
+  }
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+import Queue
+
+from dogapi import dog_stats_api
+
+from track.backends import BaseBackend
+
+
+log = logging.getLogger('track.backends.queued')
+
+# Put on the queue to stop the thread once it has sent the events before it.
+_STOP = object()
+
+
+class QueuedBackend(BaseBackend):
+    """Event tracker backend that queues events for other backends"""
+
+    def __init__(self, backends, max_queue_size=10000, batch_size=100, when_full='drop', block_timeout=None, **kwargs):
+        """
+        Configure the backends to send events to, and how.
+
+        :Parameters:
+
+          - `backends`: the backends to send events to, configured like
+            TRACKING_BACKENDS
+          - `max_queue_size`: how many events can be waiting to be sent
+          - `batch_size`: the most events sent to a backend at once
+          - `when_full`: what to do with an event when the queue is full:
+            'drop' it, or 'block' until there's room
+          - `block_timeout`: when blocking, how many seconds to wait before
+            dropping the event anyway, or None to wait forever
+
+        """
+        super(QueuedBackend, self).__init__(**kwargs)
+
+        if when_full not in ('drop', 'block'):
+            raise ValueError("when_full must be 'drop' or 'block', not {!r}".format(when_full))
+
+        # Imported here as track.tracker instantiates this backend.
+        from track.tracker import _instantiate_backend_from_name
+
+        self.backends = {}
+        for name, values in backends.iteritems():
+            if values:
+                self.backends[name] = _instantiate_backend_from_name(values['ENGINE'], values.get('OPTIONS', {}))
+
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.when_full = when_full
+        self.block_timeout = block_timeout
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def _start(self):
+        """
+        Start the thread, unless it's already running in this process.
+
+        A thread doesn't survive a fork, so check the pid.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = Queue.Queue(self.max_queue_size)
+            self._thread = threading.Thread(target=self._run, name='track.backends.queued')
+            self._thread.daemon = True
+            self._thread.start()
+            atexit.register(self.close)
+
+    def send(self, event):
+        """Queue the event to be sent."""
+        if self._pid != os.getpid():
+            self._start()
+
+        try:
+            if self.when_full == 'block':
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+        except Queue.Full:
+            dog_stats_api.increment('track.queued.dropped')
+            log.warning('Tracking queue is full, dropping %s event', event.get('event_type'))
+
+    def _run(self):
+        """
+        Send batches of events from the queue until told to stop.
+
+        A batch is whatever is waiting in the queue, up to `batch_size` events.
+        """
+        while True:
+            events = [self._queue.get()]
+            while len(events) < self.batch_size and events[-1] is not _STOP:
+                try:
+                    events.append(self._queue.get_nowait())
+                except Queue.Empty:
+                    break
+
+            stopping = events[-1] is _STOP
+            if stopping:
+                events.pop()
+
+            try:
+                dog_stats_api.gauge('track.queued.depth', self._queue.qsize())
+                if events:
+                    self._send_batch(events)
+            finally:
+                for _ in xrange(len(events) + stopping):
+                    self._queue.task_done()
+
+            if stopping:
+                return
+
+    def _send_batch(self, events):
+        """
+        Send the events to every backend.
+
+        One backend failing mustn't stop the others, or the thread.
+        """
+        dog_stats_api.histogram('track.queued.batch_size', len(events))
+        for name, backend in self.backends.iteritems():
+            try:
+                with dog_stats_api.timer('track.send.backend.{0}'.format(name)):
+                    backend.send_batch(events)
+            except Exception:  # pylint: disable=broad-except
+                log.exception('Error sending %d events to tracking backend %s', len(events), name)
+
+    def flush(self):
+        """
+        Wait until every event queued so far has been sent.
+        """
+        if self._pid == os.getpid():
+            self._queue.join()
+
+    def close(self, timeout=5):
+        """
+        Send the events in the queue, then stop the thread.
+
+        Wait at most `timeout` seconds.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            self._pid = None
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except Queue.Full:
+                log.warning('Tracking queue is full, %d events may be lost', self._queue.qsize())
+                return
+            self._thread.join(timeout)
@@ -0,0 +1,111 @@
+from __future__ import absolute_import
+
+import threading
+import time
+
+from django.test import TestCase
+
+from track.backends import BaseBackend
+from track.backends.queued import QueuedBackend
+
+
+class RecordingBackend(BaseBackend):
+    """A backend that records the batches it's sent, and can be made to wait."""
+
+    def __init__(self, **options):
+        super(RecordingBackend, self).__init__(**options)
+        self.batches = []
+        self.proceed = threading.Event()
+        self.proceed.set()
+
+    def send(self, event):
+        self.send_batch([event])
+
+    def send_batch(self, events):
+        self.proceed.wait()
+        self.batches.append(events)
+
+
+class BrokenBackend(BaseBackend):
+    """A backend that always fails."""
+
+    def send(self, event):
+        raise Exception('broken')
+
+
+class TestQueuedBackend(TestCase):
+    def _wait_for_empty_queue(self, backend):
+        """Wait for the thread to take everything off the queue."""
+        while backend._queue.qsize():  # pylint: disable=protected-access
+            time.sleep(0.01)
+
+    def _backend(self, **options):
+        """Make a QueuedBackend sending to a RecordingBackend and a BrokenBackend."""
+        backend = QueuedBackend(
+            backends={
+                'recording': {'ENGINE': 'track.backends.tests.test_queued.RecordingBackend'},
+                'broken': {'ENGINE': 'track.backends.tests.test_queued.BrokenBackend'},
+                'disabled': None,
+            },
+            **options
+        )
+        self.addCleanup(backend.close)
+        return backend
+
+    def test_events_are_sent(self):
+        backend = self._backend()
+        self.assertItemsEqual(backend.backends.keys(), ['recording', 'broken'])
+
+        for i in xrange(5):
+            backend.send({'test': i})
+        backend.flush()
+
+        recorded = [event for batch in backend.backends['recording'].batches for event in batch]
+        self.assertEqual(recorded, [{'test': i} for i in xrange(5)])
+
+    def test_batching(self):
+        backend = self._backend(batch_size=3)
+        recording = backend.backends['recording']
+
+        # Hold up the first event, so that the rest pile up in the queue
+        recording.proceed.clear()
+        backend.send({'test': 0})
+        self._wait_for_empty_queue(backend)
+        for i in xrange(1, 8):
+            backend.send({'test': i})
+        recording.proceed.set()
+        backend.flush()
+
+        self.assertEqual([len(batch) for batch in recording.batches], [1, 3, 3, 1])
+
+    def test_drop_when_full(self):
+        backend = self._backend(max_queue_size=2, when_full='drop')
+        recording = backend.backends['recording']
+
+        recording.proceed.clear()
+        backend.send({'test': 0})
+        self._wait_for_empty_queue(backend)
+        for i in xrange(1, 5):
+            backend.send({'test': i})
+        recording.proceed.set()
+        backend.flush()
+
+        recorded = [event for batch in recording.batches for event in batch]
+        self.assertEqual(recorded, [{'test': 0}, {'test': 1}, {'test': 2}])
+
+    def test_close_sends_queued_events(self):
+        backend = self._backend()
+        recording = backend.backends['recording']
+
+        recording.proceed.clear()
+        for i in xrange(3):
+            backend.send({'test': i})
+        recording.proceed.set()
+        backend.close()
+
+        recorded = [event for batch in recording.batches for event in batch]
+        self.assertEqual(len(recorded), 3)
+
+    def test_invalid_when_full(self):
+        with self.assertRaises(ValueError):
+            QueuedBackend(backends={}, when_full='explode')
@@ -16,6 +16,10 @@ below::
       }
   }
 
+To keep slow backends out of the request, wrap them in a
+`track.backends.queued.QueuedBackend`, which sends events to them from a
+background thread.
+
 """
 
 import inspect
@@ -7,6 +7,9 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+import threading
+from collections import OrderedDict, namedtuple
+
 import numpy
 import scipy.constants
 import functions
@@ -50,6 +53,11 @@ DEFAULT_FUNCTIONS = {
     'arccsch': functions.arccsch,
     'arccoth': functions.arccoth
 }
+# The DEFAULT_FUNCTIONS that work elementwise on numpy arrays, so that an
+# expression using only these can be evaluated over many samples at once.
+VECTORIZED_FUNCTIONS = frozenset(
+    func for func in DEFAULT_FUNCTIONS.itervalues() if func is not math.factorial
+)
 DEFAULT_VARIABLES = {
     'i': numpy.complex(0, 1),
     'j': numpy.complex(0, 1),
@@ -72,6 +80,11 @@ SUFFIXES = {
     'c': 1e-2, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12
 }
 
+# How many parsed expressions to keep around. Problems evaluate the same
+# student and instructor formulas over and over (once per random sample, and
+# again on every rescore), so even a modest cache avoids most of the parsing.
+EXPRESSION_CACHE_SIZE = 1000
+
 
 class UndefinedVariable(Exception):
     """
@@ -229,33 +242,377 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
         return float('nan')
 
     # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    expression = CompiledExpression(math_expr, case_sensitive)
 
     # Get our variables together.
     all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
     # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+    expression.check_variables(all_variables, all_functions)
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
+    return expression.evaluate(all_variables, all_functions)
 
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression once for each dictionary of variables in `variables_list`.
+
+    Return a list of the results, in order. This is equivalent to calling
+    `evaluator` once per dictionary, but parses the expression and gathers the
+    functions only once.
+    """
+    if math_expr.strip() == "":
+        return [float('nan')] * len(variables_list)
+
+    expression = CompiledExpression(math_expr, case_sensitive)
+    default_variables, all_functions = add_defaults({}, functions, case_sensitive)
+
+    all_variables_list = []
+    for variables in variables_list:
+        all_variables = dict(default_variables)
+        all_variables.update(variables if case_sensitive else lower_dict(variables))
+        expression.check_variables(all_variables, all_functions)
+        all_variables_list.append(all_variables)
+
+    # Try all the samples at once; if that isn't possible, or anything unusual
+    # happens, evaluate them one at a time so the results (and errors) are
+    # exactly those of `evaluator`.
+    results = expression.evaluate_vectorized(all_variables_list, all_functions)
+    if results is None:
+        results = [expression.evaluate(all_variables, all_functions) for all_variables in all_variables_list]
+    return results
+
+
+EVALUATE_ACTIONS = {
+    'atom': eval_atom,
+    'power': eval_power,
+    'parallel': eval_parallel,
+    'product': eval_product,
+    'sum': eval_sum
+}
+
+
+# The following are the evaluation actions again, for when variables are numpy
+# arrays holding one value per sample. They can't rely on `numbers.Number` to
+# tell values from operators, nor on comparing values with '+' etc.
+
+def vectorized_atom(parse_result):
+    """
+    Return the array wrapped by the atom.
+    """
+    return next(k for k in parse_result if not isinstance(k, basestring))
+
+
+def vectorized_power(parse_result):
+    """
+    Exponentiate the arrays, right to left.
+    """
+    parse_result = reversed([k for k in parse_result if not isinstance(k, basestring)])
+    return reduce(lambda a, b: b ** a, parse_result)
+
+
+def vectorized_parallel(parse_result):
+    """
+    Apply the parallel resistors operator elementwise; NaN wherever an input is zero.
+    """
+    values = [k for k in parse_result if not isinstance(k, basestring)]
+    if len(values) == 1:
+        return values[0]
+    has_zero = reduce(numpy.logical_or, [numpy.equal(k, 0) for k in values])
+    return numpy.where(has_zero, float('nan'), 1. / sum(1. / k for k in values))
+
+
+def vectorized_sum(parse_result):
+    """
+    Add the arrays, keeping in mind their sign.
+    """
+    total = 0.0
+    current_op = operator.add
+    for token in parse_result:
+        if isinstance(token, basestring):
+            current_op = operator.sub if token == '-' else operator.add
+        else:
+            total = current_op(total, token)
+    return total
+
+
+def vectorized_product(parse_result):
+    """
+    Multiply and divide the arrays.
+    """
+    prod = 1.0
+    current_op = operator.mul
+    for token in parse_result:
+        if isinstance(token, basestring):
+            current_op = operator.truediv if token == '/' else operator.mul
+        else:
+            prod = current_op(prod, token)
+    return prod
+
+
+VECTORIZED_ACTIONS = {
+    'atom': vectorized_atom,
+    'power': vectorized_power,
+    'parallel': vectorized_parallel,
+    'product': vectorized_product,
+    'sum': vectorized_sum
+}
+
+
+def compile_tree(node, casify, actions=None):
+    """
+    Turn a parse tree into a function of `(variables, functions)` that evaluates it.
+
+    Numbers are converted once, here, and the tree is only walked once; calling
+    the returned function just looks up the variables and functions and runs
+    the `actions` (by default, `EVALUATE_ACTIONS`).
+    """
+    if actions is None:
+        actions = EVALUATE_ACTIONS
+
+    if not isinstance(node, ParseResults):
+        # A terminal node, i.e. an operator or a parenthesis.
+        return lambda variables, functions: node
+
+    node_name = node.getName()
+    if node_name == 'number':
+        value = eval_number(node)
+        return lambda variables, functions: value
+    elif node_name == 'variable':
+        varname = casify(node[0])
+        return lambda variables, functions: variables[varname]
+    elif node_name == 'function':
+        funcname = casify(node[0])
+        argument = compile_tree(node[1], casify, actions)
+        return lambda variables, functions: functions[funcname](argument(variables, functions))
+    elif node_name not in actions:  # pragma: no cover
+        raise Exception(u"Unknown branch name '{}'".format(node_name))
+
+    action = actions[node_name]
+    kids = [compile_tree(k, casify, actions) for k in node]
+    return lambda variables, functions: action([kid(variables, functions) for kid in kids])
+
+
+class CompiledExpression(object):
+    """
+    A math expression parsed and compiled once, to be evaluated many times.
+
+    Use it like:
+      expression = CompiledExpression('x^2 + y', case_sensitive)
+      expression.check_variables(all_variables, all_functions)
+      expression.evaluate(all_variables, all_functions)
+    where the dictionaries already include the defaults (see `add_defaults`).
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        self.math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+        self.math_interpreter.parse_algebra()
+
+        if case_sensitive:
+            casify = lambda x: x
+        else:
+            casify = lambda x: x.lower()  # Lowercase for case insens.
+        self.casify = casify
+        self._evaluate = compile_tree(self.math_interpreter.tree, casify)
+        self._evaluate_vectorized = None
+
+    def check_variables(self, valid_variables, valid_functions):
+        """
+        Raise an UndefinedVariable if the expression uses anything not defined.
+        """
+        self.math_interpreter.check_variables(valid_variables, valid_functions)
+
+    def evaluate(self, all_variables, all_functions):
+        """
+        Return the value of the expression for these variables and functions.
+        """
+        return self._evaluate(all_variables, all_functions)
+
+    def evaluate_vectorized(self, all_variables_list, all_functions):
+        """
+        Evaluate the expression for every dictionary of variables at once, using numpy.
+
+        Return a list of the results, or None if that isn't possible: if the
+        expression uses a function not in VECTORIZED_FUNCTIONS, doesn't use any
+        variables, or if a variable isn't a float or complex in every sample.
+        Also return None if any result is infinite or NaN, or evaluation raises
+        an error, as the scalar evaluation may handle those differently (e.g.
+        raising ZeroDivisionError where numpy gives inf).
+        """
+        functions_used = set(self.casify(func) for func in self.math_interpreter.functions_used)
+        if any(all_functions[func] not in VECTORIZED_FUNCTIONS for func in functions_used):
+            return None
+        variables_used = set(self.casify(var) for var in self.math_interpreter.variables_used)
+        if not variables_used or not all_variables_list:
+            return None
+
+        variable_arrays = {}
+        for varname in variables_used:
+            values = numpy.array([all_variables[varname] for all_variables in all_variables_list])
+            if values.dtype.kind not in 'fc':
+                return None
+            variable_arrays[varname] = values
+
+        if self._evaluate_vectorized is None:
+            self._evaluate_vectorized = compile_tree(self.math_interpreter.tree, self.casify, VECTORIZED_ACTIONS)
+        try:
+            with numpy.errstate(all='ignore'):
+                results = numpy.asarray(self._evaluate_vectorized(variable_arrays, all_functions))
+        except Exception:  # pylint: disable=broad-except
+            return None
+        if results.shape != (len(all_variables_list),) or not numpy.all(numpy.isfinite(results)):
+            return None
+        return results.tolist()
+
+
+def build_grammar():
+    """
+    Build the pyparsing grammar for algebraic expressions.
+
+    The grammar is the same whatever the case sensitivity, and whatever
+    variables and functions are defined, so it only needs to be built once.
+    """
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with letters/underscores
+    # and may contain numbers afterward.
+    inner_varname = Word(alphas + "_", alphanums + "_")
+    varname = Group(inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=pointless-statement
+    grammar = expr + stringEnd
+    # `parseString` streamlines the grammar in place the first time it's used;
+    # do it now so that parsing never modifies the shared grammar.
+    grammar.streamline()
+    return grammar
+
+
+ParsedExpression = namedtuple('ParsedExpression', ['tree', 'variables_used', 'functions_used'])
+
+
+def find_names(tree):
+    """
+    Return the sets of variable names and function names used in a parse tree.
+    """
+    variables_used = set()
+    functions_used = set()
+
+    def visit(node):
+        """
+        Record the names in `node` and its children.
+        """
+        if not isinstance(node, ParseResults):
+            return
+        node_name = node.getName()
+        if node_name == 'variable':
+            variables_used.add(node[0])
+        elif node_name == 'function':
+            functions_used.add(node[0])
+        for kid in node:
+            visit(kid)
+
+    visit(tree)
+    return frozenset(variables_used), frozenset(functions_used)
+
+
+class ExpressionCache(object):
+    """
+    A thread-safe LRU of `ParsedExpression`s keyed by the expression string.
+
+    The trees are shared between callers, so they must not be modified.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._grammar = None
+        self._expressions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def grammar(self):
+        """
+        The grammar, built the first time it's needed.
+        """
+        if self._grammar is None:
+            with self._lock:
+                if self._grammar is None:
+                    self._grammar = build_grammar()
+        return self._grammar
+
+    def parse(self, math_expr):
+        """
+        Return the ParsedExpression for `math_expr`, parsing it if it isn't cached.
+
+        Raise a `pyparsing.ParseException` if it can't be parsed.
+        """
+        with self._lock:
+            parsed = self._expressions.pop(math_expr, None)
+            if parsed is not None:
+                self._expressions[math_expr] = parsed
+                self.hits += 1
+        if parsed is not None:
+            return parsed
+
+        tree = self.grammar.parseString(math_expr)[0]
+        parsed = ParsedExpression(tree, *find_names(tree))
+        with self._lock:
+            self.misses += 1
+            self._expressions[math_expr] = parsed
+            while len(self._expressions) > self.max_size:
+                self._expressions.popitem(last=False)
+        return parsed
+
+    def clear(self):
+        """
+        Remove every expression, and reset the counters.
+        """
+        with self._lock:
+            self._expressions.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+expression_cache = ExpressionCache(EXPRESSION_CACHE_SIZE)
 
 
 class ParseAugmenter(object):
@@ -278,23 +635,6 @@ class ParseAugmenter(object):
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
@@ -302,62 +642,16 @@ class ParseAugmenter(object):
         Store a `pyparsing.ParseResult` in `self.tree` with proper groupings to
         reflect parenthesis and order of operations. Leave all operators in the
         tree and do not parse any strings of numbers into their float versions.
+        The tree comes from `expression_cache` and is shared, so don't modify it.
 
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with letters/underscores
-        # and may contain numbers afterward.
-        inner_varname = Word(alphas + "_", alphanums + "_")
-        varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        parsed = expression_cache.parse(self.math_expr)
+        self.tree = parsed.tree
+        self.variables_used = set(parsed.variables_used)
+        self.functions_used = set(parsed.functions_used)
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
@@ -559,3 +559,106 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Run tests for calc.evaluate_samples and the cache of parsed expressions
+    """
+
+    def setUp(self):
+        super(EvaluateSamplesTest, self).setUp()
+        calc.expression_cache.clear()
+        self.addCleanup(calc.expression_cache.clear)
+
+    def test_matches_evaluator(self):
+        """
+        Each result should be what `evaluator` gives for that sample
+        """
+        samples = [{'x': 1.0, 'Y': 2.0}, {'x': -3.5, 'Y': 0.25}, {'x': 10, 'Y': 4}]
+        functions = {'f': lambda z: z * 2}
+        for case_sensitive in (False, True):
+            expression = "f(x)^2 + sin(Y) / (x || Y) - 3k"
+            self.assertEqual(
+                calc.evaluate_samples(samples, functions, expression, case_sensitive=case_sensitive),
+                [calc.evaluator(sample, functions, expression, case_sensitive=case_sensitive) for sample in samples]
+            )
+
+    def test_empty_expression(self):
+        results = calc.evaluate_samples([{}, {}], {}, "  ")
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(numpy.isnan(result) for result in results))
+
+    def test_undefined_vars(self):
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            calc.evaluate_samples([{'x': 1}, {'x': 2}], {}, "x + y")
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'X'):
+            calc.evaluate_samples([{'x': 1}], {}, "X", case_sensitive=True)
+
+    def test_expression_cache(self):
+        """
+        Each expression should only be parsed once
+        """
+        calc.evaluate_samples([{'x': 1}, {'x': 2}], {}, "x^2")
+        calc.evaluator({'X': 3}, {}, "x^2")
+        calc.evaluator({'x': 3}, {}, "x^2", case_sensitive=True)
+        self.assertEqual(calc.expression_cache.misses, 1)
+        self.assertEqual(calc.expression_cache.hits, 2)
+
+        # Invalid expressions aren't cached
+        for _ in range(2):
+            with self.assertRaises(ParseException):
+                calc.evaluator({}, {}, "1 +* 2")
+        self.assertEqual(calc.expression_cache.misses, 1)
+
+    def test_expression_cache_size(self):
+        cache = calc.ExpressionCache(2)
+        first = cache.parse("1 + 2")
+        cache.parse("3 + 4")
+        self.assertIs(cache.parse("1 + 2"), first)
+        cache.parse("5 + 6")
+        # "3 + 4" was the least recently used
+        self.assertEqual(cache.parse("1 + 2").tree, first.tree)
+        cache.parse("3 + 4")
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+    def _all_variables(self, samples):
+        """
+        Add the default variables to each sample, as `evaluate_samples` does.
+        """
+        return [dict(calc.DEFAULT_VARIABLES, **sample) for sample in samples]
+
+    def test_vectorized(self):
+        """
+        Expressions using the default functions are evaluated with numpy arrays
+        """
+        # complex, so that every function is defined for every sample
+        samples = [{'x': 0.3 + 0.2j, 'y': -2.5}, {'x': 1.7 - 0.4j, 'y': 1.5}, {'x': -0.1j, 'y': 3.0}]
+        all_variables_list = self._all_variables(samples)
+        for func in sorted(calc.DEFAULT_FUNCTIONS):
+            if func in ('fact', 'factorial'):
+                continue
+            expression_text = "{}(x) + 2*y^2 - x/y + (x || y) + pi*i".format(func)
+            expression = calc.CompiledExpression(expression_text)
+            vectorized = expression.evaluate_vectorized(all_variables_list, calc.DEFAULT_FUNCTIONS)
+            self.assertIsNotNone(vectorized, expression_text)
+            for result, all_variables in zip(vectorized, all_variables_list):
+                self.assertAlmostEqual(result, expression.evaluate(all_variables, calc.DEFAULT_FUNCTIONS))
+
+    def test_vectorized_fallback(self):
+        """
+        Anything numpy can't do exactly like `evaluator` is evaluated a sample at a time
+        """
+        all_variables_list = self._all_variables([{'x': 0.0}, {'x': 3.0}])
+        functions = dict(calc.DEFAULT_FUNCTIONS, f=lambda z: z)
+        for expression_text in ("fact(x)", "f(x)", "1/x", "x || 2", "3 + 4"):
+            expression = calc.CompiledExpression(expression_text)
+            self.assertIsNone(expression.evaluate_vectorized(all_variables_list, functions), expression_text)
+
+        # Which gives the same results and errors as `evaluator`
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples([{'x': 3.0}, {'x': 0.0}], {}, "1/x")
+        results = calc.evaluate_samples([{'x': 3.0}, {'x': 0.0}], {}, "x || 2")
+        self.assertAlmostEqual(results[0], 1.2)
+        self.assertTrue(numpy.isnan(results[1]))
+        self.assertEqual(calc.evaluate_samples([{'x': 3}], {}, "fact(x)"), [6])
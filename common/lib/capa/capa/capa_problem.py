@@ -58,6 +58,28 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+
+def get_max_score_from_xml(problem_text):
+    """
+    Return the maximum score of the problem whose XML is problem_text, as
+    LoncapaProblem.get_max_score would, but without running the problem's scripts
+    or creating its responders.
+
+    Returns None if the problem includes other files, whose responses can't be
+    counted without a filestore.
+    """
+    tree = etree.XML(problem_text)
+    if tree.find('.//include') is not None:
+        return None
+
+    input_tags = inputtypes.registry.registered_tags() + solution_tags
+    maxscore = 0
+    for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
+        responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
+        for inputfield in response.xpath("|".join(['.//' + tag for tag in input_tags])):
+            maxscore += responsetype_cls.get_input_max_points(inputfield)
+    return maxscore
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -36,7 +36,7 @@ from shapely.geometry import Point, MultiPoint
 import dogstats_wrapper as dog_stats_api
 
 # specific library imports
-from calc import evaluator, UndefinedVariable
+from calc import evaluator, evaluate_samples, UndefinedVariable
 from . import correctmap
 from .registry import TagRegistry
 from datetime import datetime
@@ -189,9 +189,7 @@ class LoncapaResponse(object):
         # map input_id -> maxpoints
         self.maxpoints = dict()
         for inputfield in self.inputfields:
-            # By default, each answerfield is worth 1 point
-            maxpoints = inputfield.get('points', '1')
-            self.maxpoints.update({inputfield.get('id'): int(maxpoints)})
+            self.maxpoints.update({inputfield.get('id'): self.get_input_max_points(inputfield)})
 
         # dict for default answer map (provided in input elements)
         self.default_answer_map = {}
@@ -210,6 +208,14 @@ class LoncapaResponse(object):
         """
         return sum(self.maxpoints.values())
 
+    @classmethod
+    def get_input_max_points(cls, inputfield):
+        """
+        Return the maximum points of the answer field inputfield.
+        """
+        # By default, each answerfield is worth 1 point
+        return int(inputfield.get('points', '1'))
+
     def render_html(self, renderer, response_msg=''):
         """
         Return XHTML Element tree representation of this Response.
@@ -2390,55 +2396,53 @@ class FormulaResponse(LoncapaResponse):
         """
         _ = self.capa_system.i18n.ugettext
 
-        out = []
-        for var_dict in var_dict_list:
-            try:
-                out.append(evaluator(
-                    var_dict,
-                    dict(),
-                    answer,
-                    case_sensitive=self.case_sensitive,
-                ))
-            except UndefinedVariable as err:
+        try:
+            out = evaluate_samples(
+                var_dict_list,
+                dict(),
+                answer,
+                case_sensitive=self.case_sensitive,
+            )
+        except UndefinedVariable as err:
+            log.debug(
+                'formularesponse: undefined variable in formula=%s',
+                cgi.escape(answer)
+            )
+            raise StudentInputError(
+                _("Invalid input: {bad_input} not permitted in answer.").format(bad_input=err.message)
+            )
+        except ValueError as err:
+            if 'factorial' in err.message:
+                # This is thrown when fact() or factorial() is used in a formularesponse answer
+                #   that tests on negative and/or non-integer inputs
+                # err.message will be: `factorial() only accepts integral values` or
+                # `factorial() not defined for negative values`
                 log.debug(
-                    'formularesponse: undefined variable in formula=%s',
+                    ('formularesponse: factorial function used in response '
+                     'that tests negative and/or non-integer inputs. '
+                     'Provided answer was: %s'),
                     cgi.escape(answer)
                 )
                 raise StudentInputError(
-                    _("Invalid input: {bad_input} not permitted in answer.").format(bad_input=err.message)
+                    _("factorial function not permitted in answer "
+                      "for this problem. Provided answer was: "
+                      "{bad_input}").format(bad_input=cgi.escape(answer))
                 )
-            except ValueError as err:
-                if 'factorial' in err.message:
-                    # This is thrown when fact() or factorial() is used in a formularesponse answer
-                    #   that tests on negative and/or non-integer inputs
-                    # err.message will be: `factorial() only accepts integral values` or
-                    # `factorial() not defined for negative values`
-                    log.debug(
-                        ('formularesponse: factorial function used in response '
-                         'that tests negative and/or non-integer inputs. '
-                         'Provided answer was: %s'),
-                        cgi.escape(answer)
-                    )
-                    raise StudentInputError(
-                        _("factorial function not permitted in answer "
-                          "for this problem. Provided answer was: "
-                          "{bad_input}").format(bad_input=cgi.escape(answer))
-                    )
-                # If non-factorial related ValueError thrown, handle it the same as any other Exception
-                log.debug('formularesponse: error %s in formula', err)
-                raise StudentInputError(
-                    _("Invalid input: Could not parse '{bad_input}' as a formula.").format(
-                        bad_input=cgi.escape(answer)
-                    )
+            # If non-factorial related ValueError thrown, handle it the same as any other Exception
+            log.debug('formularesponse: error %s in formula', err)
+            raise StudentInputError(
+                _("Invalid input: Could not parse '{bad_input}' as a formula.").format(
+                    bad_input=cgi.escape(answer)
                 )
-            except Exception as err:
-                # traceback.print_exc()
-                log.debug('formularesponse: error %s in formula', err)
-                raise StudentInputError(
-                    _("Invalid input: Could not parse '{bad_input}' as a formula").format(
-                        bad_input=cgi.escape(answer)
-                    )
+            )
+        except Exception as err:
+            # traceback.print_exc()
+            log.debug('formularesponse: error %s in formula', err)
+            raise StudentInputError(
+                _("Invalid input: Could not parse '{bad_input}' as a formula").format(
+                    bad_input=cgi.escape(answer)
                 )
+            )
         return out
 
     def randomize_variables(self, samples):
@@ -2755,7 +2759,6 @@ class AnnotationResponse(LoncapaResponse):
     def setup_response(self):
         self.scoring_map = self._get_scoring_map()
         self.answer_map = self._get_answer_map()
-        self.maxpoints = self._get_max_points()
 
     def get_score(self, student_answers):
         """
@@ -2809,11 +2812,10 @@ class AnnotationResponse(LoncapaResponse):
                 answer_map[input_id] = correct_option.get('description')
         return answer_map
 
-    def _get_max_points(self):
-        """Returns a dict of the max points for each input: input id -> maxpoints."""
-        scoring = self.default_scoring
-        correct_points = scoring.get('correct')
-        return dict([(inputfield.get('id'), correct_points) for inputfield in self.inputfields])
+    @classmethod
+    def get_input_max_points(cls, inputfield):
+        """Returns the max points for an input: the points for a correct answer."""
+        return cls.default_scoring.get('correct')
 
     def _find_options(self, inputfield):
         """Returns an array of dicts where each dict represents an option. """
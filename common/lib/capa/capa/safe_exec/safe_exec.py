@@ -4,9 +4,13 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from . import worker_pool
 from dogapi import dog_stats_api
 
 import hashlib
+import logging
+
+log = logging.getLogger(__name__)
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -127,18 +131,30 @@ def safe_exec(
     # Create the complete code we'll run.
     code_prolog = CODE_PROLOG % random_seed
 
-    # Decide which code executor to use.
+    # Decide which code executor to use.  The warm worker pool, if there is
+    # one, can't provide extra files or python_path entries to the code.
+    pool = None
     if unsafely:
         exec_fn = codejail_not_safe_exec
     else:
         exec_fn = codejail_safe_exec
+        if not python_path and not extra_files:
+            pool = worker_pool.get_pool()
 
     # Run the code!  Results are side effects in globals_dict.
     try:
-        exec_fn(
-            code_prolog + LAZY_IMPORTS + code, globals_dict,
-            python_path=python_path, extra_files=extra_files, slug=slug,
-        )
+        if pool is not None:
+            try:
+                pool.safe_exec(code_prolog + LAZY_IMPORTS + code, globals_dict, slug=slug)
+            except worker_pool.WorkerError as err:
+                log.warning("Sandbox worker pool couldn't run %s, running it directly: %s", slug, err)
+                dog_stats_api.increment('capa.safe_exec.pool.fallback')
+                pool = None
+        if pool is None:
+            exec_fn(
+                code_prolog + LAZY_IMPORTS + code, globals_dict,
+                python_path=python_path, extra_files=extra_files, slug=slug,
+            )
     except SafeExecException as e:
         emsg = e.message
     else:
@@ -0,0 +1,153 @@
+"""
+A long-lived sandboxed process that runs capa's Python code in forked children.
+
+This file isn't imported by capa: `worker_pool` reads its source and runs it
+with the sandboxed Python, just as codejail runs its own jailed code.  The
+process imports the modules capa code expects once, and then reads jobs from
+stdin, one JSON object per line.  Each job is run in a child forked just for
+it, with codejail's resource limits applied, so no job can see or change
+another job's state, or the warmed-up parent's.  The result is written to
+stdout, also one JSON object per line.
+
+A job looks like::
+
+    {"code": "...", "globals": {...}, "limits": {"CPU": 1, "REALTIME": 1, "VMEM": 0}}
+
+and its result like::
+
+    {"emsg": null, "globals": {...}}
+
+where `emsg` is the traceback if the code raised an exception, in which case
+`globals` is empty.
+
+"""
+
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import time
+import traceback
+
+
+def preimport(modnames):
+    """
+    Import the named modules, so that forked children needn't.
+
+    Modules that can't be imported are left for the job's code to fail on.
+    """
+    for modname in modnames:
+        try:
+            __import__(modname)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+
+def set_process_limits(limits):
+    """
+    Apply codejail's `limits` to this (forked child) process.
+
+    As in codejail, jailed code can't create files or processes.
+    """
+    if limits.get("CPU"):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits["CPU"], limits["CPU"]))
+    if limits.get("VMEM"):
+        resource.setrlimit(resource.RLIMIT_AS, (limits["VMEM"], limits["VMEM"]))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def jsonable(value):
+    """
+    Can `value` be sent back as JSON?
+    """
+    try:
+        json.dumps(value)
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def run_job(job):
+    """
+    Run the job's code, and return its result.
+    """
+    globals_dict = job["globals"]
+    try:
+        exec job["code"] in globals_dict  # pylint: disable=exec-used
+    except Exception:  # pylint: disable=broad-except
+        return {"emsg": traceback.format_exc(), "globals": {}}
+    return {
+        "emsg": None,
+        "globals": dict(
+            (name, value) for name, value in globals_dict.iteritems()
+            if not name.startswith("__") and jsonable(value)
+        ),
+    }
+
+
+def run_forked(job):
+    """
+    Run `job` in a forked child, killing it if it exceeds its real time limit.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # The child: never return from here, only exit.
+        try:
+            os.close(read_fd)
+            devnull = os.open(os.devnull, os.O_RDWR)
+            os.dup2(devnull, 0)
+            os.dup2(devnull, 1)
+            set_process_limits(job["limits"])
+            result = json.dumps(run_job(job))
+            while result:
+                result = result[os.write(write_fd, result):]
+        finally:
+            os._exit(0)  # pylint: disable=protected-access
+
+    os.close(write_fd)
+    realtime = job["limits"].get("REALTIME")
+    deadline = time.time() + realtime if realtime else None
+    chunks = []
+    killed = False
+    while True:
+        timeout = max(deadline - time.time(), 0) if deadline else None
+        readable, _, _ = select.select([read_fd], [], [], timeout)
+        if not readable:
+            os.kill(pid, signal.SIGKILL)
+            killed = True
+            break
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+
+    if not killed:
+        try:
+            return json.loads("".join(chunks))
+        except ValueError:
+            pass
+    return {"emsg": "Couldn't execute jailed code: the process was killed", "globals": {}}
+
+
+def serve(modnames):
+    """
+    Answer jobs from stdin until it's closed.
+    """
+    preimport(modnames)
+    # Say that we're ready.
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+    for line in iter(sys.stdin.readline, ""):
+        result = run_forked(json.loads(line))
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1:])
@@ -0,0 +1,85 @@
+"""Test worker_pool.py"""
+
+import sys
+import unittest
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException
+from mock import patch
+
+from capa.safe_exec import worker_pool
+from capa.safe_exec.worker_pool import SandboxWorkerPool, WorkerError
+
+
+class TestSandboxWorkerPool(unittest.TestCase):
+    """
+    Test the pool, using this Python, unsandboxed, as the "sandboxed" Python.
+    """
+    def setUp(self):
+        super(TestSandboxWorkerPool, self).setUp()
+        patcher = patch.dict(jail_code.COMMANDS, {"python": [sys.executable, "-E", "-B"]})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.pool = SandboxWorkerPool(size=1, max_wait=0.1)
+        self.addCleanup(self.pool.close)
+
+    def test_set_values(self):
+        g = {'a': 17}
+        self.pool.safe_exec("b = a + 1", g)
+        self.assertEqual(g, {'a': 17, 'b': 18})
+
+    def test_raising_exceptions(self):
+        g = {}
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("a = 1; 1/0", g)
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+        self.assertEqual(g, {})
+
+    def test_jobs_are_isolated(self):
+        # The worker is reused, but each job runs in a fresh copy of it.
+        self.pool.safe_exec("import math; math.pi = 3", {})
+        g = {}
+        self.pool.safe_exec("import math; pi = math.pi", g)
+        self.assertNotEqual(g['pi'], 3)
+
+    def test_realtime_limit(self):
+        with patch.dict(jail_code.LIMITS, {"REALTIME": 0.5}):
+            with self.assertRaises(SafeExecException):
+                self.pool.safe_exec("while True: pass", {})
+            # The worker survives to run the next job.
+            g = {}
+            self.pool.safe_exec("a = 1", g)
+            self.assertEqual(g['a'], 1)
+
+    def test_no_free_worker(self):
+        worker = self.pool._acquire()  # pylint: disable=protected-access
+        self.addCleanup(worker.close)
+        with self.assertRaises(WorkerError):
+            self.pool.safe_exec("a = 1", {})
+
+
+class TestConfigure(unittest.TestCase):
+    """
+    Test turning the pool on and off.
+    """
+    def tearDown(self):
+        worker_pool.configure(0)
+        super(TestConfigure, self).tearDown()
+
+    def test_get_pool(self):
+        self.assertIsNone(worker_pool.get_pool())
+
+        with patch.dict(jail_code.COMMANDS, {"python": [sys.executable]}):
+            worker_pool.configure(2, max_wait=5)
+            pool = worker_pool.get_pool()
+            self.assertEqual((pool.size, pool.max_wait), (2, 5))
+            self.assertIs(worker_pool.get_pool(), pool)
+
+            worker_pool.configure(0)
+            self.assertIsNone(worker_pool.get_pool())
+
+    def test_needs_codejail(self):
+        worker_pool.configure(2)
+        with patch.dict(jail_code.COMMANDS, clear=True):
+            self.assertIsNone(worker_pool.get_pool())
@@ -0,0 +1,245 @@
+"""
+A pool of warmed-up sandboxed processes for running capa's Python code.
+
+Starting a sandboxed Python and importing numpy, scipy and the rest takes much
+longer than most capa code takes to run.  The workers here are started once,
+with the same sandboxed Python that codejail uses, and import those modules
+once.  Each job is then run in a child process forked from a worker (see
+`sandbox_worker`), which gets a fresh copy of the warmed-up process and is
+thrown away afterwards.
+
+The pool is off unless `configure` is called with a size, and it's only used
+while codejail is configured to run Python.
+
+"""
+
+import json
+import logging
+import os
+import select
+import subprocess
+import threading
+import time
+import Queue
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+from dogapi import dog_stats_api
+
+from . import sandbox_worker
+
+log = logging.getLogger(__name__)
+
+# The modules the workers import before they run any jobs.
+PREIMPORTED_MODULES = [
+    "numpy",
+    "math",
+    "scipy",
+    "sympy",
+    "calc",
+    "eia",
+    "chem.chemcalc",
+    "chem.chemtools",
+    "chem.miller",
+    "verifiers.draganddrop",
+]
+
+# How long to wait, in seconds, beyond a job's REALTIME limit for a worker's reply.
+REPLY_GRACE_PERIOD = 5
+
+# We'll need the source of sandbox_worker.py to run it in the sandbox, so read it now.
+sandbox_worker_py_file = sandbox_worker.__file__
+if sandbox_worker_py_file.endswith("c"):
+    sandbox_worker_py_file = sandbox_worker_py_file[:-1]
+
+sandbox_worker_py = open(sandbox_worker_py_file).read()
+
+
+class WorkerError(Exception):
+    """
+    A worker couldn't run a job, or no worker was available to run it.
+
+    This is about the pool, not the job's code: the job can still be run
+    another way.
+    """
+    pass
+
+
+class SandboxWorker(object):
+    """
+    One long-lived sandboxed process, talking to us over its stdin and stdout.
+    """
+    def __init__(self, argv, startup_timeout):
+        with open(os.devnull, "w") as devnull:
+            self.process = subprocess.Popen(
+                argv + ["-c", sandbox_worker_py] + PREIMPORTED_MODULES,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull,
+                close_fds=True,
+            )
+        # The worker writes an empty line once it has imported everything.
+        try:
+            self._read_line(startup_timeout)
+        except WorkerError:
+            self.close()
+            raise
+
+    def run(self, job, timeout):
+        """
+        Send `job` to the worker, and return its result.
+        """
+        try:
+            self.process.stdin.write(json.dumps(job) + "\n")
+            self.process.stdin.flush()
+        except (IOError, OSError) as err:
+            raise WorkerError("Couldn't send job to sandbox worker: {}".format(err))
+        try:
+            return json.loads(self._read_line(timeout))
+        except ValueError as err:
+            raise WorkerError("Bad reply from sandbox worker: {}".format(err))
+
+    def _read_line(self, timeout):
+        """
+        Read a line from the worker, waiting at most `timeout` seconds.
+        """
+        readable, _, _ = select.select([self.process.stdout], [], [], timeout)
+        if not readable:
+            raise WorkerError("Sandbox worker didn't reply in {} seconds".format(timeout))
+        line = self.process.stdout.readline()
+        if not line:
+            raise WorkerError("Sandbox worker exited")
+        return line
+
+    def close(self):
+        """
+        Stop the worker.
+
+        It runs as the sandbox user, so we may not be allowed to kill it;
+        closing its stdin makes it exit once it's done with any job it has.
+        """
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except (IOError, OSError):
+                pass
+
+
+class SandboxWorkerPool(object):
+    """
+    Up to `size` SandboxWorkers, started as they're needed.
+
+    A job waits at most `max_wait` seconds for a worker to be free.
+    """
+    def __init__(self, size, max_wait):
+        self.size = size
+        self.max_wait = max_wait
+        self.pid = os.getpid()
+        self._started = 0
+        self._idle = Queue.Queue()
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        """
+        Return an idle worker, starting one if there's room in the pool.
+        """
+        try:
+            return self._idle.get_nowait()
+        except Queue.Empty:
+            pass
+
+        with self._lock:
+            start_worker = self._started < self.size
+            if start_worker:
+                self._started += 1
+        if start_worker:
+            try:
+                return SandboxWorker(jail_code.COMMANDS["python"], startup_timeout=max(self.max_wait, 30))
+            except (WorkerError, OSError) as err:
+                self._discard()
+                raise WorkerError("Couldn't start sandbox worker: {}".format(err))
+
+        try:
+            return self._idle.get(timeout=self.max_wait)
+        except Queue.Empty:
+            raise WorkerError("No sandbox worker free after {} seconds".format(self.max_wait))
+
+    def _discard(self, worker=None):
+        """
+        Forget a worker that failed, making room for a new one.
+        """
+        if worker is not None:
+            worker.close()
+        with self._lock:
+            self._started -= 1
+
+    def safe_exec(self, code, globals_dict, slug=None):
+        """
+        Run `code` in a worker, like `codejail.safe_exec.safe_exec`.
+
+        Changes to the globals are visible in `globals_dict` when this returns.
+        Raise SafeExecException if the code raises an exception, and WorkerError
+        if the pool couldn't run it.
+        """
+        limits = dict(jail_code.LIMITS)
+        job = {"code": code, "globals": json_safe(globals_dict), "limits": limits}
+
+        waiting_since = time.time()
+        worker = self._acquire()
+        started = time.time()
+        dog_stats_api.histogram("capa.safe_exec.pool.queue_wait", started - waiting_since)
+        try:
+            result = worker.run(job, timeout=(limits.get("REALTIME") or 60) + REPLY_GRACE_PERIOD)
+        except WorkerError:
+            self._discard(worker)
+            raise
+        self._idle.put(worker)
+        dog_stats_api.histogram("capa.safe_exec.pool.exec_time", time.time() - started)
+
+        if result["emsg"]:
+            log.debug("Sandbox worker code failed (%s): %s", slug, result["emsg"])
+            raise SafeExecException("Couldn't execute jailed code: {}".format(result["emsg"]))
+        globals_dict.update(result["globals"])
+
+    def close(self):
+        """
+        Stop all the idle workers.
+        """
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except Queue.Empty:
+                break
+            self._discard(worker)
+
+
+_pool_config = {"size": 0, "max_wait": 1}
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configure(size, max_wait=1):
+    """
+    Use a pool of up to `size` workers, or none if `size` is 0.
+
+    Jobs wait at most `max_wait` seconds for a worker, and are otherwise run
+    by codejail in a new process.
+    """
+    global _pool  # pylint: disable=global-statement
+    with _pool_lock:
+        _pool_config.update(size=size, max_wait=max_wait)
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_pool():
+    """
+    Return the SandboxWorkerPool to use, or None if jobs shouldn't use one.
+    """
+    global _pool  # pylint: disable=global-statement
+    if not _pool_config["size"] or not jail_code.is_configured("python"):
+        return None
+    with _pool_lock:
+        # Workers can't be shared with processes forked from the one that started them.
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = SandboxWorkerPool(**_pool_config)
+        return _pool
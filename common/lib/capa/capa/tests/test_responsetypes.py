@@ -22,6 +22,7 @@ import calc
 
 from capa.responsetypes import LoncapaProblemError, \
     StudentInputError, ResponseError
+from capa.capa_problem import get_max_score_from_xml
 from capa.correctmap import CorrectMap
 from capa.tests.response_xml_factory import (
     AnnotationResponseXMLFactory,
@@ -2358,3 +2359,38 @@ class ChoiceTextResponseTest(ResponseTest):
                 correctness,
                 msg="{0} should be {1}".format(name, correctness)
             )
+
+
+class MaxScoreFromXMLTest(unittest.TestCase):
+    """
+    Tests that get_max_score_from_xml agrees with LoncapaProblem.get_max_score.
+    """
+
+    def assert_max_score(self, xml, expected):
+        self.assertEqual(get_max_score_from_xml(xml), expected)
+        self.assertEqual(new_loncapa_problem(xml).get_max_score(), expected)
+
+    def test_default_points(self):
+        xml = ChoiceResponseXMLFactory().build_xml(choice_type='checkbox', choices=[True, False])
+        self.assert_max_score(xml, 1)
+
+    def test_points_attribute(self):
+        xml = textwrap.dedent("""
+            <problem>
+                <stringresponse answer="a">
+                    <textline points="3"/>
+                </stringresponse>
+                <stringresponse answer="b">
+                    <textline/>
+                </stringresponse>
+            </problem>
+        """)
+        self.assert_max_score(xml, 4)
+
+    def test_annotation_response(self):
+        xml = AnnotationResponseXMLFactory().build_xml(options=(('x', 'correct'), ('y', 'incorrect')))
+        self.assert_max_score(xml, 2)
+
+    def test_include(self):
+        xml = '<problem><include file="other.xml"/><stringresponse answer="a"><textline/></stringresponse></problem>'
+        self.assertIsNone(get_max_score_from_xml(xml))
@@ -4,11 +4,13 @@ import logging
 import sys
 from lxml import etree
 
+from lazy import lazy
 from pkg_resources import resource_string
 
 import dogstats_wrapper as dog_stats_api
 from .capa_base import CapaMixin, CapaFields, ComplexEncoder
 from capa import responsetypes
+from capa.capa_problem import get_max_score_from_xml
 from .progress import Progress
 from xmodule.x_module import XModule, module_attr, DEPRECATION_VSCOMPAT_EVENT
 from xmodule.raw_module import RawDescriptor
@@ -187,6 +189,17 @@ class CapaDescriptor(CapaFields, RawDescriptor):
         registered_tags = responsetypes.registry.registered_tags()
         return set([node.tag for node in tree.iter() if node.tag in registered_tags])
 
+    @lazy
+    def definition_max_score(self):
+        """
+        The problem's maximum score, read from its XML without instantiating it for a
+        student, or None if it can't be (see `capa.capa_problem.get_max_score_from_xml`).
+        """
+        try:
+            return get_max_score_from_xml(self.data)
+        except (etree.XMLSyntaxError, ValueError):
+            return None
+
     def index_dictionary(self):
         """
         Return dictionary prepared with module content and type for indexing.
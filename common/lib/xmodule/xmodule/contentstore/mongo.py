@@ -1,3 +1,4 @@
+import hashlib
 import pymongo
 import gridfs
 from gridfs.errors import NoFile
@@ -12,9 +13,15 @@ from fs.osfs import OSFS
 import os
 import json
 from bson.son import SON
+from collections import defaultdict
 from opaque_keys.edx.keys import AssetKey
 from xmodule.modulestore.django import ASSET_IGNORE_REGEX
 
+# The bulk reads get the chunks of at most this many files, or this many bytes
+# (unless a single file is bigger), in each query.
+BULK_READ_MAX_FILES = 100
+BULK_READ_MAX_BYTES = 16 * 1024 * 1024
+
 
 class MongoContentStore(ContentStore):
 
@@ -46,6 +53,7 @@ class MongoContentStore(ContentStore):
         self.fs = gridfs.GridFS(_db, bucket)
 
         self.fs_files = _db[bucket + ".files"]  # the underlying collection GridFS uses
+        self.fs_chunks = _db[bucket + ".chunks"]
 
     def close_connections(self):
         """
@@ -76,12 +84,18 @@ class MongoContentStore(ContentStore):
                               import_path=content.import_path,
                               # getattr b/c caching may mean some pickled instances don't have attr
                               locked=getattr(content, 'locked', False)) as fp:
+            # compute the digest used to validate cached copies (e.g., as the ETag) once, here
+            digest = hashlib.sha1()
             if hasattr(content.data, '__iter__'):
                 for chunk in content.data:
                     fp.write(chunk)
+                    digest.update(chunk)
             else:
                 fp.write(content.data)
+                digest.update(content.data)
+            fp.content_digest = digest.hexdigest()
 
+        content.content_digest = digest.hexdigest()
         return content
 
     def delete(self, location_or_id):
@@ -106,7 +120,8 @@ class MongoContentStore(ContentStore):
                     location, fp.displayname, fp.content_type, fp, last_modified_at=fp.uploadDate,
                     thumbnail_location=thumbnail_location,
                     import_path=getattr(fp, 'import_path', None),
-                    length=fp.length, locked=getattr(fp, 'locked', False)
+                    length=fp.length, locked=getattr(fp, 'locked', False),
+                    content_digest=getattr(fp, 'content_digest', None) or fp.md5
                 )
             else:
                 with self.fs.get(content_id) as fp:
@@ -120,7 +135,8 @@ class MongoContentStore(ContentStore):
                         location, fp.displayname, fp.content_type, fp.read(), last_modified_at=fp.uploadDate,
                         thumbnail_location=thumbnail_location,
                         import_path=getattr(fp, 'import_path', None),
-                        length=fp.length, locked=getattr(fp, 'locked', False)
+                        length=fp.length, locked=getattr(fp, 'locked', False),
+                        content_digest=getattr(fp, 'content_digest', None) or fp.md5
                     )
         except NoFile:
             if throw_on_not_found:
@@ -128,9 +144,108 @@ class MongoContentStore(ContentStore):
             else:
                 return None
 
+    def find_many(self, locations):
+        """
+        Returns a dict of the content at each of the given locations, by location, reading
+        them in a few queries rather than a few per location. Missing locations are left out.
+        """
+        content_ids = []
+        locations_by_id = {}
+        for location in locations:
+            content_id, __ = self.asset_db_key(location)
+            content_ids.append(content_id)
+            locations_by_id[_hashable_id(content_id)] = location
+        if not content_ids:
+            return {}
+
+        fs_files = self.fs_files.find({'_id': {'$in': content_ids}})
+        return {
+            content.location: content
+            for content in (
+                self._make_content(locations_by_id[_hashable_id(fs_file['_id'])], fs_file, data)
+                for fs_file, data in self._with_data(fs_files)
+            )
+        }
+
+    def iter_content_for_course(self, course_key, get_thumbnails=False):
+        """
+        Returns an iterator over all the content of the course's assets (or thumbnails), which
+        reads them a batch at a time.
+        """
+        query = query_for_course(course_key, "asset" if not get_thumbnails else "thumbnail")
+        for fs_file, data in self._with_data(self.fs_files.find(query).batch_size(BULK_READ_MAX_FILES)):
+            yield self._make_content(_asset_key_for(course_key, fs_file), fs_file, data)
+
+    def _with_data(self, fs_files):
+        """
+        Yields each of the GridFS files (their documents in fs.files) with its data.
+
+        The chunks of a batch of files are read with one query.
+        """
+        batch = []
+        batch_bytes = 0
+        for fs_file in fs_files:
+            if batch and (len(batch) >= BULK_READ_MAX_FILES or batch_bytes + fs_file['length'] > BULK_READ_MAX_BYTES):
+                for item in self._read_batch(batch):
+                    yield item
+                batch = []
+                batch_bytes = 0
+            batch.append(fs_file)
+            batch_bytes += fs_file['length']
+        for item in self._read_batch(batch):
+            yield item
+
+    def _read_batch(self, fs_files):
+        """
+        Returns a list of each of the GridFS files with its data, reading all of their chunks in one query.
+        """
+        if not fs_files:
+            return []
+        chunks = defaultdict(list)
+        for chunk in self.fs_chunks.find(
+                # make_id_son b/c the _id fields of dicts read from mongo aren't in order
+                {'files_id': {'$in': [self.make_id_son(fs_file) for fs_file in fs_files]}},
+                sort=[('files_id', pymongo.ASCENDING), ('n', pymongo.ASCENDING)],
+        ):
+            chunks[_hashable_id(chunk['files_id'])].append(chunk['data'])
+
+        files_with_data = []
+        for fs_file in fs_files:
+            data = ''.join(chunks[_hashable_id(fs_file['_id'])])
+            if len(data) != fs_file['length']:
+                # The file changed since we read its document; read it again, by itself
+                fs_file = self.fs_files.find_one({'_id': fs_file['_id']})
+                if fs_file is None:
+                    continue
+                try:
+                    data = self.fs.get(fs_file['_id']).read()
+                except NoFile:
+                    continue
+            files_with_data.append((fs_file, data))
+        return files_with_data
+
+    def _make_content(self, location, fs_file, data):
+        """
+        Returns the StaticContent for the GridFS file (its document in fs.files) and data.
+        """
+        thumbnail_location = fs_file.get('thumbnail_location')
+        if thumbnail_location:
+            thumbnail_location = location.course_key.make_asset_key('thumbnail', thumbnail_location[4])
+        return StaticContent(
+            location, fs_file['displayname'], fs_file['contentType'], data, last_modified_at=fs_file['uploadDate'],
+            thumbnail_location=thumbnail_location,
+            import_path=fs_file.get('import_path'),
+            length=fs_file['length'], locked=fs_file.get('locked', False),
+            content_digest=fs_file.get('content_digest') or fs_file.get('md5')
+        )
+
     def export(self, location, output_directory):
-        content = self.find(location)
+        self._export_content(self.find(location), output_directory)
 
+    def _export_content(self, content, output_directory):
+        """
+        Writes the content to a file in the output_directory.
+        """
         if content.import_path is not None:
             output_directory = output_directory + '/' + os.path.dirname(content.import_path)
 
@@ -154,9 +269,9 @@ class MongoContentStore(ContentStore):
                 directory as the other policy files.
         """
         policy = {}
-        assets, __ = self.get_all_content_for_course(course_key)
-
-        for asset in assets:
+        query = query_for_course(course_key, "asset")
+        for fs_file, data in self._with_data(self.fs_files.find(query).batch_size(BULK_READ_MAX_FILES)):
+            asset_key = _asset_key_for(course_key, fs_file)
             # TODO: On 6/19/14, I had to put a try/except around this
             # to export a course. The course failed on JSON files in
             # the /static/ directory placed in it with an import.
@@ -165,10 +280,10 @@ class MongoContentStore(ContentStore):
             #
             # When debugging course exports, this might be a good place
             # to look. -- pmitros
-            self.export(asset['asset_key'], output_directory)
-            for attr, value in asset.iteritems():
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
-                    policy.setdefault(asset['asset_key'].name, {})[attr] = value
+            self._export_content(self._make_content(asset_key, fs_file, data), output_directory)
+            for attr, value in fs_file.iteritems():
+                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key', 'content_digest']:
+                    policy.setdefault(asset_key.name, {})[attr] = value
 
         with open(assets_policy_file, 'w') as f:
             json.dump(policy, f, sort_keys=True, indent=4)
@@ -235,14 +350,13 @@ class MongoContentStore(ContentStore):
         # We're constructing the asset key immediately after retrieval from the database so that
         # callers are insulated from knowing how our identifiers are stored.
         for asset in assets:
-            asset_id = asset.get('content_son', asset['_id'])
-            asset['asset_key'] = course_key.make_asset_key(asset_id['category'], asset_id['name'])
+            asset['asset_key'] = _asset_key_for(course_key, asset)
         return assets, count
 
     def set_attr(self, asset_key, attr, value=True):
         """
         Add/set the given attr on the asset at the given location. Does not allow overwriting gridFS built in
-        attrs such as _id, md5, uploadDate, length. Value can be any type which pymongo accepts.
+        attrs such as _id, md5, uploadDate, length, nor content_digest. Value can be any type which pymongo accepts.
 
         Returns nothing
 
@@ -275,7 +389,7 @@ class MongoContentStore(ContentStore):
         :param location:  a c4x asset location
         """
         for attr in attr_dict.iterkeys():
-            if attr in ['_id', 'md5', 'uploadDate', 'length']:
+            if attr in ['_id', 'md5', 'uploadDate', 'length', 'content_digest']:
                 raise AttributeError("{} is a protected attribute.".format(attr))
         asset_db_key, __ = self.asset_db_key(location)
         # catch upsert error and raise NotFoundError if asset doesn't exist
@@ -299,6 +413,55 @@ class MongoContentStore(ContentStore):
             raise NotFoundError(asset_db_key)
         return item
 
+    def get_attrs_many(self, locations):
+        """
+        Gets the attributes of each of the assets, like get_attrs, with one query.
+
+        Returns a dict of the attrs by location. Missing locations are left out.
+
+        :param locations: c4x asset locations
+        """
+        content_ids = []
+        locations_by_id = {}
+        for location in locations:
+            content_id, __ = self.asset_db_key(location)
+            content_ids.append(content_id)
+            locations_by_id[_hashable_id(content_id)] = location
+        if not content_ids:
+            return {}
+        return {
+            locations_by_id[_hashable_id(item['_id'])]: item
+            for item in self.fs_files.find({'_id': {'$in': content_ids}})
+        }
+
+    def set_attrs_many(self, attrs_by_location):
+        """
+        Like set_attrs, for several assets at once, with one bulk update.
+
+        Returns nothing.
+
+        Raises NotFoundError if any of the assets don't exist (the others are still updated)
+        Raises AttributeError if any of the attr dicts have any attrs which are one of the build in attrs.
+
+        :param attrs_by_location: a dict of attr dicts by c4x asset location
+        """
+        for attr_dict in attrs_by_location.itervalues():
+            for attr in attr_dict.iterkeys():
+                if attr in ['_id', 'md5', 'uploadDate', 'length', 'content_digest']:
+                    raise AttributeError("{} is a protected attribute.".format(attr))
+        if not attrs_by_location:
+            return
+
+        bulk = self.fs_files.initialize_unordered_bulk_op()
+        for location, attr_dict in attrs_by_location.iteritems():
+            asset_db_key, __ = self.asset_db_key(location)
+            bulk.find({'_id': asset_db_key}).update({"$set": attr_dict})
+        result = bulk.execute()
+        if result['nMatched'] < len(attrs_by_location):
+            raise NotFoundError(
+                "{} of {} assets".format(len(attrs_by_location) - result['nMatched'], len(attrs_by_location))
+            )
+
     def copy_all_course_assets(self, source_course_key, dest_course_key):
         """
         See :meth:`.ContentStore.copy_all_course_assets`
@@ -306,11 +469,12 @@ class MongoContentStore(ContentStore):
         This implementation fairly expensively copies all of the data
         """
         source_query = query_for_course(source_course_key)
-        # it'd be great to figure out how to do all of this on the db server and not pull the bits over
-        for asset in self.fs_files.find(source_query):
+        # it'd be great to figure out how to do all of this on the db server and not pull the bits over,
+        # but at least the bits are pulled over a batch of assets at a time
+        source_assets = self.fs_files.find(source_query).batch_size(BULK_READ_MAX_FILES)
+        for asset, data in self._with_data(source_assets):
             asset_key = self.make_id_son(asset)
             # don't convert from string until fs access
-            source_content = self.fs.get(asset_key)
             if isinstance(asset_key, basestring):
                 asset_key = AssetKey.from_string(asset_key)
                 __, asset_key = self.asset_db_key(asset_key)
@@ -327,7 +491,7 @@ class MongoContentStore(ContentStore):
                 )
 
             self.fs.put(
-                source_content.read(),
+                data,
                 _id=asset_id, filename=asset['filename'], content_type=asset['contentType'],
                 displayname=asset['displayname'], content_son=asset_key,
                 # thumbnail is not technically correct but will be functionally correct as the code
@@ -335,7 +499,8 @@ class MongoContentStore(ContentStore):
                 thumbnail_location=asset['thumbnail_location'],
                 import_path=asset['import_path'],
                 # getattr b/c caching may mean some pickled instances don't have attr
-                locked=asset.get('locked', False)
+                locked=asset.get('locked', False),
+                content_digest=asset.get('content_digest') or hashlib.sha1(data).hexdigest()
             )
 
     def delete_all_course_assets(self, course_key):
@@ -439,3 +604,21 @@ def query_for_course(course_key, category=None):
     else:
         dbkey['{}.run'.format(prefix)] = course_key.run
     return dbkey
+
+
+def _hashable_id(file_id):
+    """
+    Returns the _id of a GridFS file in a form that can be used as a dict key (a SON isn't hashable,
+    and the fields of an _id read from mongo aren't in order).
+    """
+    if isinstance(file_id, dict):
+        return tuple(sorted(file_id.items()))
+    return file_id
+
+
+def _asset_key_for(course_key, fs_file):
+    """
+    Returns the asset key of the GridFS file (its document in fs.files) in the course.
+    """
+    asset_id = fs_file.get('content_son', fs_file['_id'])
+    return course_key.make_asset_key(asset_id['category'], asset_id['name'])
@@ -0,0 +1,143 @@
+"""
+Functions of a course's metadata, shared by CourseDescriptor and the course
+summaries that stand in for it (see
+openedx.core.djangoapps.content.course_overviews), so that both work out
+dates and visibility the same way.
+
+These take field values rather than a course, and the translation and date
+formatting functions to use, so they can be used without a runtime.
+"""
+from datetime import datetime
+from math import exp
+
+import dateutil.parser
+from django.utils.timezone import UTC
+
+from .fields import Date
+
+DEFAULT_START_DATE = datetime(2030, 1, 1, tzinfo=UTC())
+
+
+def has_course_started(start):
+    """
+    Return whether a course starting at `start` has started.
+    """
+    return datetime.now(UTC()) > start
+
+
+def has_course_ended(end):
+    """
+    Return whether a course ending at `end` has ended.  A course without an
+    end date never ends.
+    """
+    return datetime.now(UTC()) > end if end is not None else False
+
+
+def course_start_date_is_default(start, advertised_start):
+    """
+    Return whether a course's start date hasn't been set: `start` is still the
+    default, and there's no `advertised_start`.
+    """
+    return advertised_start is None and start == DEFAULT_START_DATE
+
+
+def _add_timezone_string(date_time):
+    """
+    Add 'UTC' to the end of a start or end date and time text.
+    """
+    return date_time + u" UTC"
+
+
+def course_start_datetime_text(start, advertised_start, format_string, ugettext, strftime):
+    """
+    Return the text of a course's start date and time in UTC.  Prefers
+    `advertised_start`, then falls back to `start`.
+    """
+    def try_parse_iso_8601(text):
+        try:
+            result = Date().from_json(text)
+            if result is None:
+                result = text.title()
+            else:
+                result = strftime(result, format_string)
+                if format_string == "DATE_TIME":
+                    result = _add_timezone_string(result)
+        except ValueError:
+            result = text.title()
+
+        return result
+
+    if isinstance(advertised_start, basestring):
+        return try_parse_iso_8601(advertised_start)
+    elif course_start_date_is_default(start, advertised_start):
+        # Translators: TBD stands for 'To Be Determined' and is used when a course
+        # does not yet have an announced start date.
+        return ugettext('TBD')
+    else:
+        when = advertised_start or start
+
+        if format_string == "DATE_TIME":
+            return _add_timezone_string(strftime(when, format_string))
+
+        return strftime(when, format_string)
+
+
+def course_end_datetime_text(end, format_string, strftime):
+    """
+    Return the text of a course's end date, or date and time, or '' if it has
+    no end date.
+    """
+    if end is None:
+        return ''
+    else:
+        date_time = strftime(end, format_string)
+        return date_time if format_string == "SHORT_DATE" else _add_timezone_string(date_time)
+
+
+def may_certify_for_course(certificates_display_behavior, certificates_show_before_end, has_ended):
+    """
+    Return whether it's acceptable to show a student a certificate download
+    link for a course.
+    """
+    show_early = (
+        certificates_display_behavior in ('early_with_info', 'early_no_info') or
+        certificates_show_before_end
+    )
+    return show_early or has_ended
+
+
+def sorting_dates(start, advertised_start, announcement):
+    """
+    Return the announcement date, the start date and now, the dates used to
+    work out whether a course is new and its sorting score.
+    """
+    try:
+        start = dateutil.parser.parse(advertised_start)
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=UTC())
+    except (ValueError, AttributeError):
+        pass
+
+    now = datetime.now(UTC())
+
+    return announcement, start, now
+
+
+def sorting_score(start, advertised_start, announcement):
+    """
+    Return a number to sort courses by how "new" they are, based on their
+    announcement and (advertised) start dates.  The lower the number the
+    "newer" the course.
+    """
+    # Make courses that have an announcement date shave a lower
+    # score than courses than don't, older courses should have a
+    # higher score.
+    announcement, start, now = sorting_dates(start, advertised_start, announcement)
+    scale = 300.0  # about a year
+    if announcement:
+        days = (now - announcement).days
+        score = -exp(-days / scale)
+    else:
+        days = (now - start).days
+        score = exp(days / scale)
+    return score
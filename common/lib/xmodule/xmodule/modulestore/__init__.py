@@ -1345,6 +1345,17 @@ class ModuleStoreWriteBase(ModuleStoreReadBase, ModuleStoreWrite):
             else:
                 signal_handler.send("course_published", course_key=course_key)
 
+    def _emit_course_deleted_signal(self, course_key):
+        """
+        Fire the course_deleted signal for course_key.
+
+        Unlike publishing, deleting a course isn't held back until the end of a
+        bulk operation: the course is gone either way.
+        """
+        signal_handler = getattr(self, 'signal_handler', None)
+        if signal_handler:
+            signal_handler.send("course_deleted", course_key=course_key)
+
     def _flag_library_updated_event(self, library_key):
         """
         Wrapper around calls to fire the library_updated signal
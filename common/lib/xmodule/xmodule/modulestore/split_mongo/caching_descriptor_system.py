@@ -87,6 +87,16 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                 parent_map[child] = block_key
         return parent_map
 
+    @lazy
+    def _inherited_settings(self):
+        """
+        The precomputed inherited settings for each block in the structure, or None
+        if each block should find them by walking up the tree.
+        """
+        if InheritanceMixin not in self.modulestore.xblock_mixins:
+            return None
+        return self.modulestore.get_inherited_settings(self.course_entry.course_key, self.course_entry.structure)
+
     @contract(usage_key="BlockUsageLocator | BlockKey", course_entry_override="CourseEnvelope | None")
     def _load_item(self, usage_key, course_entry_override=None, **kwargs):
         """
@@ -214,7 +224,14 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
             field_decorator=kwargs.get('field_decorator')
         )
 
-        if InheritanceMixin in self.modulestore.xblock_mixins:
+        inherited_settings = None
+        if self._inherited_settings is not None:
+            inherited_settings = self._inherited_settings.get(block_key)
+
+        if inherited_settings is not None:
+            kvs.inherited_settings = inherited_settings
+            field_data = KvsFieldData(kvs)
+        elif InheritanceMixin in self.modulestore.xblock_mixins:
             field_data = inheriting_field_data(kvs)
         else:
             field_data = KvsFieldData(kvs)
@@ -1,11 +1,16 @@
 """
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
+import cPickle as pickle
 import datetime
+import hashlib
 import math
 import pymongo
 import pytz
 import re
+import threading
+import zlib
+from collections import OrderedDict
 from contextlib import contextmanager
 from time import time
 
@@ -13,15 +18,28 @@ from time import time
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 from contracts import check, new_contract
+from django.core.cache import get_cache, InvalidCacheBackendError
 from mongodb_proxy import autoretry_read, MongoProxy
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
+from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.modulestore.split_mongo import BlockKey
 import dogstats_wrapper as dog_stats_api
 
 
 new_contract('BlockData', BlockData)
 
+# Inherited settings are cached under a prefix naming the inheritable fields, so that
+# adding or removing an inheritable field doesn't leave stale entries in the shared cache.
+INHERITED_SETTINGS_KEY_PREFIX = u'inherited_settings.{}.'.format(
+    hashlib.sha1(' '.join(sorted(InheritanceMixin.fields.keys()))).hexdigest()[:12]
+)
+
+
+# How long (in seconds) structures are kept in the shared cache: 30 days, the longest
+# relative timeout memcached accepts.
+SHARED_STRUCTURE_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
 
 def round_power_2(value):
     """
@@ -203,16 +221,174 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class StructureLRUCache(object):
+    """
+    A thread-safe, in-process LRU cache of serialized course structures, bounded
+    by the total number of bytes it holds rather than by the number of entries.
+    """
+    def __init__(self, max_bytes):
+        """
+        Arguments:
+            max_bytes (int): The total size of the cached values, above which the
+                least recently used entries are evicted. 0 disables the cache.
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the value cached for ``key`` (marking it as most recently used),
+        or None if it isn't cached.
+        """
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._entries[key] = value
+            return value
+
+    def set(self, key, value):
+        """
+        Cache ``value`` under ``key``, evicting least recently used entries until
+        the cache fits in ``max_bytes``. Values larger than the whole cache are not stored.
+        """
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous)
+
+            self._entries[key] = value
+            self.total_bytes += len(value)
+
+            while self.total_bytes > self.max_bytes:
+                __, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+
+class CourseStructureCache(object):
+    """
+    Caches course structures (as returned by :func:`structure_from_mongo`), or data
+    computed from them, by structure id.
+
+    Structures are immutable once written, so they never need to be invalidated. They are
+    pickled and compressed, then stored in two tiers: a size-bounded LRU shared by every thread
+    in this process, and the 'course_structure_cache' django cache, which is shared across
+    processes. Either tier is skipped if it isn't configured.
+    """
+    def __init__(self, local_cache=None, key_prefix=None):
+        """
+        Arguments:
+            local_cache (:class:`StructureLRUCache`): The in-process cache tier, if any.
+            key_prefix (unicode): Prepended to the keys in both tiers, so that data derived
+                from structures can be cached alongside them under the same structure ids.
+        """
+        self.local_cache = local_cache
+        self.key_prefix = key_prefix
+        try:
+            self.shared_cache = get_cache('course_structure_cache')
+        # Django raises ImportError (rather than InvalidCacheBackendError) if settings
+        # haven't been configured at all, as happens when the modulestore is used outside of django.
+        except (InvalidCacheBackendError, ImportError):
+            self.shared_cache = None
+
+    def _local_key(self, key):
+        """
+        Return the key to use for ``key`` in the in-process tier.
+        """
+        if self.key_prefix is None:
+            return key
+        return self.key_prefix + unicode(key)
+
+    def _shared_key(self, key):
+        """
+        Return the key to use for ``key`` in the django cache tier.
+        """
+        return (self.key_prefix or u'') + unicode(key)
+
+    def get(self, key, course_context=None):
+        """
+        Return the structure cached for ``key``, or None if it is in neither tier.
+        """
+        with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
+            compressed_pickled_data = None
+            if self.local_cache is not None:
+                compressed_pickled_data = self.local_cache.get(self._local_key(key))
+                source = 'local'
+
+            if compressed_pickled_data is None and self.shared_cache is not None:
+                compressed_pickled_data = self.shared_cache.get(self._shared_key(key))
+                source = 'shared'
+                if compressed_pickled_data is not None and self.local_cache is not None:
+                    self.local_cache.set(self._local_key(key), compressed_pickled_data)
+
+            if compressed_pickled_data is None:
+                tagger.tag(from_cache='miss')
+                return None
+
+            tagger.tag(from_cache=source)
+            tagger.measure('compressed_size', len(compressed_pickled_data))
+            if self.local_cache is not None:
+                tagger.measure('local_cache_bytes', self.local_cache.total_bytes)
+
+            pickled_data = zlib.decompress(compressed_pickled_data)
+            tagger.measure('uncompressed_size', len(pickled_data))
+
+            return pickle.loads(pickled_data)
+
+    def set(self, key, structure, course_context=None):
+        """
+        Pickle and compress ``structure`` and write it to every configured tier.
+        """
+        if self.local_cache is None and self.shared_cache is None:
+            return
+
+        with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
+            pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
+            tagger.measure('uncompressed_size', len(pickled_data))
+
+            # 1 = fastest compression level, at the cost of slightly larger results
+            compressed_pickled_data = zlib.compress(pickled_data, 1)
+            tagger.measure('compressed_size', len(compressed_pickled_data))
+
+            if self.local_cache is not None:
+                self.local_cache.set(self._local_key(key), compressed_pickled_data)
+                tagger.measure('local_cache_bytes', self.local_cache.total_bytes)
+
+            if self.shared_cache is not None:
+                # Structures are immutable, so they are kept for as long as the cache allows.
+                # (Passing None would mean the cache's default timeout.)
+                self.shared_cache.set(self._shared_key(key), compressed_pickled_data, SHARED_STRUCTURE_CACHE_TIMEOUT)
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache_max_bytes=0, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        Arguments:
+            structure_cache_max_bytes (int): The size of the in-process cache of (compressed)
+                course structures. 0 disables the in-process tier.
         """
         if kwargs.get('replicaSet') is None:
             kwargs.pop('replicaSet', None)
@@ -245,6 +421,12 @@ class MongoConnection(object):
         self.structures.write_concern = {'w': 1}
         self.definitions.write_concern = {'w': 1}
 
+        local_structure_cache = StructureLRUCache(structure_cache_max_bytes) if structure_cache_max_bytes else None
+        self.structure_cache = CourseStructureCache(local_structure_cache)
+        self.inherited_settings_cache = CourseStructureCache(
+            local_structure_cache, key_prefix=INHERITED_SETTINGS_KEY_PREFIX
+        )
+
     def heartbeat(self):
         """
         Check that the db is reachable.
@@ -259,12 +441,30 @@ class MongoConnection(object):
         Get the structure from the persistence mechanism whose id is the given key
         """
         with TIMER.timer("get_structure", course_context) as tagger_get_structure:
-            with TIMER.timer("get_structure.find_one", course_context) as tagger_find_one:
-                doc = self.structures.find_one({'_id': key})
-                tagger_find_one.measure("blocks", len(doc['blocks']))
-            tagger_get_structure.measure("blocks", len(doc['blocks']))
+            structure = self.structure_cache.get(key, course_context)
+            tagger_get_structure.tag(from_cache=str(structure is not None).lower())
+
+            if structure is None:
+                with TIMER.timer("get_structure.find_one", course_context) as tagger_find_one:
+                    doc = self.structures.find_one({'_id': key})
+                    tagger_find_one.measure("blocks", len(doc['blocks']))
+                structure = structure_from_mongo(doc, course_context)
+                self.structure_cache.set(key, structure, course_context)
+
+            tagger_get_structure.measure("blocks", len(structure['blocks']))
+            return structure
+
+    def get_inherited_settings(self, key, course_context=None):
+        """
+        Return the inherited settings cached for the structure whose id is the given key, or None.
+        """
+        return self.inherited_settings_cache.get(key, course_context)
 
-            return structure_from_mongo(doc, course_context)
+    def set_inherited_settings(self, key, inherited_settings, course_context=None):
+        """
+        Cache the inherited settings computed for the structure whose id is the given key.
+        """
+        self.inherited_settings_cache.set(key, inherited_settings, course_context)
 
     @autoretry_read()
     def find_structures_by_id(self, ids, course_context=None):
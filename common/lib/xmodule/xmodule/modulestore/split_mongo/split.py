@@ -57,6 +57,7 @@ import copy
 import datetime
 import hashlib
 import logging
+import threading
 from contracts import contract, new_contract
 from importlib import import_module
 from mongodb_proxy import autoretry_read
@@ -82,7 +83,7 @@ from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.error_module import ErrorDescriptor
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from types import NoneType
 from xmodule.assetstore import AssetMetadata
 
@@ -172,6 +173,86 @@ class SplitBulkWriteRecord(BulkOpsRecord):
         )
 
 
+class StructureIndex(object):
+    """
+    Secondary indexes over the blocks of a course structure, so that lookups by
+    block type, by block id, and of a block's parents don't need to scan every block.
+
+    The index only records BlockKeys; callers look the BlockData up in the structure.
+    """
+    def __init__(self, structure):
+        self.by_type = defaultdict(list)
+        self.by_id = defaultdict(list)
+        self.parents = defaultdict(list)
+        for block_key, block_data in structure['blocks'].iteritems():
+            self.by_type[block_key.type].append(block_key)
+            self.by_id[block_key.id].append(block_key)
+            for child in block_data.fields.get('children', []):
+                self.parents[child].append(block_key)
+
+    def blocks_of_type(self, block_type):
+        """
+        Return the keys of the blocks whose type is ``block_type``.
+        """
+        return self.by_type.get(block_type, [])
+
+    def blocks_with_id(self, block_id):
+        """
+        Return the keys of the blocks whose block id is ``block_id``.
+        """
+        return self.by_id.get(block_id, [])
+
+    def parents_of(self, block_key):
+        """
+        Return (a new list of) the keys of the blocks which have ``block_key`` as a child.
+        """
+        return list(self.parents.get(block_key, []))
+
+
+def compute_inherited_settings(structure):
+    """
+    Return a dict mapping the key of every block in ``structure`` to a dict of the inheritable
+    settings (in their json form) which that block inherits from its nearest ancestors.
+
+    Each block's parent is found the same way as :class:`CachingDescriptorSystem` finds it, so the
+    result matches what walking up the tree from each block would find.
+    """
+    blocks = structure['blocks']
+    parent_map = {}
+    for block_key, block_data in blocks.iteritems():
+        for child in block_data.fields.get('children', []):
+            parent_map[BlockKey(*child)] = block_key
+
+    inheritable_fields = inheritance.InheritanceMixin.fields.keys()
+
+    def passed_to_children(block_key):
+        """
+        Return the settings which the block ``block_key`` passes down to its children.
+        """
+        settings = inherited_settings[block_key].copy()
+        block_fields = blocks[block_key].fields
+        for field_name in inheritable_fields:
+            if field_name in block_fields:
+                settings[field_name] = block_fields[field_name]
+        return settings
+
+    inherited_settings = {}
+    for block_key in blocks:
+        # Find the nearest ancestor whose settings are already known, then work back down
+        lineage = []
+        ancestor = block_key
+        while ancestor is not None and ancestor not in inherited_settings and ancestor not in lineage:
+            lineage.append(ancestor)
+            ancestor = parent_map.get(ancestor)
+
+        settings = passed_to_children(ancestor) if ancestor in inherited_settings else {}
+        for lineage_key in reversed(lineage):
+            inherited_settings[lineage_key] = settings
+            settings = passed_to_children(lineage_key)
+
+    return inherited_settings
+
+
 class SplitBulkWriteMixin(BulkOperationsMixin):
     """
     This implements the :meth:`bulk_operations` modulestore semantics for the :class:`SplitMongoModuleStore`.
@@ -638,18 +719,22 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
     # version) but those functions will have an optional arg for setting these.
     SEARCH_TARGET_DICT = ['wiki_slug']
 
+    # The number of StructureIndexes to keep in memory
+    STRUCTURE_INDEX_CACHE_SIZE = 100
+
     def __init__(self, contentstore, doc_store_config, fs_root, render_template,
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None, structure_cache_max_bytes=0, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param structure_cache_max_bytes: the size of the process-wide cache of course structures (0 disables it).
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        self.db_connection = MongoConnection(structure_cache_max_bytes=structure_cache_max_bytes, **doc_store_config)
         self.db = self.db_connection.database
 
         if default_class is not None:
@@ -673,6 +758,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         self.signal_handler = signal_handler
 
+        self._structure_indexes = OrderedDict()
+        self._structure_indexes_lock = threading.Lock()
+
     def close_connections(self):
         """
         Closes any open connections to the underlying databases
@@ -797,6 +885,53 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         else:
             self.request_cache.data['course_cache'] = {}
 
+    def _get_structure_index(self, course_key, structure):
+        """
+        Return the :class:`StructureIndex` for structure, building it on first use.
+
+        Persisted structures are immutable, so their indexes are kept (in a process-wide LRU keyed
+        by structure id) and shared across requests. A structure which is still being
+        edited in an active bulk operation is reindexed on every call.
+        """
+        structure_id = structure['_id']
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if bulk_write_record.active and structure_id not in bulk_write_record.structures_in_db:
+            return StructureIndex(structure)
+
+        with self._structure_indexes_lock:
+            index = self._structure_indexes.pop(structure_id, None)
+            if index is not None:
+                self._structure_indexes[structure_id] = index
+                return index
+
+        index = StructureIndex(structure)
+        with self._structure_indexes_lock:
+            self._structure_indexes[structure_id] = index
+            while len(self._structure_indexes) > self.STRUCTURE_INDEX_CACHE_SIZE:
+                self._structure_indexes.popitem(last=False)
+        return index
+
+    def get_inherited_settings(self, course_key, structure):
+        """
+        Return the inherited settings of the blocks in ``structure`` (see :func:`compute_inherited_settings`),
+        or None if they shouldn't be precomputed.
+
+        Persisted structures are immutable, so their inherited settings are cached by structure id in the
+        same tiers as the structures themselves, and only computed once across all processes. Structures
+        which are still being edited in an active bulk operation return None, so that their blocks walk
+        up the tree as it currently stands in memory.
+        """
+        structure_id = structure['_id']
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if bulk_write_record.active and structure_id not in bulk_write_record.structures_in_db:
+            return None
+
+        inherited_settings = self.db_connection.get_inherited_settings(structure_id, course_key)
+        if inherited_settings is None:
+            inherited_settings = compute_inherited_settings(structure)
+            self.db_connection.set_inherited_settings(structure_id, inherited_settings, course_key)
+        return inherited_settings
+
     def _lookup_course(self, course_key, head_validation=True):
         """
         Decode the locator into the right series of db access. Does not
@@ -1094,12 +1229,14 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         if settings is None:
             settings = {}
+        blocks = course.structure['blocks']
+        index = self._get_structure_index(course_locator, course.structure)
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
             block_ids = []
-            for block_id, block in course.structure['blocks'].iteritems():
-                if block_name == block_id.id and _block_matches_all(block):
+            for block_id in index.blocks_with_id(block_name):
+                if _block_matches_all(blocks[block_id]):
                     block_ids.append(block_id)
 
             return self._load_items(course, block_ids, **kwargs)
@@ -1110,8 +1247,28 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # don't expect caller to know that children are in fields
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
+
+        # use the indexes to narrow the candidates when the criteria are exact values;
+        # _block_matches_all still applies every criterion to each candidate.
+        block_type = qualifiers.get('block_type')
+        child = settings.get('children')
+        if isinstance(block_type, basestring):
+            candidates = index.blocks_of_type(block_type)
+        elif isinstance(block_type, dict) and block_type.keys() == ['$in'] and all(
+                isinstance(value, basestring) for value in block_type['$in']
+        ):
+            candidates = [
+                block_id
+                for value in set(block_type['$in'])
+                for block_id in index.blocks_of_type(value)
+            ]
+        elif isinstance(child, BlockKey):
+            candidates = index.parents_of(child)
+        else:
+            candidates = blocks.iterkeys()
+
+        for block_id in candidates:
+            if _block_matches_all(blocks[block_id]):
                 items.append(block_id)
 
         if len(items) > 0:
@@ -1132,7 +1289,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        index = self._get_structure_index(locator.course_key, course.structure)
+        parent_ids = index.parents_of(BlockKey.from_usage_key(locator))
         if len(parent_ids) == 0:
             return None
         # find alphabetically least
@@ -2430,6 +2588,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # this is the only real delete in the system. should it do something else?
         log.info(u"deleting course from split-mongo: %s", course_key)
         self.delete_course_index(course_key)
+        self._emit_course_deleted_signal(course_key)
 
         # We do NOT call the super class here since we need to keep the assets
         # in case the course is later restored.
@@ -117,13 +117,16 @@ class SplitMongoKVS(InheritanceKeyValueStore):
 
     def default(self, key):
         """
-        Check to see if the default should be from the template's defaults (if any)
-        rather than the global default or inheritance.
+        Check to see if the default should be inherited, or be from the template's defaults (if any)
+        rather than the global default.
         """
+        # Precomputed inherited settings take precedence, just as values found by walking up the tree do
+        if key.field_name in self.inherited_settings:
+            return self.inherited_settings[key.field_name]
         if self._defaults and key.field_name in self._defaults:
             return self._defaults[key.field_name]
-        # If not, try inheriting from a parent, then use the XBlock type's normal default value:
-        return super(SplitMongoKVS, self).default(key)
+        # If not, use the XBlock type's normal default value:
+        raise KeyError(key.field_name)
 
     def _load_definition(self):
         """
@@ -1,6 +1,7 @@
 """
  Test contentstore.mongo functionality
 """
+import hashlib
 import logging
 from uuid import uuid4
 import unittest
@@ -16,6 +17,7 @@ from xmodule.contentstore.mongo import MongoContentStore
 from xmodule.contentstore.content import StaticContent
 from xmodule.exceptions import NotFoundError
 import ddt
+from mock import patch
 from __builtin__ import delattr
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 
@@ -124,6 +126,19 @@ class TestContentstore(unittest.TestCase):
             "Found unknown asset {}".format(unknown_asset)
         )
 
+    @ddt.data(True, False)
+    def test_content_digest(self, deprecated):
+        """
+        Test that the digest of the content is computed when it's saved
+        """
+        self.set_up_assets(deprecated)
+        asset_key = self.course1_key.make_asset_key('asset', self.course1_files[0])
+        content = self.contentstore.find(asset_key)
+        self.assertEqual(content.content_digest, hashlib.sha1(content.data).hexdigest())
+        self.assertEqual(self.contentstore.find(asset_key, as_stream=True).content_digest, content.content_digest)
+        with self.assertRaises(AttributeError):
+            self.contentstore.set_attr(asset_key, 'content_digest', 'changed')
+
     @ddt.data(True, False)
     def test_export_for_course(self, deprecated):
         """
@@ -178,6 +193,61 @@ class TestContentstore(unittest.TestCase):
             self.contentstore.set_attr(asset_key, 'locked', not prelocked)
             self.assertEqual(self.contentstore.get_attr(asset_key, 'locked', False), not prelocked)
 
+    @ddt.data(True, False)
+    def test_attrs_many(self, deprecated):
+        """
+        Test setting and getting the attrs of many assets at once
+        """
+        self.set_up_assets(deprecated)
+        asset_keys = [self.course1_key.make_asset_key('asset', filename) for filename in self.course1_files]
+        unknown_asset = self.course1_key.make_asset_key('asset', 'no_such_file.gif')
+
+        attrs = self.contentstore.get_attrs_many(asset_keys + [unknown_asset])
+        self.assertItemsEqual(attrs.keys(), asset_keys)
+        for asset_key in asset_keys:
+            self.assertEqual(attrs[asset_key], self.contentstore.get_attrs(asset_key))
+
+        self.contentstore.set_attrs_many({asset_key: {'locked': True, 'extra': 1} for asset_key in asset_keys})
+        for asset_key in asset_keys:
+            self.assertTrue(self.contentstore.get_attr(asset_key, 'locked'))
+            self.assertEqual(self.contentstore.get_attr(asset_key, 'extra'), 1)
+
+        with self.assertRaises(NotFoundError):
+            self.contentstore.set_attrs_many({asset_keys[0]: {'extra': 2}, unknown_asset: {'extra': 2}})
+        self.assertEqual(self.contentstore.get_attr(asset_keys[0], 'extra'), 2)
+        with self.assertRaises(AttributeError):
+            self.contentstore.set_attrs_many({asset_keys[0]: {'md5': 'changed'}})
+
+    @ddt.data(True, False)
+    def test_find_many(self, deprecated):
+        """
+        Test finding many assets at once
+        """
+        self.set_up_assets(deprecated)
+        asset_keys = [self.course1_key.make_asset_key('asset', filename) for filename in self.course1_files]
+        unknown_asset = self.course1_key.make_asset_key('asset', 'no_such_file.gif')
+
+        found = self.contentstore.find_many(asset_keys + [unknown_asset])
+        self.assertItemsEqual(found.keys(), asset_keys)
+        for asset_key in asset_keys:
+            content = self.contentstore.find(asset_key)
+            for propname in ['name', 'content_type', 'data', 'length', 'locked', 'content_digest']:
+                self.assertEqual(getattr(found[asset_key], propname), getattr(content, propname))
+
+        self.assertEqual(self.contentstore.find_many([]), {})
+
+    @ddt.data(True, False)
+    def test_iter_content_for_course(self, deprecated):
+        """
+        Test reading all of a course's assets in batches
+        """
+        self.set_up_assets(deprecated)
+        with patch('xmodule.contentstore.mongo.BULK_READ_MAX_FILES', 2):
+            contents = list(self.contentstore.iter_content_for_course(self.course1_key))
+        self.assertItemsEqual([content.location.name for content in contents], self.course1_files)
+        for content in contents:
+            self.assertEqual(content.data, self.contentstore.find(content.location).data)
+
     @ddt.data(True, False)
     def test_copy_assets(self, deprecated):
         """
@@ -191,7 +261,7 @@ class TestContentstore(unittest.TestCase):
             dest_key = dest_course.make_asset_key('asset', filename)
             source = self.contentstore.find(asset_key)
             copied = self.contentstore.find(dest_key)
-            for propname in ['name', 'content_type', 'length', 'locked']:
+            for propname in ['name', 'content_type', 'length', 'locked', 'content_digest']:
                 self.assertEqual(getattr(source, propname), getattr(copied, propname))
 
         __, count = self.contentstore.get_all_content_for_course(dest_course)
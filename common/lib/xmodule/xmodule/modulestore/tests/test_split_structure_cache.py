@@ -0,0 +1,214 @@
+"""
+Tests of the course structure caches and indexes used by the split modulestore.
+"""
+import unittest
+
+from bson.objectid import ObjectId
+from mock import patch
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import CourseStructureCache, StructureLRUCache
+from xmodule.modulestore.split_mongo.split import StructureIndex, compute_inherited_settings
+
+
+class TestStructureLRUCache(unittest.TestCase):
+    """
+    Tests of the size-bounded in-process LRU.
+    """
+    def test_get_set(self):
+        cache = StructureLRUCache(100)
+        self.assertIsNone(cache.get('missing'))
+        cache.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertEqual(cache.total_bytes, len('value'))
+
+    def test_evicts_least_recently_used(self):
+        cache = StructureLRUCache(20)
+        cache.set('a', 'x' * 8)
+        cache.set('b', 'y' * 8)
+        # touch 'a' so that 'b' is the least recently used entry
+        cache.get('a')
+        cache.set('c', 'z' * 8)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'x' * 8)
+        self.assertEqual(cache.get('c'), 'z' * 8)
+        self.assertEqual(cache.total_bytes, 16)
+
+    def test_replace_updates_size(self):
+        cache = StructureLRUCache(20)
+        cache.set('a', 'x' * 8)
+        cache.set('a', 'x' * 4)
+        self.assertEqual(cache.total_bytes, 4)
+        self.assertEqual(len(cache), 1)
+
+    def test_oversized_value_not_stored(self):
+        cache = StructureLRUCache(4)
+        cache.set('a', 'x' * 8)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.total_bytes, 0)
+
+    def test_clear(self):
+        cache = StructureLRUCache(20)
+        cache.set('a', 'x' * 8)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.total_bytes, 0)
+
+
+class TestCourseStructureCache(unittest.TestCase):
+    """
+    Tests of the tiered course structure cache.
+    """
+    def setUp(self):
+        super(TestCourseStructureCache, self).setUp()
+        self.structure_id = ObjectId()
+        self.structure = {
+            '_id': self.structure_id,
+            'root': BlockKey('course', 'course'),
+            'blocks': {
+                BlockKey('course', 'course'): BlockData(block_type='course', fields={'children': []}),
+            },
+        }
+
+    def _no_shared_cache(self):
+        """
+        Return a patcher that makes the 'course_structure_cache' django cache unavailable.
+        """
+        return patch(
+            'xmodule.modulestore.split_mongo.mongo_connection.get_cache',
+            side_effect=ImportError,
+        )
+
+    def test_no_tiers(self):
+        with self._no_shared_cache():
+            cache = CourseStructureCache()
+        cache.set(self.structure_id, self.structure)
+        self.assertIsNone(cache.get(self.structure_id))
+
+    def test_local_tier_returns_copy(self):
+        with self._no_shared_cache():
+            cache = CourseStructureCache(StructureLRUCache(1024 * 1024))
+        cache.set(self.structure_id, self.structure)
+
+        cached = cache.get(self.structure_id)
+        self.assertEqual(cached['root'], self.structure['root'])
+        self.assertEqual(cached['blocks'].keys(), self.structure['blocks'].keys())
+        self.assertIsNot(cached, self.structure)
+
+        # Mutating a returned structure must not affect later reads
+        cached['blocks'].clear()
+        self.assertEqual(len(cache.get(self.structure_id)['blocks']), 1)
+
+    def test_shared_tier_fills_local_tier(self):
+        shared = {}
+
+        class FakeCache(object):
+            """ A dict-backed stand-in for a django cache. """
+            def get(self, key):
+                return shared.get(key)
+
+            def set(self, key, value, timeout):
+                shared[key] = value
+
+        with patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache', return_value=FakeCache()):
+            writer = CourseStructureCache()
+            reader = CourseStructureCache(StructureLRUCache(1024 * 1024))
+
+        writer.set(self.structure_id, self.structure)
+        self.assertIn(unicode(self.structure_id), shared)
+        self.assertIsNone(reader.local_cache.get(self.structure_id))
+
+        self.assertEqual(reader.get(self.structure_id)['root'], self.structure['root'])
+        self.assertIsNotNone(reader.local_cache.get(self.structure_id))
+
+    def test_key_prefix(self):
+        local_cache = StructureLRUCache(1024 * 1024)
+        with self._no_shared_cache():
+            structures = CourseStructureCache(local_cache)
+            derived = CourseStructureCache(local_cache, key_prefix=u'derived.')
+
+        structures.set(self.structure_id, self.structure)
+        derived.set(self.structure_id, {'derived': True})
+        self.assertEqual(structures.get(self.structure_id)['root'], self.structure['root'])
+        self.assertEqual(derived.get(self.structure_id), {'derived': True})
+        self.assertEqual(len(local_cache), 2)
+
+
+class TestStructureIndex(unittest.TestCase):
+    """
+    Tests of the secondary block indexes built over a structure.
+    """
+    def setUp(self):
+        super(TestStructureIndex, self).setUp()
+        self.course = BlockKey('course', 'course')
+        self.chapter = BlockKey('chapter', 'chapter')
+        self.problem = BlockKey('problem', 'shared')
+        self.html = BlockKey('html', 'shared')
+        self.index = StructureIndex({
+            '_id': ObjectId(),
+            'root': self.course,
+            'blocks': {
+                self.course: BlockData(block_type='course', fields={'children': [self.chapter]}),
+                self.chapter: BlockData(block_type='chapter', fields={'children': [self.problem, self.html]}),
+                self.problem: BlockData(block_type='problem', fields={}),
+                self.html: BlockData(block_type='html', fields={}),
+            },
+        })
+
+    def test_blocks_of_type(self):
+        self.assertEqual(self.index.blocks_of_type('problem'), [self.problem])
+        self.assertEqual(self.index.blocks_of_type('video'), [])
+
+    def test_blocks_with_id(self):
+        self.assertItemsEqual(self.index.blocks_with_id('shared'), [self.problem, self.html])
+        self.assertEqual(self.index.blocks_with_id('missing'), [])
+
+    def test_parents_of(self):
+        self.assertEqual(self.index.parents_of(self.problem), [self.chapter])
+        self.assertEqual(self.index.parents_of(self.course), [])
+
+        # callers may sort the result in place without corrupting the index
+        parents = self.index.parents_of(self.chapter)
+        parents.append(self.html)
+        self.assertEqual(self.index.parents_of(self.chapter), [self.course])
+
+
+class TestComputeInheritedSettings(unittest.TestCase):
+    """
+    Tests of precomputing the settings each block inherits from its ancestors.
+    """
+    def test_inherited_settings(self):
+        course = BlockKey('course', 'course')
+        chapter = BlockKey('chapter', 'chapter')
+        sequential = BlockKey('sequential', 'sequential')
+        problem = BlockKey('problem', 'problem')
+        orphan = BlockKey('problem', 'orphan')
+        inherited_settings = compute_inherited_settings({
+            '_id': ObjectId(),
+            'root': course,
+            'blocks': {
+                course: BlockData(
+                    block_type='course',
+                    fields={'children': [chapter], 'start': '2015-01-01T00:00:00Z', 'display_name': 'Course'},
+                ),
+                chapter: BlockData(
+                    block_type='chapter',
+                    fields={'children': [sequential], 'graded': True},
+                ),
+                sequential: BlockData(
+                    block_type='sequential',
+                    fields={'children': [problem], 'start': '2015-02-01T00:00:00Z'},
+                ),
+                problem: BlockData(block_type='problem', fields={'max_attempts': 3}),
+                orphan: BlockData(block_type='problem', fields={}),
+            },
+        })
+
+        self.assertEqual(inherited_settings[course], {})
+        self.assertEqual(inherited_settings[chapter], {'start': '2015-01-01T00:00:00Z'})
+        self.assertEqual(inherited_settings[sequential], {'start': '2015-01-01T00:00:00Z', 'graded': True})
+        # the nearest ancestor's value wins, and a block's own settings aren't inherited by it
+        self.assertEqual(inherited_settings[problem], {'start': '2015-02-01T00:00:00Z', 'graded': True})
+        self.assertEqual(inherited_settings[orphan], {})
@@ -5,6 +5,7 @@ from util.json_request import JsonResponse
 import json
 
 from courseware import models
+from courseware.aggregation import ColumnEncoder, group_maximums, group_sums
 from django.db.models import Count
 from django.utils.translation import ugettext as _
 
@@ -13,6 +14,7 @@ from xmodule.modulestore.inheritance import own_metadata
 from instructor_analytics.csvs import create_csv_response
 
 from opaque_keys.edx.locations import Location
+from util.query import use_read_replica_if_available
 
 # Used to limit the length of list displayed to the screen.
 MAX_SCREEN_LIST_LENGTH = 250
@@ -33,35 +35,36 @@ def get_problem_grade_distribution(course_id):
     """
 
     # Aggregate query on studentmodule table for grade data for all problems in course
-    db_query = models.StudentModule.objects.filter(
+    db_query = use_read_replica_if_available(models.StudentModule.objects).filter(
         course_id__exact=course_id,
         grade__isnull=False,
         module_type__exact="problem",
     ).values('module_state_key', 'grade', 'max_grade').annotate(count_grade=Count('grade'))
 
+    # Collect the rows into columns, and compute the maximum grade and the number of
+    # students of each problem in one batch
+    problems = ColumnEncoder()
+    max_grades = []
+    grade_counts = []
     prob_grade_distrib = {}
-    total_student_count = {}
-
-    # Loop through resultset building data for each problem
     for row in db_query:
         curr_problem = course_id.make_usage_key_from_deprecated_string(row['module_state_key'])
+        problems.append(curr_problem)
+        max_grades.append(row['max_grade'])
+        grade_counts.append(row['count_grade'])
 
         # Build set of grade distributions for each problem that has student responses
-        if curr_problem in prob_grade_distrib:
-            prob_grade_distrib[curr_problem]['grade_distrib'].append((row['grade'], row['count_grade']))
+        prob_grade_distrib.setdefault(curr_problem, {'grade_distrib': []})['grade_distrib'].append(
+            (row['grade'], row['count_grade'])
+        )
 
-            if (prob_grade_distrib[curr_problem]['max_grade'] != row['max_grade']) and \
-                    (prob_grade_distrib[curr_problem]['max_grade'] < row['max_grade']):
-                prob_grade_distrib[curr_problem]['max_grade'] = row['max_grade']
-
-        else:
-            prob_grade_distrib[curr_problem] = {
-                'max_grade': row['max_grade'],
-                'grade_distrib': [(row['grade'], row['count_grade'])]
-            }
+    for curr_problem, max_grade in group_maximums(problems, max_grades).iteritems():
+        prob_grade_distrib[curr_problem]['max_grade'] = max_grade
 
-        # Build set of total students attempting each problem
-        total_student_count[curr_problem] = total_student_count.get(curr_problem, 0) + row['count_grade']
+    # Build set of total students attempting each problem
+    total_student_count = {
+        curr_problem: int(count) for curr_problem, count in group_sums(problems, grade_counts).iteritems()
+    }
 
     return prob_grade_distrib, total_student_count
 
@@ -76,7 +79,7 @@ def get_sequential_open_distrib(course_id):
     """
 
     # Aggregate query on studentmodule table for "opening a subsection" data
-    db_query = models.StudentModule.objects.filter(
+    db_query = use_read_replica_if_available(models.StudentModule.objects).filter(
         course_id__exact=course_id,
         module_type__exact="sequential",
     ).values('module_state_key').annotate(count_sequential=Count('module_state_key'))
@@ -106,7 +109,7 @@ def get_problem_set_grade_distrib(course_id, problem_set):
     """
 
     # Aggregate query on studentmodule table for grade data for set of problems in course
-    db_query = models.StudentModule.objects.filter(
+    db_query = use_read_replica_if_available(models.StudentModule.objects).filter(
         course_id__exact=course_id,
         grade__isnull=False,
         module_type__exact="problem",
@@ -438,7 +441,7 @@ def get_students_opened_subsection(request, csv=False):
     csv = request.GET.get('csv')
 
     # Query for "opened a subsection" students
-    students = models.StudentModule.objects.select_related('student').filter(
+    students = use_read_replica_if_available(models.StudentModule.objects).select_related('student').filter(
         module_state_key__exact=module_state_key,
         module_type__exact='sequential',
     ).values('student__username', 'student__profile__name').order_by('student__profile__name')
@@ -490,7 +493,7 @@ def get_students_problem_grades(request, csv=False):
     csv = request.GET.get('csv')
 
     # Query for "problem grades" students
-    students = models.StudentModule.objects.select_related('student').filter(
+    students = use_read_replica_if_available(models.StudentModule.objects).select_related('student').filter(
         module_state_key=module_state_key,
         module_type__exact='problem',
         grade__isnull=False,
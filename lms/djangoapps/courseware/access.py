@@ -32,7 +32,9 @@ from xmodule.partitions.partitions import NoSuchUserPartitionError, NoSuchUserPa
 from xmodule.util.django import get_current_request_hostname
 
 from external_auth.models import ExternalAuthMap
-from courseware.masquerade import get_masquerade_role, is_masquerading_as_student
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from courseware.masquerade import get_course_masquerade, get_masquerade_role, is_masquerading_as_student
+from request_cache.middleware import RequestCache
 from student import auth
 from student.models import CourseEnrollmentAllowed
 from student.roles import (
@@ -93,7 +95,7 @@ def has_access(user, action, obj, course_key=None):
 
     # delegate the work to type-specific functions.
     # (start with more specific types, then get more general)
-    if isinstance(obj, CourseDescriptor):
+    if isinstance(obj, (CourseDescriptor, CourseOverview)):
         return _has_access_course_desc(user, action, obj)
 
     if isinstance(obj, ErrorDescriptor):
@@ -121,10 +123,131 @@ def has_access(user, action, obj, course_key=None):
                     .format(type(obj)))
 
 
+class BlockAccessChecker(object):
+    """
+    Checks a user's access to the blocks of one course, giving the same answers
+    as has_access, for when many blocks are checked at once.
+
+    What the checks need to know about the user, rather than the block, is
+    looked up once: their staff, instructor and beta tester roles, whether
+    they're masquerading, and the group they're in for each user partition.
+
+    Use get_block_access_checker() to get one rather than making one.
+    """
+    def __init__(self, user, course_key):
+        self.user = user if user else AnonymousUser()
+        self.course_key = course_key
+        self._course_access = {}
+        self._is_beta_tester = None
+        self._user_groups = {}
+        self._start_dates_disabled = (
+            settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(self.user, course_key)
+        )
+        self._in_preview_mode = in_preview_mode()
+
+    def _has_access_to_course(self, access_level):
+        """
+        Return whether the user has `access_level` (staff or instructor) access to the course.
+        """
+        if access_level not in self._course_access:
+            self._course_access[access_level] = _has_access_to_course(self.user, access_level, self.course_key)
+        return self._course_access[access_level]
+
+    def is_beta_tester(self):
+        """
+        Return whether the user is a beta tester of the course.
+        """
+        if self._is_beta_tester is None:
+            self._is_beta_tester = CourseBetaTesterRole(self.course_key).has_user(self.user)
+        return self._is_beta_tester
+
+    def _effective_start(self, block):
+        """
+        Return the start date of `block` for the user, which is earlier for beta testers.
+        """
+        if block.days_early_for_beta is None:
+            return block.start
+        if self.is_beta_tester():
+            return block.start - timedelta(block.days_early_for_beta)
+        return block.start
+
+    def _can_load(self, block):
+        """
+        Return whether the user can load `block`, as _has_access_descriptor does.
+        """
+        if block.visible_to_staff_only and not self._has_access_to_course('staff'):
+            return False
+
+        if not _has_group_access(block, self.user, self.course_key, user_groups=self._user_groups):
+            return self._has_access_to_course('staff')
+
+        if self._start_dates_disabled:
+            return True
+
+        if 'detached' not in block._class_tags and block.start is not None:  # pylint: disable=protected-access
+            if self._in_preview_mode or datetime.now(UTC()) > self._effective_start(block):
+                return True
+            return self._has_access_to_course('staff')
+
+        return True
+
+    def has_access(self, action, block):
+        """
+        Return whether the user has access to do `action` on `block`, a block
+        of the course: the same as has_access(user, action, block, course_key).
+        """
+        # Courses, error blocks, modules and keys have their own rules.
+        if not isinstance(block, XBlock) or isinstance(block, (CourseDescriptor, ErrorDescriptor, XModule)):
+            return has_access(self.user, action, block, self.course_key)
+
+        checkers = {
+            'load': lambda: self._can_load(block),
+            'staff': lambda: self._has_access_to_course('staff'),
+            'instructor': lambda: self._has_access_to_course('instructor'),
+        }
+        return _dispatch(checkers, action, self.user, block)
+
+
+def get_block_access_checker(user, course_key):
+    """
+    Return a BlockAccessChecker of `user`'s access to the blocks of the course
+    with `course_key`.
+
+    While a request is being served, the same one is returned for the rest of
+    the request, so that what it has looked up is only looked up once.
+    """
+    if RequestCache.get_current_request() is None:
+        return BlockAccessChecker(user, course_key)
+
+    masquerade = get_course_masquerade(user, course_key) if user else None
+    cache_key = (
+        'courseware.access.get_block_access_checker',
+        user.id if user else None,
+        course_key,
+        (masquerade.role, masquerade.user_partition_id, masquerade.group_id) if masquerade else None,
+    )
+    request_cache = RequestCache.get_request_cache().data
+    if cache_key not in request_cache:
+        request_cache[cache_key] = BlockAccessChecker(user, course_key)
+    return request_cache[cache_key]
+
+
+def filter_by_access(user, action, blocks, course_key):
+    """
+    Return the blocks of `blocks`, in the course with `course_key`, that `user`
+    has access to do `action` on.
+
+    Gives the same answers as calling has_access on each block, but looks up
+    what the checks need to know about the user only once.
+    """
+    checker = get_block_access_checker(user, course_key)
+    return [block for block in blocks if checker.has_access(action, block)]
+
+
 # ================ Implementation helpers ================================
 def _has_access_course_desc(user, action, course):
     """
-    Check if user has access to a course descriptor.
+    Check if user has access to a course descriptor, or the CourseOverview of one.
 
     Valid actions:
 
@@ -144,6 +267,8 @@ def _has_access_course_desc(user, action, course):
 
         NOTE: this is not checking whether user is actually enrolled in the course.
         """
+        if isinstance(course, CourseOverview):
+            return _can_load_course_overview(user, course)
         # delegate to generic descriptor check to check start dates
         return _has_access_descriptor(user, 'load', course, course.id)
 
@@ -297,6 +422,39 @@ def _has_access_course_desc(user, action, course):
     return _dispatch(checkers, action, user, course)
 
 
+def _can_load_course_overview(user, course_overview):
+    """
+    Can this user load the course of this CourseOverview?
+
+    The same check as _has_access_descriptor's 'load' makes on the course
+    itself, but for the overview, so that the course needn't be loaded.  A
+    course's own group access isn't checked: it can't be set in Studio.
+    """
+    course_key = course_overview.id
+    if course_overview.visible_to_staff_only and not _has_staff_access_to_descriptor(user, course_overview, course_key):
+        return False
+
+    # If start dates are off, can always load
+    if settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user, course_key):
+        debug("Allow: DISABLE_START_DATES")
+        return True
+
+    # Check start date
+    if course_overview.start is not None:
+        now = datetime.now(UTC())
+        effective_start = _adjust_start_date_for_beta_testers(user, course_overview, course_key=course_key)
+        if in_preview_mode() or now > effective_start:
+            # after start date, everyone can see it
+            debug("Allow: now > effective start date")
+            return True
+        # otherwise, need staff access
+        return _has_staff_access_to_descriptor(user, course_overview, course_key)
+
+    # No start date, so can always load.
+    debug("Allow: no start date")
+    return True
+
+
 def _has_access_error_desc(user, action, descriptor, course_key):
     """
     Only staff should see error descriptors.
@@ -317,10 +475,13 @@ def _has_access_error_desc(user, action, descriptor, course_key):
     return _dispatch(checkers, action, user, descriptor)
 
 
-def _has_group_access(descriptor, user, course_key):
+def _has_group_access(descriptor, user, course_key, user_groups=None):
     """
     This function returns a boolean indicating whether or not `user` has
     sufficient group memberships to "load" a block (the `descriptor`)
+
+    `user_groups` is an optional dict of the user's groups already looked up,
+    by partition id, to which the groups looked up here are added.
     """
     if len(descriptor.user_partitions) == len(get_split_user_partitions(descriptor.user_partitions)):
         # Short-circuit the process, since there are no defined user partitions that are not
@@ -365,13 +526,15 @@ def _has_group_access(descriptor, user, course_key):
         return False
 
     # look up the user's group for each partition
-    user_groups = {}
+    if user_groups is None:
+        user_groups = {}
     for partition, groups in partition_groups:
-        user_groups[partition.id] = partition.scheme.get_group_for_user(
-            course_key,
-            user,
-            partition,
-        )
+        if partition.id not in user_groups:
+            user_groups[partition.id] = partition.scheme.get_group_for_user(
+                course_key,
+                user,
+                partition,
+            )
 
     # finally: check that the user has a satisfactory group assignment
     # for each partition.
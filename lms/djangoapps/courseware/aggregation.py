@@ -0,0 +1,95 @@
+"""
+Columnar aggregation of values read from many StudentModule rows.
+
+Reports over a whole course read one or a few columns from every row, and then
+count or combine the values per problem. Rather than building nested dicts row
+by row, the values are encoded as integer codes in flat arrays while the rows are
+streamed, and the counts are computed in one batch with numpy.
+"""
+from array import array
+
+import numpy
+
+
+class ColumnEncoder(object):
+    """
+    Assigns consecutive integer codes to the distinct values of a column, and
+    collects the code of each value added.
+
+    `values[code]` is the value with that code.
+    """
+    def __init__(self):
+        self._codes_by_value = {}
+        self.values = []
+        self.codes = array('l')
+
+    def __len__(self):
+        return len(self.codes)
+
+    def append(self, value):
+        """
+        Add value to the column.
+        """
+        code = self._codes_by_value.get(value)
+        if code is None:
+            code = self._codes_by_value[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+
+def count_pairs(first, second):
+    """
+    Count the rows of two columns of the same length, each a :class:`ColumnEncoder`.
+
+    Returns: a list of (first_value, second_value, count) tuples, one for each
+        distinct pair of values, ordered by the codes of the values
+    """
+    if not len(first):
+        return []
+
+    first_codes = numpy.asarray(first.codes, dtype=numpy.int64)
+    second_codes = numpy.asarray(second.codes, dtype=numpy.int64)
+    base = len(second.values)
+    unique_pairs, inverse = numpy.unique(first_codes * base + second_codes, return_inverse=True)
+    counts = numpy.bincount(inverse)
+    return [
+        (first.values[first_code], second.values[second_code], int(count))
+        for first_code, second_code, count in zip(unique_pairs // base, unique_pairs % base, counts)
+    ]
+
+
+def group_sums(groups, weights):
+    """
+    Sum weights, a sequence of numbers the same length as groups (a
+    :class:`ColumnEncoder`), for each value of groups.
+
+    Returns: a dict mapping each value of groups to its sum
+    """
+    if not len(groups):
+        return {}
+
+    sums = numpy.bincount(numpy.asarray(groups.codes, dtype=numpy.int64), weights=numpy.asarray(weights, dtype=float))
+    return dict(zip(groups.values, sums.tolist()))
+
+
+def group_maximums(groups, values):
+    """
+    Return a dict mapping each value of groups (a :class:`ColumnEncoder`) to the
+    largest of its values, a sequence of numbers or None the same length as groups.
+
+    None values are ignored, and a group whose values are all None has the maximum None.
+    """
+    if not len(groups):
+        return {}
+
+    codes = numpy.asarray(groups.codes, dtype=numpy.int64)
+    # None becomes nan, which numpy.fmax ignores
+    values = numpy.array(values, dtype=float)
+    order = numpy.argsort(codes, kind='mergesort')
+    sorted_codes = codes[order]
+    starts = numpy.flatnonzero(numpy.concatenate(([True], sorted_codes[1:] != sorted_codes[:-1])))
+    maximums = numpy.fmax.reduceat(values[order], starts)
+    return {
+        groups.values[code]: None if numpy.isnan(maximum) else float(maximum)
+        for code, maximum in zip(sorted_codes[starts], maximums)
+    }
@@ -11,7 +11,6 @@ from edxmako.shortcuts import render_to_string
 from xmodule.modulestore import ModuleStoreEnum
 from opaque_keys.edx.keys import CourseKey
 from xmodule.modulestore.django import modulestore
-from xmodule.contentstore.content import StaticContent
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from static_replace import replace_static_urls
 from xmodule.modulestore import ModuleStoreEnum
@@ -24,6 +23,9 @@ from courseware.module_render import get_module
 from student.models import CourseEnrollment
 import branding
 
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from openedx.core.lib import courses as courses_lib
+
 from opaque_keys.edx.keys import UsageKey
 
 log = logging.getLogger(__name__)
@@ -114,26 +116,37 @@ def get_course_with_access(user, action, course_key, depth=0, check_if_enrolled=
 
 
 def course_image_url(course):
-    """Try to look up the image url for the course.  If it's not found,
-    log an error and return the dead link"""
-    if course.static_asset_path or modulestore().get_modulestore_type(course.id) == ModuleStoreEnum.Type.xml:
-        # If we are a static course with the course_image attribute
-        # set different than the default, return that path so that
-        # courses can use custom course image paths, otherwise just
-        # return the default static path.
-        url = '/static/' + (course.static_asset_path or getattr(course, 'data_dir', ''))
-        if hasattr(course, 'course_image') and course.course_image != course.fields['course_image'].default:
-            url += '/' + course.course_image
-        else:
-            url += '/images/course_image.jpg'
-    elif course.course_image == '':
-        # if course_image is empty the url will be blank as location
-        # of the course_image does not exist
-        url = ''
-    else:
-        loc = StaticContent.compute_location(course.id, course.course_image)
-        url = StaticContent.serialize_asset_key_with_slash(loc)
-    return url
+    """
+    Return the url of the image of course, a CourseDescriptor or a CourseOverview.
+    """
+    if isinstance(course, CourseOverview):
+        return course.course_image_url
+    return courses_lib.course_image_url(course)
+
+
+def get_course_overview_with_access(user, action, course_key):
+    """
+    Given a course_key, look up the CourseOverview of the course, check that
+    the user has the access to perform the specified action on the course,
+    and return the overview.
+
+    Like get_course_with_access, but without loading the course from the
+    modulestore, for pages that only need its summary.
+
+    Raises a 404 if the course_key is invalid, or the user doesn't have access.
+    """
+    assert isinstance(course_key, CourseKey)
+    try:
+        course_overview = CourseOverview.get_from_id(course_key)
+    except (CourseOverview.DoesNotExist, IOError):
+        raise Http404("Course not found.")
+
+    if not has_access(user, action, course_overview, course_key):
+        # Deliberately return a non-specific error message to avoid
+        # leaking info about access control settings
+        raise Http404("Course not found.")
+
+    return course_overview
 
 
 def find_file(filesystem, dirs, filename):
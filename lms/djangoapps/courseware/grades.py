@@ -1,14 +1,19 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 from collections import defaultdict
+from itertools import islice
+import hashlib
 import json
 import random
 import logging
 
 from contextlib import contextmanager
 from django.conf import settings
-from django.db import transaction
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.test.client import RequestFactory
+from django.utils import timezone
 
 import dogstats_wrapper as dog_stats_api
 
@@ -20,15 +25,64 @@ from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .aggregation import ColumnEncoder, count_pairs
+from .models import PersistentSubsectionGrade, StudentModule
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 
 
 log = logging.getLogger("edx.courseware")
 
+# The number of students whose StudentModule records iterate_grades_for reads in one query
+GRADING_CHUNK_SIZE = 100
+
+
+class StudentModuleScoresCache(object):
+    """
+    Holds the scores recorded in StudentModule for a group of students in a course,
+    read in a single query, so that grading those students doesn't need a query per
+    section and per problem.
+
+    The students' PersistentSubsectionGrades for the subsections at subsection_keys are
+    reserved before their scores are read (see reserve_persisted_grades).
+    """
+    def __init__(self, course_key, students, subsection_keys=()):
+        self.course_key = course_key
+        self._student_modules = defaultdict(dict)
+
+        # Grades may only be persisted into records reserved before the scores are read
+        self._persisted_grades = reserve_persisted_grades(course_key, students, subsection_keys)
+
+        student_modules = StudentModule.objects.filter(
+            course_id=course_key,
+            student__in=[student.id for student in students],
+        ).only('student', 'module_state_key', 'grade', 'max_grade')
+
+        for student_module in student_modules.iterator():
+            usage_key = student_module.module_state_key.map_into_course(course_key)
+            self._student_modules[student_module.student_id][usage_key] = student_module
+
+    def has_state(self, student, usage_keys):
+        """
+        Return whether student has a StudentModule for any of usage_keys.
+        """
+        student_modules = self._student_modules[student.id]
+        return any(usage_key in student_modules for usage_key in usage_keys)
+
+    def get(self, student, usage_key):
+        """
+        Return student's StudentModule for usage_key (with only its score fields loaded), or None.
+        """
+        return self._student_modules[student.id].get(usage_key)
+
+    def get_persisted_grades(self, student):
+        """
+        Return student's PersistentSubsectionGrades, keyed by subsection location.
+        """
+        return self._persisted_grades[student.id]
+
 
 def answer_distributions(course_key):
     """
@@ -58,80 +112,96 @@ def answer_distributions(course_key):
     generate the report.
 
     This method will try to use a read-replica database if one is available.
-    """
-    # dict: { module.module_state_key : (url_name, display_name) }
-    state_keys_to_problem_info = {}  # For caching, used by url_and_display_name
 
-    def url_and_display_name(usage_key):
-        """
-        For a given usage_key, return the problem's url and display_name.
-        Handle modulestore access and caching. This method ignores permissions.
-
-        Raises:
-            InvalidKeyError: if the usage_key does not parse
-            ItemNotFoundError: if there is no content that corresponds
-                to this usage_key.
-        """
-        problem_store = modulestore()
-        if usage_key not in state_keys_to_problem_info:
-            problem = problem_store.get_item(usage_key)
-            problem_info = (problem.url_name, problem.display_name_with_default)
-            state_keys_to_problem_info[usage_key] = problem_info
-
-        return state_keys_to_problem_info[usage_key]
-
-    # Iterate through all problems submitted for this course in no particular
-    # order, and build up our answer_counts dict that we will eventually return
-    answer_counts = defaultdict(lambda: defaultdict(int))
-    for module in StudentModule.all_submitted_problems_read_only(course_key):
+    If settings.ANSWER_DISTRIBUTION_CACHE_TIMEOUT is set, the distributions are
+    cached for that many seconds, so they may not include the latest submissions.
+    """
+    cache_timeout = getattr(settings, 'ANSWER_DISTRIBUTION_CACHE_TIMEOUT', 0)
+    if cache_timeout:
+        cache_key = u'courseware.answer_distributions.{}'.format(course_key)
+        cached_answer_counts = cache.get(cache_key)
+        if cached_answer_counts is not None:
+            return _answer_counts_defaultdict(cached_answer_counts)
+
+    # Stream only the columns that are needed, collecting the problem part and the
+    # answer of every submitted answer in two columns, count the distinct pairs in one
+    # batch, and then look up each problem once.
+    problem_parts = ColumnEncoder()
+    answers = ColumnEncoder()
+    submitted_problems = StudentModule.all_submitted_problems_read_only(course_key)
+    rows = submitted_problems.values_list('id', 'module_state_key', 'state')
+    for module_id, module_state_key, state in rows.iterator():
         try:
-            state_dict = json.loads(module.state) if module.state else {}
+            state_dict = json.loads(state) if state else {}
             raw_answers = state_dict.get("student_answers", {})
         except ValueError:
             log.error(
                 u"Answer Distribution: Could not parse module state for StudentModule id=%s, course=%s",
-                module.id,
+                module_id,
                 course_key,
             )
             continue
 
+        # Each problem part has an ID that is derived from the
+        # module_state_key (with some suffix appended)
+        for problem_part_id, raw_answer in raw_answers.items():
+            problem_parts.append((module_state_key, problem_part_id))
+            # Convert whatever raw answers we have (numbers, unicode, None, etc.)
+            # to be unicode values. Note that if we get a string, it's always
+            # unicode and not str -- state comes from the json decoder, and that
+            # always returns unicode for strings.
+            answers.append(unicode(raw_answer))
+
+    # dict: { module_state_key: [(problem_part_id, answer, count)] }
+    part_answer_counts = defaultdict(list)
+    for (module_state_key, problem_part_id), answer, count in count_pairs(problem_parts, answers):
+        part_answer_counts[module_state_key].append((problem_part_id, answer, count))
+
+    problem_store = modulestore()
+    answer_counts = defaultdict(lambda: defaultdict(int))
+    for module_state_key, counts in part_answer_counts.iteritems():
         try:
-            url, display_name = url_and_display_name(module.module_state_key.map_into_course(course_key))
-            # Each problem part has an ID that is derived from the
-            # module.module_state_key (with some suffix appended)
-            for problem_part_id, raw_answer in raw_answers.items():
-                # Convert whatever raw answers we have (numbers, unicode, None, etc.)
-                # to be unicode values. Note that if we get a string, it's always
-                # unicode and not str -- state comes from the json decoder, and that
-                # always returns unicode for strings.
-                answer = unicode(raw_answer)
-                answer_counts[(url, display_name, problem_part_id)][answer] += 1
-
+            problem = problem_store.get_item(UsageKey.from_string(module_state_key).map_into_course(course_key))
         except (ItemNotFoundError, InvalidKeyError):
-            msg = "Answer Distribution: Item {} referenced in StudentModule {} " + \
-                  "for user {} in course {} not found; " + \
+            msg = "Answer Distribution: Item {} referenced in StudentModule records " + \
+                  "in course {} not found; " + \
                   "This can happen if a student answered a question that " + \
-                  "was later deleted from the course. This answer will be " + \
+                  "was later deleted from the course. These answers will be " + \
                   "omitted from the answer distribution CSV."
-            log.warning(
-                msg.format(module.module_state_key, module.id, module.student_id, course_key)
-            )
+            log.warning(msg.format(module_state_key, course_key))
             continue
 
+        url, display_name = problem.url_name, problem.display_name_with_default
+        for problem_part_id, answer, count in counts:
+            answer_counts[(url, display_name, problem_part_id)][answer] += count
+
+    if cache_timeout:
+        # defaultdicts of lambdas can't be pickled
+        cache.set(cache_key, {key: dict(counts) for key, counts in answer_counts.iteritems()}, cache_timeout)
     return answer_counts
 
 
+def _answer_counts_defaultdict(answer_counts):
+    """
+    Return answer_counts, a dict of dicts, as the defaultdicts answer_distributions returns.
+    """
+    result = defaultdict(lambda: defaultdict(int))
+    for key, answers in answer_counts.iteritems():
+        result[key].update(answers)
+    return result
+
+
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, student_module_cache=None):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        return _grade(student, request, course, keep_raw_scores, student_module_cache)
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _grade(student, request, course, keep_raw_scores, student_module_cache=None):
     """
     Unwrapped version of "grade"
 
@@ -150,11 +220,23 @@ def _grade(student, request, course, keep_raw_scores):
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
 
+    If a StudentModuleScoresCache holding this student is passed as student_module_cache,
+    the student's scores are read from it rather than from the database.
+
     More information on the format is in the docstring for CourseGrader.
     """
     grading_context = course.grading_context
     raw_scores = []
 
+    grading_versions = subsection_grading_versions(course)
+    if student_module_cache is not None:
+        persisted_grades = student_module_cache.get_persisted_grades(student)
+    else:
+        # Commit the reserved records before reading any scores, so that a later change to
+        # one of the student's scores is seen by _persist_subsection_grade
+        with manual_transaction():
+            persisted_grades = reserve_persisted_grades(course.id, [student], grading_versions.keys())[student.id]
+
     # Dict of item_ids -> (earned, possible) point tuples. This *only* grabs
     # scores that were registered with the submissions API, which for the moment
     # means only openassessment (edx-ora2)
@@ -162,6 +244,18 @@ def _grade(student, request, course, keep_raw_scores):
         course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
     )
 
+    # Every module created for the student shares one FieldDataCache, to which the state
+    # of each block is added before it is instantiated
+    field_data_cache = FieldDataCache([], course.id, student)
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        with manual_transaction():
+            field_data_cache.add_descriptors_to_cache([descriptor])
+        return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
+
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
     # passed to the grader
@@ -171,73 +265,39 @@ def _grade(student, request, course, keep_raw_scores):
             section_descriptor = section['section_descriptor']
             section_name = section_descriptor.display_name_with_default
 
-            # some problems have state that is updated independently of interaction
-            # with the LMS, so they need to always be scored. (E.g. foldit.,
-            # combinedopenended)
-            should_grade_section = any(
-                descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
-            )
-
-            # If there are no problems that always have to be regraded, check to
-            # see if any of our locations are in the scores from the submissions
-            # API. If scores exist, we have to calculate grades for this section.
-            if not should_grade_section:
-                should_grade_section = any(
-                    descriptor.location.to_deprecated_string() in submissions_scores
-                    for descriptor in section['xmoduledescriptors']
+            grading_version = grading_versions.get(section_descriptor.location)
+            persisted_grade = persisted_grades.get(section_descriptor.location) if grading_version else None
+            if persisted_grade is not None and persisted_grade.grading_version == grading_version:
+                # Only subsections the student has attempted are persisted
+                should_grade_section = True
+                scores = _scores_from_entries(_entries_from_persisted_grade(persisted_grade, course.id))
+            else:
+                should_grade_section = _should_grade_section(
+                    student, section['xmoduledescriptors'], submissions_scores, student_module_cache
                 )
 
-            if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
-
-            # If we haven't seen a single problem in the section, we don't have
-            # to grade it at all! We can assume 0%
-            if should_grade_section:
                 scores = []
-
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
-                    with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
-                    return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
-
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
-
-                    (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
+                if should_grade_section:
+                    entries = _subsection_score_entries(
+                        course.id, student, section_descriptor, create_module, submissions_scores,
+                        student_module_cache
                     )
-                    if correct is None and total is None:
-                        continue
+                    scores = _scores_from_entries(entries)
 
                     if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
-                        if total > 1:
-                            correct = random.randrange(max(total - 2, 1), total + 1)
-                        else:
-                            correct = total
-
-                    graded = module_descriptor.graded
-                    if not total > 0:
-                        # We simply cannot grade a problem that is 12/0, because we might need it as a percentage
-                        graded = False
-
-                    scores.append(
-                        Score(
-                            correct,
-                            total,
-                            graded,
-                            module_descriptor.display_name_with_default,
-                            module_descriptor.location
-                        )
-                    )
+                        scores = [
+                            score._replace(earned=(
+                                random.randrange(max(score.possible - 2, 1), score.possible + 1)
+                                if score.possible > 1 else score.possible
+                            ))
+                            for score in scores
+                        ]
+                    elif persisted_grade is not None:
+                        _persist_subsection_grade(persisted_grade, grading_version, entries)
 
+            # If we haven't seen a single problem in the section, we don't have
+            # to grade it at all! We can assume 0%
+            if should_grade_section:
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
@@ -273,6 +333,231 @@ def _grade(student, request, course, keep_raw_scores):
     return grade_summary
 
 
+def subsection_grading_versions(course):
+    """
+    Return a dict mapping the location of each graded subsection of course whose grade may
+    be persisted to a version identifying everything its scores depend on, other than the
+    student's own state: the course's grading policy, and the location, weight, graded
+    status, display name and last edit of each scored block in the subsection. A
+    PersistentSubsectionGrade is only used while its grading_version is still current.
+
+    Subsections with blocks that always have to be regraded, or whose scores depend on who
+    the student is (blocks restricted to groups or to staff, blocks that aren't released
+    yet, or blocks with dynamic children, e.g. randomized content) are left out, and are
+    always graded from scratch.
+
+    The versions are computed once per course object, until its next graded block is released.
+    """
+    now = timezone.now()
+    next_release, versions = getattr(course, '_subsection_grading_versions', (None, None))
+    if versions is not None and (next_release is None or now < next_release):
+        return versions
+
+    policy = json.dumps(course.grading_policy, sort_keys=True)
+    next_release, versions = None, {}
+    for sections in course.grading_context['graded_sections'].itervalues():
+        for section in sections:
+            blocks = list(_subsection_blocks(section['section_descriptor']))
+
+            release_dates = [block.start for block in blocks if block.start is not None and block.start > now]
+            if release_dates:
+                next_release = min(release_dates + ([next_release] if next_release is not None else []))
+                continue
+
+            if any(
+                    block.always_recalculate_grades or block.has_dynamic_children() or
+                    not _is_visible_to_everyone(block)
+                    for block in blocks
+            ):
+                continue
+
+            version = hashlib.sha1(policy)
+            for descriptor in section['xmoduledescriptors']:
+                version.update(u'|{}:{}:{}:{}:{}'.format(
+                    descriptor.location,
+                    descriptor.weight,
+                    descriptor.graded,
+                    descriptor.display_name_with_default,
+                    _block_version(descriptor),
+                ).encode('utf-8'))
+            versions[section['section_descriptor'].location] = version.hexdigest()
+
+    course._subsection_grading_versions = (next_release, versions)  # pylint: disable=protected-access
+    return versions
+
+
+def _subsection_blocks(section_descriptor):
+    """
+    Yield section_descriptor and each of its descendants.
+    """
+    stack = [section_descriptor]
+    while stack:
+        descriptor = stack.pop()
+        stack.extend(descriptor.get_children())
+        yield descriptor
+
+
+def _block_version(descriptor):
+    """
+    Return a string identifying the content of descriptor: when it was last edited, or, for
+    modulestores that don't record edits (e.g. XML), a digest of its data.
+    """
+    get_edited_on = getattr(descriptor.runtime, 'get_edited_on', None)
+    edited_on = get_edited_on(descriptor) if get_edited_on is not None else None
+    if edited_on is not None:
+        return edited_on.isoformat()
+    return hashlib.sha1(unicode(getattr(descriptor, 'data', u'')).encode('utf-8')).hexdigest()
+
+
+def get_persisted_grades(course_key, students):
+    """
+    Return a dict mapping the id of each of students to a dict of their
+    PersistentSubsectionGrades in the course, keyed by subsection location.
+    """
+    persisted_grades = {student.id: {} for student in students}
+    for persisted_grade in PersistentSubsectionGrade.objects.filter(course_id=course_key, user__in=persisted_grades):
+        usage_key = persisted_grade.usage_key.map_into_course(course_key)
+        persisted_grades[persisted_grade.user_id][usage_key] = persisted_grade
+    return persisted_grades
+
+
+def reserve_persisted_grades(course_key, students, subsection_keys):
+    """
+    Like get_persisted_grades, but first create an empty record (which never matches a
+    grading version) for each of the subsections at subsection_keys that a student doesn't
+    have a record for yet.
+
+    A grade is only stored into a record that was read before the scores it was computed
+    from, and that hasn't changed since (see _persist_subsection_grade).
+    """
+    persisted_grades = get_persisted_grades(course_key, students)
+    missing_grades = [
+        PersistentSubsectionGrade(user_id=student.id, course_id=course_key, usage_key=usage_key, grading_version='')
+        for student in students
+        for usage_key in subsection_keys
+        if usage_key not in persisted_grades[student.id]
+    ]
+    if missing_grades:
+        savepoint = transaction.savepoint()
+        try:
+            PersistentSubsectionGrade.objects.bulk_create(missing_grades)
+            transaction.savepoint_commit(savepoint)
+        except IntegrityError:
+            # Another process reserved some of these records at the same time. Subsections
+            # left without a record are graded, but not persisted, this time.
+            transaction.savepoint_rollback(savepoint)
+        persisted_grades = get_persisted_grades(course_key, students)
+    return persisted_grades
+
+
+def _should_grade_section(student, descriptors, submissions_scores, student_module_cache=None):
+    """
+    Return whether a subsection whose scored blocks are descriptors has to be graded for
+    student: if any of its blocks always has to be scored, or the student has a score from
+    the submissions API or any state for one of them. Otherwise it's worth 0%.
+    """
+    # some problems have state that is updated independently of interaction
+    # with the LMS, so they need to always be scored. (E.g. foldit.,
+    # combinedopenended)
+    if any(descriptor.always_recalculate_grades for descriptor in descriptors):
+        return True
+
+    # If there are no problems that always have to be regraded, check to
+    # see if any of our locations are in the scores from the submissions
+    # API. If scores exist, we have to calculate grades for this section.
+    if any(descriptor.location.to_deprecated_string() in submissions_scores for descriptor in descriptors):
+        return True
+
+    if student_module_cache is not None:
+        return student_module_cache.has_state(student, [descriptor.location for descriptor in descriptors])
+
+    with manual_transaction():
+        return StudentModule.objects.filter(
+            student=student,
+            module_state_key__in=[descriptor.location for descriptor in descriptors]
+        ).exists()
+
+
+def _subsection_score_entries(course_key, student, section_descriptor, module_creator, submissions_scores,
+                              student_module_cache=None):
+    """
+    Return student's scores on the blocks of the subsection at section_descriptor, as a list of
+    (earned, possible, weight, graded, display_name, location) tuples, where earned and possible
+    are the unweighted score (see PersistentSubsectionGrade.scores). They are both None for
+    scored blocks which couldn't be scored.
+    """
+    entries = []
+    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, module_creator):
+        (correct, total, weight) = _get_unweighted_score(
+            course_key, student, module_descriptor, module_creator, scores_cache=submissions_scores,
+            student_module_cache=student_module_cache
+        )
+        if correct is None and total is None and not module_descriptor.has_score:
+            continue
+
+        entries.append((
+            correct,
+            total,
+            weight,
+            module_descriptor.graded,
+            module_descriptor.display_name_with_default,
+            module_descriptor.location,
+        ))
+    return entries
+
+
+def _scores_from_entries(entries):
+    """
+    Return the list of Scores for the blocks in entries (see _subsection_score_entries)
+    which could be scored.
+    """
+    scores = []
+    for earned, possible, weight, graded, display_name, location in entries:
+        if earned is None and possible is None:
+            continue
+
+        correct, total = _weighted_score(earned, possible, weight)
+        if not total > 0:
+            # We simply cannot grade a problem that is 12/0, because we might need it as a percentage
+            graded = False
+
+        scores.append(Score(correct, total, graded, display_name, location))
+    return scores
+
+
+def _entries_from_persisted_grade(persisted_grade, course_key):
+    """
+    Return the score entries (see _subsection_score_entries) stored in persisted_grade.
+    """
+    return [
+        (earned, possible, weight, graded, display_name, UsageKey.from_string(usage_id).map_into_course(course_key))
+        for earned, possible, weight, graded, display_name, usage_id in json.loads(persisted_grade.scores)
+    ]
+
+
+def _persist_subsection_grade(persisted_grade, grading_version, entries):
+    """
+    Store the score entries (see _subsection_score_entries) of an attempted subsection into
+    persisted_grade, which must have been read (see reserve_persisted_grades) before the
+    scores were.
+
+    Returns whether the entries were stored: they aren't if the record has changed or been
+    deleted since it was read, because one of the student's scores changed.
+    """
+    serialized_entries = json.dumps([
+        [earned, possible, weight, graded, display_name, unicode(location)]
+        for earned, possible, weight, graded, display_name, location in entries
+    ])
+
+    # A conditional update, rather than save(), so that a changed record isn't overwritten
+    return PersistentSubsectionGrade.objects.filter(pk=persisted_grade.pk, revision=persisted_grade.revision).update(
+        grading_version=grading_version,
+        scores=serialized_entries,
+        revision=F('revision') + 1,
+        modified=timezone.now(),
+    ) > 0
+
+
 def grade_for_percentage(grade_cutoffs, percentage):
     """
     Returns a letter grade as defined in grading_policy (e.g. 'A' 'B' 'C' for 6.002x) or None.
@@ -342,6 +627,17 @@ def _progress_summary(student, request, course):
 
         course_module = getattr(course_module, '_x_module', course_module)
 
+    # Graded subsections the student has attempted don't need to have their problems
+    # scored again while their persisted grades are current; others are persisted once scored.
+    grading_versions = subsection_grading_versions(course)
+    graded_sections = {
+        section['section_descriptor'].location: section
+        for sections in course.grading_context['graded_sections'].itervalues()
+        for section in sections
+    }
+    with manual_transaction():
+        persisted_grades = reserve_persisted_grades(course.id, [student], grading_versions.keys())[student.id]
+
     submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
 
     chapters = []
@@ -360,27 +656,22 @@ def _progress_summary(student, request, course):
                     continue
 
                 graded = section_module.graded
-                scores = []
-
-                module_creator = section_module.xmodule_runtime.get_module
 
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
-                    course_id = course.id
-                    (correct, total) = get_score(
-                        course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    scores.append(
-                        Score(
-                            correct,
-                            total,
-                            graded,
-                            module_descriptor.display_name_with_default,
-                            module_descriptor.location
-                        )
+                grading_version = grading_versions.get(section_module.location)
+                persisted_grade = persisted_grades.get(section_module.location) if grading_version else None
+                if persisted_grade is not None and persisted_grade.grading_version == grading_version:
+                    entries = _entries_from_persisted_grade(persisted_grade, course.id)
+                else:
+                    module_creator = section_module.xmodule_runtime.get_module
+                    entries = _subsection_score_entries(
+                        course.id, student, section_module, module_creator, submissions_scores
                     )
+                    if persisted_grade is not None and _should_grade_section(
+                            student, graded_sections[section_module.location]['xmoduledescriptors'], submissions_scores
+                    ):
+                        _persist_subsection_grade(persisted_grade, grading_version, entries)
+
+                scores = [score._replace(graded=graded) for score in _scores_from_entries(entries)]
 
                 scores.reverse()
                 section_total, _ = graders.aggregate_scores(
@@ -407,7 +698,7 @@ def _progress_summary(student, request, course):
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, student_module_cache=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -421,51 +712,79 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    student_module_cache: A StudentModuleScoresCache holding user's StudentModules. If given,
+           the database isn't queried.
+    """
+    (correct, total, weight) = _get_unweighted_score(
+        course_id, user, problem_descriptor, module_creator, scores_cache, student_module_cache
+    )
+    if weight is not None and total == 0:
+        log.exception(
+            "Cannot reweight a problem with zero total points. Problem: " + str(problem_descriptor.location)
+        )
+    return _weighted_score(correct, total, weight)
+
+
+def _get_unweighted_score(course_id, user, problem_descriptor, module_creator, scores_cache=None,
+                          student_module_cache=None):
+    """
+    Like get_score, but return the score before it is reweighted, as a tuple (correct, total, weight),
+    where weight is the total to scale the score to, or None if it isn't reweighted.
     """
     scores_cache = scores_cache or {}
 
     if not user.is_authenticated():
-        return (None, None)
+        return (None, None, None)
 
     location_url = problem_descriptor.location.to_deprecated_string()
     if location_url in scores_cache:
-        return scores_cache[location_url]
+        (correct, total) = scores_cache[location_url]
+        return (correct, total, None)
 
     # some problems have state that is updated independently of interaction
     # with the LMS, so they need to always be scored. (E.g. foldit.)
     if problem_descriptor.always_recalculate_grades:
         problem = module_creator(problem_descriptor)
         if problem is None:
-            return (None, None)
+            return (None, None, None)
         score = problem.get_score()
         if score is not None:
-            return (score['score'], score['total'])
+            return (score['score'], score['total'], None)
         else:
-            return (None, None)
+            return (None, None, None)
 
     if not problem_descriptor.has_score:
         # These are not problems, and do not have a score
-        return (None, None)
+        return (None, None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if student_module_cache is not None:
+        student_module = student_module_cache.get(user, problem_descriptor.location)
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module is not None and student_module.max_grade is not None:
         correct = student_module.grade if student_module.grade is not None else 0
         total = student_module.max_grade
+    elif _is_visible_to_everyone(problem_descriptor) and _definition_max_score(problem_descriptor) is not None:
+        # The problem hasn't been graded yet, but it can be loaded by every student, and
+        # what it is worth is known without instantiating it
+        correct = 0.0
+        total = _definition_max_score(problem_descriptor)
     else:
         # If the problem was not in the cache, or hasn't been graded yet,
-        # we need to instantiate the problem.
+        # we need to instantiate the problem (which also checks that the user
+        # can load it).
         # Otherwise, the max score (cached in student_module) won't be available
         problem = module_creator(problem_descriptor)
         if problem is None:
-            return (None, None)
+            return (None, None, None)
 
         correct = 0.0
         total = problem.max_score()
@@ -473,17 +792,38 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # Problem may be an error module (if something in the problem builder failed)
         # In which case total might be None
         if total is None:
-            return (None, None)
-
-    # Now we re-weight the problem, if specified
-    weight = problem_descriptor.weight
-    if weight is not None:
-        if total == 0:
-            log.exception("Cannot reweight a problem with zero total points. Problem: " + str(student_module))
-            return (correct, total)
+            return (None, None, None)
+
+    return (correct, total, problem_descriptor.weight)
+
+
+def _is_visible_to_everyone(descriptor):
+    """
+    Return whether every student can load descriptor: it is released, and it isn't
+    restricted to staff or to some groups of students.
+    """
+    return not (
+        descriptor.visible_to_staff_only or
+        getattr(descriptor, 'merged_group_access', descriptor.group_access) or
+        (descriptor.start is not None and descriptor.start > timezone.now())
+    )
+
+
+def _definition_max_score(descriptor):
+    """
+    Return the max score of the problem at descriptor if it can be read from its definition
+    (see CapaDescriptor.definition_max_score), or None.
+    """
+    return getattr(descriptor, 'definition_max_score', None)
+
+
+def _weighted_score(correct, total, weight):
+    """
+    Return the score correct out of total re-weighted to weight, if specified, as a tuple (correct, total).
+    """
+    if weight is not None and total != 0:
         correct = correct * weight / total
         total = weight
-
     return (correct, total)
 
 
@@ -517,6 +857,10 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    Students are graded in chunks of GRADING_CHUNK_SIZE, reading the StudentModule
+    records of each chunk in a single query, and sharing one course tree between all
+    of them.
     """
     if isinstance(course_or_id, (basestring, CourseKey)):
         course = courses.get_course_by_id(course_or_id)
@@ -528,25 +872,34 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
-            try:
-                request.user = student
-                # Grading calls problem rendering, which calls masquerading,
-                # which checks session vars -- thus the empty session dict below.
-                # It's not pretty, but untangling that is currently beyond the
-                # scope of this feature.
-                request.session = {}
-                gradeset = grade(student, request, course, keep_raw_scores)
-                yield student, gradeset, ""
-            except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
-                log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
-                    student.username,
-                    student.id,
-                    course.id,
-                    exc.message
-                )
-                yield student, {}, exc.message
+    subsection_keys = subsection_grading_versions(course).keys()
+
+    students = iter(students)
+    student_chunk = list(islice(students, GRADING_CHUNK_SIZE))
+    while student_chunk:
+        student_module_cache = StudentModuleScoresCache(course.id, student_chunk, subsection_keys)
+
+        for student in student_chunk:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
+                try:
+                    request.user = student
+                    # Grading calls problem rendering, which calls masquerading,
+                    # which checks session vars -- thus the empty session dict below.
+                    # It's not pretty, but untangling that is currently beyond the
+                    # scope of this feature.
+                    request.session = {}
+                    gradeset = grade(student, request, course, keep_raw_scores, student_module_cache)
+                    yield student, gradeset, ""
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Keep marching on even if this student couldn't be graded for
+                    # some reason, but log it for future reference.
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course.id,
+                        exc.message
+                    )
+                    yield student, {}, exc.message
+
+        student_chunk = list(islice(students, GRADING_CHUNK_SIZE))
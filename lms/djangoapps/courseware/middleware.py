@@ -1,11 +1,17 @@
 """
 Middleware for the courseware app
 """
+import logging
 
 from django.shortcuts import redirect
 from django.core.urlresolvers import reverse
+from xblock.exceptions import KeyValueMultiSaveError
 
+import dogstats_wrapper as dog_stats_api
 from courseware.courses import UserNotEnrolled
+from courseware.model_data import flush_buffered_user_state, user_state_rows_written
+
+log = logging.getLogger(__name__)
 
 
 class RedirectUnenrolledMiddleware(object):
@@ -22,3 +28,23 @@ class RedirectUnenrolledMiddleware(object):
                     args=[course_key.to_deprecated_string()]
                 )
             )
+
+
+class UserStateWriteBufferMiddleware(object):
+    """
+    Write out any Scope.user_state changes that were buffered while serving the request,
+    and record how many StudentModule rows the request wrote.
+    """
+    def process_response(self, _request, response):
+        try:
+            flush_buffered_user_state()
+        except KeyValueMultiSaveError:
+            # The response may already report these changes as saved, so fail the
+            # request rather than lose them silently
+            log.exception("Unable to save buffered user state")
+            raise
+
+        rows_written = user_state_rows_written()
+        if rows_written:
+            dog_stats_api.histogram('lms.courseware.user_state.rows_written', rows_written)
+        return response
@@ -36,8 +36,12 @@ from opaque_keys.edx.block_types import BlockTypeKeyV1
 from opaque_keys.edx.asides import AsideUsageKeyV1
 from contracts import contract, new_contract
 
+from django.conf import settings
 from django.db import DatabaseError
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
+from request_cache.middleware import RequestCache
 from xblock.runtime import KeyValueStore
 from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
 from xblock.fields import Scope, UserScope
@@ -85,6 +89,144 @@ def _all_block_types(descriptors, aside_types):
     return block_types
 
 
+class UserCourseData(object):
+    """
+    All of the StudentModule, XModuleStudentPrefsField and XModuleStudentInfoField rows
+    for a single user in a single course.
+
+    Each table is read with one query the first time that it is needed, and then indexed
+    in memory, so that the field caches for a whole course tree can be filled without
+    issuing a query per chunk of usage keys or block types.
+    """
+    REQUEST_CACHE_KEY = 'courseware.model_data.user_course_data'
+
+    def __init__(self, user, course_id):
+        self.user = user
+        self.course_id = course_id
+        self._student_modules = None
+        self._preferences = None
+        self._user_info = None
+
+    @classmethod
+    def for_request(cls, user, course_id):
+        """
+        Return the :class:`UserCourseData` for `user` in `course_id`. While a request
+        is being served, the same instance is returned for the rest of that request, so
+        that several FieldDataCaches built in one request share the prefetched rows.
+        """
+        if RequestCache.get_current_request() is None:
+            return cls(user, course_id)
+
+        prefetched = RequestCache.get_request_cache().data.setdefault(cls.REQUEST_CACHE_KEY, {})
+        key = (user.id, course_id)
+        if key not in prefetched:
+            prefetched[key] = cls(user, course_id)
+        return prefetched[key]
+
+    @classmethod
+    def invalidate(cls, user_id):
+        """
+        Drop any rows prefetched for `user_id` during the current request.
+        """
+        prefetched = RequestCache.get_request_cache().data.get(cls.REQUEST_CACHE_KEY)
+        if not prefetched:
+            return
+        for key in prefetched.keys():
+            if key[0] == user_id:
+                del prefetched[key]
+
+    @property
+    def student_modules(self):
+        """
+        A dict mapping usage keys to the user's StudentModules in this course.
+        """
+        if self._student_modules is None:
+            self._student_modules = {
+                student_module.module_state_key.map_into_course(student_module.course_id): student_module
+                for student_module in StudentModule.objects.filter(student=self.user.pk, course_id=self.course_id)
+            }
+        return self._student_modules
+
+    @property
+    def preferences(self):
+        """
+        A dict mapping (module_type, field_name) to the user's XModuleStudentPrefsFields.
+        """
+        if self._preferences is None:
+            self._preferences = {
+                (field_object.module_type, field_object.field_name): field_object
+                for field_object in XModuleStudentPrefsField.objects.filter(student=self.user.pk)
+            }
+        return self._preferences
+
+    @property
+    def user_info(self):
+        """
+        A dict mapping field names to the user's XModuleStudentInfoFields.
+        """
+        if self._user_info is None:
+            self._user_info = {
+                field_object.field_name: field_object
+                for field_object in XModuleStudentInfoField.objects.filter(student=self.user.pk)
+            }
+        return self._user_info
+
+
+@receiver(post_save, sender=StudentModule)
+@receiver(post_delete, sender=StudentModule)
+@receiver(post_save, sender=XModuleStudentPrefsField)
+@receiver(post_delete, sender=XModuleStudentPrefsField)
+@receiver(post_save, sender=XModuleStudentInfoField)
+@receiver(post_delete, sender=XModuleStudentInfoField)
+def invalidate_user_course_data(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Make sure that rows prefetched earlier in a request don't mask later writes.
+    """
+    UserCourseData.invalidate(instance.student_id)
+
+
+BUFFERED_USER_STATE_KEY = 'courseware.model_data.buffered_user_state'
+USER_STATE_ROWS_WRITTEN_KEY = 'courseware.model_data.user_state_rows_written'
+
+
+def _buffer_user_state_writes():
+    """
+    Return whether Scope.user_state writes should be buffered until the end of the current request.
+    """
+    return (
+        settings.FEATURES.get('BUFFER_USER_STATE_WRITES', False) and
+        RequestCache.get_current_request() is not None
+    )
+
+
+def _record_user_state_rows_written(rows):
+    """
+    Count `rows` StudentModule writes against the current request.
+    """
+    if RequestCache.get_current_request() is not None:
+        data = RequestCache.get_request_cache().data
+        data[USER_STATE_ROWS_WRITTEN_KEY] = data.get(USER_STATE_ROWS_WRITTEN_KEY, 0) + rows
+
+
+def user_state_rows_written():
+    """
+    Return the number of StudentModule rows written while serving the current request.
+    """
+    return RequestCache.get_request_cache().data.get(USER_STATE_ROWS_WRITTEN_KEY, 0)
+
+
+def flush_buffered_user_state():
+    """
+    Write out all of the Scope.user_state changes buffered during the current request.
+
+    Returns: the number of StudentModule rows written
+
+    Raises: KeyValueMultiSaveError if the changes couldn't be saved
+    """
+    buffered_caches = RequestCache.get_request_cache().data.pop(BUFFERED_USER_STATE_KEY, [])
+    return sum(user_state_cache.flush() for user_state_cache in buffered_caches)
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -348,11 +490,14 @@ class UserStateCache(object):
     """
     Cache for Scope.user_state xblock field data.
     """
-    def __init__(self, user, course_id):
+    def __init__(self, user, course_id, prefetched=None, buffer_writes=False):
         self._cache = defaultdict(dict)
         self.course_id = course_id
         self.user = user
         self._client = DjangoXBlockUserStateClient(self.user)
+        self._prefetched = prefetched
+        self._buffer_writes = buffer_writes
+        self._pending_writes = defaultdict(dict)
 
     def cache_fields(self, fields, xblocks, aside_types):  # pylint: disable=unused-argument
         """
@@ -364,9 +509,25 @@ class UserStateCache(object):
             xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
             aside_types (list of str): Aside types to cache fields for.
         """
+        if self._buffer_writes:
+            # Make sure that state written earlier in this request is visible to this read
+            flush_buffered_user_state()
+
+        usage_keys = _all_usage_keys(xblocks, aside_types)
+        if self._prefetched is not None:
+            student_modules = self._prefetched.student_modules
+            for usage_key in [key for key in usage_keys if key.course_key == self._prefetched.course_id]:
+                usage_keys.remove(usage_key)
+                student_module = student_modules.get(usage_key)
+                if student_module is not None:
+                    self._cache[usage_key] = {} if student_module.state is None else json.loads(student_module.state)
+
+        if not usage_keys:
+            return
+
         block_field_state = self._client.get_many(
             self.user.username,
-            _all_usage_keys(xblocks, aside_types),
+            usage_keys,
         )
         for usage_key, field_state in block_field_state:
             self._cache[usage_key] = field_state
@@ -392,6 +553,7 @@ class UserStateCache(object):
 
         Returns: datetime if there was a modified date, or None otherwise
         """
+        self.flush()
         return self._client.get_mod_date(
             self.user.username,
             kvs_key.block_scope_id,
@@ -413,6 +575,14 @@ class UserStateCache(object):
 
             pending_updates[cache_key][kvs_key.field_name] = value
 
+        if self._buffer_writes:
+            if not self._pending_writes:
+                RequestCache.get_request_cache().data.setdefault(BUFFERED_USER_STATE_KEY, []).append(self)
+            for cache_key, field_state in pending_updates.iteritems():
+                self._pending_writes[cache_key].update(field_state)
+                self._cache[cache_key].update(field_state)
+            return
+
         try:
             self._client.set_many(
                 self.user.username,
@@ -422,6 +592,33 @@ class UserStateCache(object):
             raise KeyValueMultiSaveError([])
         finally:
             self._cache.update(pending_updates)
+            # The client writes rows in bulk, without post_save
+            UserCourseData.invalidate(self.user.id)
+        _record_user_state_rows_written(len(pending_updates))
+
+    def flush(self):
+        """
+        Write out any changes that were buffered by :meth:`set_many`, coalescing all
+        of the writes to each block into a single row update.
+
+        Returns: the number of StudentModule rows written
+        """
+        if not self._pending_writes:
+            return 0
+
+        pending_writes, self._pending_writes = self._pending_writes, defaultdict(dict)
+        try:
+            self._client.set_many(
+                self.user.username,
+                pending_writes
+            )
+        except DatabaseError:
+            raise KeyValueMultiSaveError([])
+        finally:
+            # The client writes rows in bulk, without post_save
+            UserCourseData.invalidate(self.user.id)
+        _record_user_state_rows_written(len(pending_writes))
+        return len(pending_writes)
 
     @contract(kvs_key=DjangoKeyValueStore.Key)
     def get(self, kvs_key):
@@ -459,6 +656,7 @@ class UserStateCache(object):
         if kvs_key.field_name not in field_state:
             raise KeyError(kvs_key.field_name)
 
+        self.flush()
         self._client.delete(self.user.username, cache_key, fields=[kvs_key.field_name])
         del field_state[kvs_key.field_name]
 
@@ -486,6 +684,7 @@ class UserStateCache(object):
 
         Set the score and max_score for the specified user and xblock usage.
         """
+        self.flush()
         student_module, created = StudentModule.objects.get_or_create(
             student_id=user_id,
             module_state_key=usage_key,
@@ -578,9 +777,10 @@ class PreferencesCache(DjangoOrmFieldCache):
     """
     Cache for Scope.preferences xblock field data.
     """
-    def __init__(self, user):
+    def __init__(self, user, prefetched=None):
         super(PreferencesCache, self).__init__()
         self.user = user
+        self._prefetched = prefetched
 
     def _create_object(self, kvs_key, value):
         """
@@ -611,11 +811,20 @@ class PreferencesCache(DjangoOrmFieldCache):
             aside_types (list of str): Asides to load field for (which annotate the supplied
                 xblocks).
         """
+        block_types = _all_block_types(xblocks, aside_types)
+        field_names = set(field.name for field in fields)
+        if self._prefetched is not None:
+            return [
+                field_object
+                for (block_type, field_name), field_object in self._prefetched.preferences.iteritems()
+                if block_type in block_types and field_name in field_names
+            ]
+
         return XModuleStudentPrefsField.objects.chunked_filter(
             'module_type__in',
-            _all_block_types(xblocks, aside_types),
+            block_types,
             student=self.user.pk,
-            field_name__in=set(field.name for field in fields),
+            field_name__in=field_names,
         )
 
     def _cache_key_for_field_object(self, field_object):
@@ -641,9 +850,10 @@ class UserInfoCache(DjangoOrmFieldCache):
     """
     Cache for Scope.user_info xblock field data
     """
-    def __init__(self, user):
+    def __init__(self, user, prefetched=None):
         super(UserInfoCache, self).__init__()
         self.user = user
+        self._prefetched = prefetched
 
     def _create_object(self, kvs_key, value):
         """
@@ -673,9 +883,17 @@ class UserInfoCache(DjangoOrmFieldCache):
             aside_types (list of str): Asides to load field for (which annotate the supplied
                 xblocks).
         """
+        field_names = set(field.name for field in fields)
+        if self._prefetched is not None:
+            return [
+                field_object
+                for field_name, field_object in self._prefetched.user_info.iteritems()
+                if field_name in field_names
+            ]
+
         return XModuleStudentInfoField.objects.filter(
             student=self.user.pk,
-            field_name__in=set(field.name for field in fields),
+            field_name__in=field_names,
         )
 
     def _cache_key_for_field_object(self, field_object):
@@ -702,7 +920,7 @@ class FieldDataCache(object):
     A cache of django model objects needed to supply the data
     for a module and its descendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None, prefetch_course=False):
         """
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -715,6 +933,9 @@ class FieldDataCache(object):
         user: The user for which to cache data
         select_for_update: Ignored
         asides: The list of aside types to load, or None to prefetch no asides.
+        prefetch_course: If True, read all of the user's rows for the course with a single
+            query per table (see :class:`UserCourseData`), rather than only the rows
+            needed by `descriptors`.
         """
         if asides is None:
             self.asides = []
@@ -725,16 +946,25 @@ class FieldDataCache(object):
         self.course_id = course_id
         self.user = user
 
+        if prefetch_course and self.user.is_authenticated():
+            prefetched = UserCourseData.for_request(self.user, self.course_id)
+        else:
+            prefetched = None
+
         self.cache = {
             Scope.user_state: UserStateCache(
                 self.user,
                 self.course_id,
+                prefetched,
+                buffer_writes=_buffer_user_state_writes(),
             ),
             Scope.user_info: UserInfoCache(
                 self.user,
+                prefetched,
             ),
             Scope.preferences: PreferencesCache(
                 self.user,
+                prefetched,
             ),
             Scope.user_state_summary: UserStateSummaryCache(
                 self.course_id,
@@ -806,8 +1036,14 @@ class FieldDataCache(object):
         descriptor_filter is a function that accepts a descriptor and return whether the field data
             should be cached
         select_for_update: Ignored
+
+        When every descendant of the course itself is requested, all of the user's data
+        for the course is prefetched with a single query per table.
         """
-        cache = FieldDataCache([], course_id, user, select_for_update, asides=asides)
+        prefetch_course = depth is None and descriptor.location.block_type == 'course'
+        cache = FieldDataCache(
+            [], course_id, user, select_for_update, asides=asides, prefetch_course=prefetch_course
+        )
         cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
         return cache
 
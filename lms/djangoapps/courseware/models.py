@@ -12,16 +12,20 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import json
 import logging
 import itertools
 
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver, Signal
+from django.utils import timezone
 
 from model_utils.models import TimeStampedModel
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from student.models import user_by_anonymous_id
 from submissions.models import score_set, score_reset
 
@@ -298,6 +302,110 @@ class StudentFieldOverride(TimeStampedModel):
     value = models.TextField(default='null')
 
 
+class PersistentSubsectionGrade(models.Model):
+    """
+    The scores a student has earned on the problems of a graded subsection they have
+    attempted, as computed by `courseware.grades.grade`, so that they don't have to be
+    recomputed on every request.
+
+    A record is only valid for the grading_version it was computed against (see
+    `courseware.grades.subsection_grading_versions`). When one of the student's scores
+    changes, only the record of the subsection holding the problem is updated.
+    """
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    usage_key = LocationKeyField(max_length=255, db_index=True)
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('user', 'course_id', 'usage_key'),)
+
+    # Identifies the grading policy and graded content the scores were computed against
+    grading_version = models.CharField(max_length=40)
+
+    # JSON list of [earned, possible, weight, graded, display_name, usage_key] for each scored
+    # block in the subsection, where earned and possible are the unweighted score (both null if
+    # the block couldn't be scored), to be scaled to weight unless it is null
+    scores = models.TextField(default='[]')
+
+    # Incremented on every change, so that a grade computed from scores read before a change
+    # isn't stored over it
+    revision = models.PositiveIntegerField(default=0)
+
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    @classmethod
+    def update_score(cls, user_id, course_id, usage_id, earned, possible, weight=None):
+        """
+        Store the new unweighted score (earned out of possible, to be scaled to weight if it
+        isn't None) of the block at usage_id into the user's persisted grade of the subsection
+        holding it. The persisted grades of the user's other subsections are left alone.
+        """
+        def set_score(entry):
+            """Update entry, unless its max score has to be read from the block again."""
+            if possible is None:
+                return False
+            entry[0:3] = [earned if earned is not None else 0, possible, weight]
+            return True
+
+        cls._update_entries(user_id, course_id, usage_id, set_score)
+
+    @classmethod
+    def invalidate_subsection(cls, user_id, course_id, usage_id):
+        """
+        Delete the user's persisted grade of the subsection holding the block at usage_id,
+        so that it is recomputed the next time the user is graded.
+        """
+        cls._update_entries(user_id, course_id, usage_id, lambda entry: False)
+
+    @classmethod
+    def _update_entries(cls, user_id, course_id, usage_id, update):
+        """
+        Call update on the entry (see `scores`) for the block at usage_id in each of the
+        user's persisted grades in the course which lists it, storing the grade if update
+        returns True, and deleting it otherwise.
+
+        If no grade lists the block (e.g. because it isn't in a graded subsection, was added
+        since, or the user is being graded right now), the revisions of all of the user's
+        grades in the course are bumped instead, so that no grade computed from scores read
+        before this change is stored.
+        """
+        try:
+            course_key = CourseKey.from_string(course_id) if isinstance(course_id, basestring) else course_id
+            usage_key = UsageKey.from_string(usage_id) if isinstance(usage_id, basestring) else usage_id
+        except InvalidKeyError:
+            log.warning(u"Cannot update persisted grades for invalid block %s in course %s", usage_id, course_id)
+            return
+
+        usage_id = unicode(usage_key.map_into_course(course_key))
+        persisted_grades = cls.objects.filter(user=user_id, course_id=course_key)
+
+        updated = False
+        for persisted_grade in persisted_grades.filter(scores__contains=json.dumps(usage_id)):
+            entries = json.loads(persisted_grade.scores)
+            matching_entries = [entry for entry in entries if entry[5] == usage_id]
+            if not matching_entries:
+                continue
+
+            updated = True
+            if all([update(entry) for entry in matching_entries]):
+                # A conditional update, so that a concurrent change to the grade isn't lost
+                if cls.objects.filter(pk=persisted_grade.pk, revision=persisted_grade.revision).update(
+                        scores=json.dumps(entries),
+                        revision=models.F('revision') + 1,
+                        modified=timezone.now(),
+                ):
+                    continue
+            persisted_grade.delete()
+
+        if not updated:
+            persisted_grades.update(revision=models.F('revision') + 1)
+
+    def __unicode__(self):
+        return u"[PersistentSubsectionGrade] {}: {} {} ({})".format(
+            self.user_id, self.course_id, self.usage_key, self.grading_version  # pylint: disable=no-member
+        )
+
+
 # Signal that indicates that a user's score for a problem has been updated.
 # This signal is generated when a scoring event occurs either within the core
 # platform or in the Submissions module. Note that this signal will be triggered
@@ -342,6 +450,8 @@ def submissions_score_set_handler(sender, **kwargs):  # pylint: disable=unused-a
     # If any of the kwargs were missing, at least one of the following values
     # will be None.
     if all((user, points_possible, points_earned, course_id, usage_id)):
+        # Scores from the submissions API aren't reweighted when the student is graded
+        PersistentSubsectionGrade.update_score(user.id, course_id, usage_id, points_earned, points_possible)
         SCORE_CHANGED.send(
             sender=None,
             points_possible=points_possible,
@@ -381,6 +491,7 @@ def submissions_score_reset_handler(sender, **kwargs):  # pylint: disable=unused
     # If any of the kwargs were missing, at least one of the following values
     # will be None.
     if all((user, course_id, usage_id)):
+        PersistentSubsectionGrade.invalidate_subsection(user.id, course_id, usage_id)
         SCORE_CHANGED.send(
             sender=None,
             points_possible=0,
@@ -394,3 +505,14 @@ def submissions_score_reset_handler(sender, **kwargs):  # pylint: disable=unused
             u"Failed to process score_reset signal from Submissions API. "
             "user: %s, course_id: %s, usage_id: %s", user, course_id, usage_id
         )
+
+
+@receiver(post_delete, sender=StudentModule)
+def invalidate_persisted_grade_for_deleted_state(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Deleting a StudentModule (e.g. when an instructor resets a student's state)
+    removes its score without a grade event, so the persisted grade of the
+    subsection holding it has to be recomputed.
+    """
+    PersistentSubsectionGrade.invalidate_subsection(instance.student_id, instance.course_id, instance.module_state_key)
+
@@ -27,10 +27,10 @@ from django.views.decorators.csrf import csrf_exempt
 import newrelic.agent
 
 from capa.xqueue_interface import XQueueInterface
-from courseware.access import has_access, get_user_role
+from courseware.access import has_access, get_block_access_checker, get_user_role
 from courseware.masquerade import setup_masquerade
-from courseware.model_data import FieldDataCache, DjangoKeyValueStore
-from courseware.models import SCORE_CHANGED
+from courseware.model_data import FieldDataCache, DjangoKeyValueStore, flush_buffered_user_state
+from courseware.models import PersistentSubsectionGrade, SCORE_CHANGED
 from courseware.entrance_exams import (
     get_entrance_exam_score,
     user_must_complete_entrance_exam
@@ -44,16 +44,13 @@ from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import UsageKey, CourseKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from openedx.core.lib.xblock_utils import (
-    replace_course_urls,
-    replace_jump_to_id_urls,
-    replace_static_urls,
+    replace_urls,
     add_staff_markup,
     wrap_xblock,
     request_token as xblock_request_token,
 )
 from psychometrics.psychoanalyze import make_psychometrics_data_update_handler
 from student.models import anonymous_id_for_user, user_by_anonymous_id
-from student.roles import CourseBetaTesterRole
 from xblock.core import XBlock
 from xblock.django.request import django_to_webob_request, webob_to_django_response
 from xblock_django.user_service import DjangoXBlockUserService
@@ -308,6 +305,7 @@ def get_module_system_for_user(user, field_data_cache,  # TODO  # pylint: disabl
         (LmsModuleSystem, KvsFieldData):  (module system, student_data) bound to, primarily, the user and descriptor
     """
     student_data = KvsFieldData(DjangoKeyValueStore(field_data_cache))
+    access_checker = get_block_access_checker(user, course_id)
 
     def make_xqueue_callback(dispatch='score_update'):
         """
@@ -430,6 +428,16 @@ def get_module_system_for_user(user, field_data_cache,  # TODO  # pylint: disabl
             max_grade,
         )
 
+        # Store the new score into the persisted grade of the subsection holding this block
+        PersistentSubsectionGrade.update_score(
+            user_id,
+            course_id,
+            descriptor.location,
+            grade,
+            max_grade,
+            getattr(descriptor, 'weight', None),
+        )
+
         # Bin score into range and increment stats
         score_bucket = get_score_bucket(grade, max_grade)
 
@@ -550,32 +558,24 @@ def get_module_system_for_user(user, field_data_cache,  # TODO  # pylint: disabl
     # prefix is going to have to be specific to the module, not the directory
     # that the xml was loaded from
 
-    # Rewrite urls beginning in /static to point to course-specific content
-    block_wrappers.append(partial(
-        replace_static_urls,
-        getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.static_asset_path
-    ))
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
-    #   hierarchy of this course
-    block_wrappers.append(partial(replace_course_urls, course_id))
-
-    # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
-    # is an improvement over the /course/... format for studio authored courses,
-    # because it is agnostic to course-hierarchy.
+    # Rewrite urls beginning in /static to point to course-specific content,
+    # allow URLs of the form '/course/' refer to the root of multicourse directory
+    # hierarchy of this course, and rewrite intra-courseware links (/jump_to_id/<id>),
+    # all in one pass. The /jump_to_id/ format is an improvement over the /course/...
+    # format for studio authored courses, because it is agnostic to course-hierarchy.
     # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
     # function, we just need to specify something to get the reverse() to work.
     block_wrappers.append(partial(
-        replace_jump_to_id_urls,
+        replace_urls,
+        getattr(descriptor, 'data_dir', None),
         course_id,
         reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}),
+        static_asset_path=static_asset_path or descriptor.static_asset_path
     ))
 
     if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF'):
-        if has_access(user, 'staff', descriptor, course_id):
-            has_instructor_access = has_access(user, 'instructor', descriptor, course_id)
+        if access_checker.has_access('staff', descriptor):
+            has_instructor_access = access_checker.has_access('instructor', descriptor)
             block_wrappers.append(partial(add_staff_markup, user, has_instructor_access, disable_staff_debug_info))
 
     # These modules store data using the anonymous_student_id as a key.
@@ -594,7 +594,7 @@ def get_module_system_for_user(user, field_data_cache,  # TODO  # pylint: disabl
 
     field_data = LmsFieldData(descriptor._field_data, student_data)  # pylint: disable=protected-access
 
-    user_is_staff = has_access(user, u'staff', descriptor.location, course_id)
+    user_is_staff = access_checker.has_access(u'staff', descriptor)
 
     system = LmsModuleSystem(
         track_function=track_function,
@@ -609,7 +609,7 @@ def get_module_system_for_user(user, field_data_cache,  # TODO  # pylint: disabl
         hostname=settings.SITE_NAME,
         # TODO (cpennington): This should be removed when all html from
         # a module is coming through get_html and is therefore covered
-        # by the replace_static_urls code below
+        # by the replace_urls code below
         replace_urls=partial(
             static_replace.replace_static_urls,
             data_directory=getattr(descriptor, 'data_dir', None),
@@ -669,11 +669,11 @@ def get_module_system_for_user(user, field_data_cache,  # TODO  # pylint: disabl
 
     system.set(u'user_is_staff', user_is_staff)
     system.set(u'user_is_admin', has_access(user, u'staff', 'global'))
-    system.set(u'user_is_beta_tester', CourseBetaTesterRole(course_id).has_user(user))
+    system.set(u'user_is_beta_tester', access_checker.is_beta_tester())
     system.set(u'days_early_for_beta', getattr(descriptor, 'days_early_for_beta'))
 
     # make an ErrorDescriptor -- assuming that the descriptor's system is ok
-    if has_access(user, u'staff', descriptor.location, course_id):
+    if user_is_staff:
         system.error_descriptor_class = ErrorDescriptor
     else:
         system.error_descriptor_class = NonStaffErrorDescriptor
@@ -726,7 +726,7 @@ def get_module_for_descriptor_internal(user, descriptor, field_data_cache, cours
     # for the student, since there may be field override data for the student
     # that affects xblock visibility.
     if getattr(user, 'known', True):
-        if not has_access(user, 'load', descriptor, course_id):
+        if not get_block_access_checker(user, course_id).has_access('load', descriptor):
             return None
 
     return descriptor
@@ -941,6 +941,9 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix):
             with tracker.get_tracker().context(tracking_context_name, tracking_context):
                 resp = instance.handle(handler, req, suffix)
 
+            # Write out any state the handler changed before responding
+            flush_buffered_user_state()
+
         except NoSuchHandlerError:
             log.exception("XBlock %s attempted to access missing handler %r", instance, handler)
             raise Http404
@@ -9,15 +9,17 @@ from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
 import courseware.access as access
 from courseware.masquerade import CourseMasquerade
-from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
+from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory, BetaTesterFactory
 from courseware.tests.helpers import LoginEnrollmentTestCase
 from student.tests.factories import AnonymousUserFactory, CourseEnrollmentAllowedFactory, CourseEnrollmentFactory
 from xmodule.course_module import (
     CATALOG_VISIBILITY_CATALOG_AND_ABOUT, CATALOG_VISIBILITY_ABOUT,
     CATALOG_VISIBILITY_NONE
 )
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from request_cache.middleware import RequestCache
 
 from util.milestones_helpers import (
     set_prerequisite_courses,
@@ -297,6 +299,102 @@ class AccessTestCase(LoginEnrollmentTestCase, ModuleStoreTestCase):
         self.assertTrue(access._has_access_course_desc(staff, 'see_in_catalog', course))
         self.assertTrue(access._has_access_course_desc(staff, 'see_about_page', course))
 
+    @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+    def test_course_overview_access(self):
+        """
+        Tests that the access to a course's overview is the same as to the course
+        """
+        now = datetime.datetime.now(pytz.UTC)
+        courses = [
+            CourseFactory.create(start=now - datetime.timedelta(days=1)),
+            CourseFactory.create(start=now + datetime.timedelta(days=1)),
+            CourseFactory.create(start=now + datetime.timedelta(days=1), days_early_for_beta=2),
+            CourseFactory.create(visible_to_staff_only=True),
+            CourseFactory.create(
+                enrollment_start=now - datetime.timedelta(days=1),
+                enrollment_end=now + datetime.timedelta(days=1),
+                catalog_visibility=CATALOG_VISIBILITY_ABOUT,
+            ),
+            CourseFactory.create(invitation_only=True, catalog_visibility=CATALOG_VISIBILITY_NONE),
+        ]
+        for course in courses:
+            course_overview = CourseOverview.get_from_id(course.id)
+            users = [self.anonymous_user, UserFactory(), UserFactory(is_staff=True), StaffFactory(course_key=course.id)]
+            for user in users:
+                for action in ('load', 'view_courseware_with_prerequisites', 'load_mobile', 'enroll',
+                               'see_exists', 'staff', 'instructor', 'see_in_catalog', 'see_about_page'):
+                    self.assertEqual(
+                        bool(access.has_access(user, action, course_overview)),
+                        bool(access.has_access(user, action, course)),
+                        (unicode(course.id), user, action)
+                    )
+
+    @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+    def test_filter_by_access(self):
+        """
+        Tests that filtering blocks by access gives the same answers as has_access
+        """
+        now = datetime.datetime.now(pytz.UTC)
+        course = CourseFactory.create(start=now - datetime.timedelta(days=1), days_early_for_beta=2)
+        chapter = ItemFactory.create(category='chapter', parent=course)
+        blocks = [
+            chapter,
+            ItemFactory.create(category='sequential', parent=chapter, start=now + datetime.timedelta(days=1)),
+            ItemFactory.create(category='sequential', parent=chapter, start=now + datetime.timedelta(days=3)),
+            ItemFactory.create(category='sequential', parent=chapter, visible_to_staff_only=True),
+            ItemFactory.create(category='html', parent=chapter, start=now - datetime.timedelta(days=1)),
+        ]
+        users = [
+            self.anonymous_user, None, UserFactory(), UserFactory(is_staff=True),
+            StaffFactory(course_key=course.id), InstructorFactory(course_key=course.id),
+            BetaTesterFactory(course_key=course.id),
+        ]
+        for user in users:
+            for action in ('load', 'staff', 'instructor'):
+                self.assertEqual(
+                    access.filter_by_access(user, action, blocks, course.id),
+                    [block for block in blocks if access.has_access(user, action, block, course.id)],
+                    (user, action)
+                )
+
+        # A beta tester sees the block starting within their days early
+        beta_tester = users[-1]
+        self.assertEqual(
+            access.filter_by_access(beta_tester, 'load', blocks, course.id),
+            [blocks[0], blocks[1], blocks[4]]
+        )
+
+        # Staff masquerading as a student see what students see
+        staff = users[4]
+        staff.masquerade_settings = {course.id: CourseMasquerade(course.id, role='student')}
+        self.assertEqual(access.filter_by_access(staff, 'load', blocks, course.id), [blocks[0], blocks[4]])
+
+    def test_block_access_checker_kept_for_request(self):
+        """
+        Tests that the same checker is used for the rest of a request, and not outside one
+        """
+        course_key = self.course.course_key
+        self.assertIsNot(
+            access.get_block_access_checker(self.student, course_key),
+            access.get_block_access_checker(self.student, course_key)
+        )
+
+        request_cache = RequestCache()
+        request_cache.process_request(Mock())
+        self.addCleanup(request_cache.clear_request_cache)
+        checker = access.get_block_access_checker(self.student, course_key)
+        self.assertIs(access.get_block_access_checker(self.student, course_key), checker)
+        self.assertIsNot(access.get_block_access_checker(self.course_staff, course_key), checker)
+
+        # Masquerading changes what the user has access to
+        self.course_staff.masquerade_settings = {course_key: CourseMasquerade(course_key, role='student')}
+        staff_checker = access.get_block_access_checker(self.course_staff, course_key)
+        self.course_staff.masquerade_settings = {}
+        self.assertIsNot(access.get_block_access_checker(self.course_staff, course_key), staff_checker)
+
+        request_cache.process_response(Mock(), Mock())
+        self.assertIsNot(access.get_block_access_checker(self.student, course_key), checker)
+
     @patch.dict("django.conf.settings.FEATURES", {'ENABLE_PREREQUISITE_COURSES': True, 'MILESTONES_APP': True})
     def test_access_on_course_with_pre_requisites(self):
         """
@@ -0,0 +1,46 @@
+"""
+Tests for courseware.aggregation
+"""
+from unittest import TestCase
+
+from courseware.aggregation import ColumnEncoder, count_pairs, group_maximums, group_sums
+
+
+def encode(values):
+    """Return a ColumnEncoder holding values"""
+    column = ColumnEncoder()
+    for value in values:
+        column.append(value)
+    return column
+
+
+class AggregationTest(TestCase):
+    """Tests of the columnar aggregation functions"""
+
+    def test_encoder(self):
+        column = encode(['b', 'a', 'b'])
+        self.assertEqual(3, len(column))
+        self.assertEqual(['b', 'a'], column.values)
+        self.assertEqual([0, 1, 0], list(column.codes))
+
+    def test_count_pairs(self):
+        problems = encode(['p1', 'p2', 'p1', 'p1', 'p2'])
+        answers = encode(['x', 'x', 'y', 'x', 'x'])
+        self.assertEqual(
+            [('p1', 'x', 2), ('p1', 'y', 1), ('p2', 'x', 2)],
+            count_pairs(problems, answers)
+        )
+
+    def test_group_sums(self):
+        self.assertEqual({'p1': 5, 'p2': 2}, group_sums(encode(['p1', 'p2', 'p1']), [1, 2, 4]))
+
+    def test_group_maximums(self):
+        self.assertEqual(
+            {'p1': 3.0, 'p2': 2.0, 'p3': None},
+            group_maximums(encode(['p1', 'p2', 'p1', 'p3', 'p2']), [3.0, None, 1.0, None, 2.0])
+        )
+
+    def test_empty(self):
+        self.assertEqual([], count_pairs(encode([]), encode([])))
+        self.assertEqual({}, group_sums(encode([]), []))
+        self.assertEqual({}, group_maximums(encode([]), []))
@@ -20,6 +20,7 @@ from courseware.courses import (
 from courseware.module_render import get_module_for_descriptor
 from courseware.tests.helpers import get_request_for_user
 from courseware.model_data import FieldDataCache
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from student.tests.factories import UserFactory
 from xmodule.modulestore.django import _get_modulestore_branch_setting, modulestore
 from xmodule.modulestore import ModuleStoreEnum
@@ -90,6 +91,12 @@ class MongoCourseImageTestCase(ModuleStoreTestCase):
         course = CourseFactory.create(org='edX', course='999')
         self.assertEquals(course_image_url(course), '/c4x/edX/999/asset/{0}'.format(course.course_image))
 
+    def test_course_overview_image_url(self):
+        """The image URL of a CourseOverview is the one of its course."""
+        course = CourseFactory.create(org='edX', course='999')
+        course_overview = CourseOverview.get_from_id(course.id)
+        self.assertEquals(course_image_url(course_overview), course_image_url(course))
+
     def test_non_ascii_image_name(self):
         # Verify that non-ascii image names are cleaned
         course = CourseFactory.create(course_image=u'before_\N{SNOWMAN}_after.jpg')
@@ -1,18 +1,25 @@
 """
 Test grade calculation.
 """
+from datetime import datetime
+
 from django.http import Http404
-from mock import patch
+from mock import Mock, patch
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from pytz import UTC
 
-from courseware.grades import grade, iterate_grades_for
+from courseware.grades import (
+    get_score, grade, iterate_grades_for, reserve_persisted_grades, StudentModuleScoresCache, _persist_subsection_grade
+)
+from courseware.models import PersistentSubsectionGrade, StudentModule
+from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, student_module_cache=None):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -23,7 +30,7 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(student, request, course, keep_raw_scores=keep_raw_scores, student_module_cache=student_module_cache)
 
 
 @attr('shard_1')
@@ -106,6 +113,130 @@ class TestGradeIteration(ModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    def test_student_module_scores_cache(self):
+        """The scores of every student in a chunk are read in a single batch of queries"""
+        problem = ItemFactory.create(parent=self.course, category='problem', display_name='Problem')
+        student1, student2 = self.students[:2]
+        StudentModuleFactory.create(
+            student=student1, course_id=self.course.id, module_state_key=problem.location, grade=1, max_grade=2
+        )
+
+        # one query for the StudentModules, and one for the persisted grades
+        with self.assertNumQueries(2):
+            cache = StudentModuleScoresCache(self.course.id, self.students)
+
+        self.assertTrue(cache.has_state(student1, [problem.location]))
+        self.assertFalse(cache.has_state(student2, [problem.location]))
+        self.assertEqual(cache.get(student1, problem.location).grade, 1)
+        self.assertIsNone(cache.get(student2, problem.location))
+
+    def test_unattempted_problem_max_score(self):
+        """The max score of a problem a student hasn't tried doesn't come from another student's record"""
+        problem = ItemFactory.create(parent=self.course, category='problem', display_name='Problem')
+        student1, student2 = self.students[:2]
+        StudentModuleFactory.create(
+            student=student1, course_id=self.course.id, module_state_key=problem.location, grade=1, max_grade=2
+        )
+        cache = StudentModuleScoresCache(self.course.id, self.students)
+        module_creator = Mock(return_value=Mock(max_score=Mock(return_value=3)))
+
+        self.assertEqual(
+            get_score(self.course.id, student2, problem, module_creator, student_module_cache=cache), (0, 3)
+        )
+        self.assertEqual(
+            get_score(self.course.id, student1, problem, module_creator, student_module_cache=cache), (1, 2)
+        )
+
+    def test_unattempted_released_problem_max_score(self):
+        """An unattempted problem every student can see is scored from its definition, without loading it"""
+        problem = ItemFactory.create(
+            parent=self.course, category='problem', display_name='Problem',
+            start=datetime(2015, 1, 1, tzinfo=UTC),
+            data=(
+                '<problem><stringresponse answer="a"><textline points="2"/></stringresponse>'
+                '<stringresponse answer="b"><textline/></stringresponse></problem>'
+            )
+        )
+        problem = self.store.get_item(problem.location)
+        cache = StudentModuleScoresCache(self.course.id, self.students)
+        module_creator = Mock()
+
+        self.assertEqual(
+            get_score(self.course.id, self.students[0], problem, module_creator, student_module_cache=cache), (0, 3)
+        )
+        self.assertFalse(module_creator.called)
+
+    def test_persisted_subsection_grades(self):
+        """Grading a student persists the grades of the subsections they attempted, updated by score changes"""
+        chapter = ItemFactory.create(
+            parent=self.course, category='chapter', display_name='Chapter', start=datetime(2015, 1, 1, tzinfo=UTC)
+        )
+        homework1, homework2 = [
+            ItemFactory.create(
+                parent=chapter, category='sequential', display_name=display_name,
+                metadata={'graded': True, 'format': 'Homework'}
+            )
+            for display_name in ('Homework 1', 'Homework 2')
+        ]
+        problem1 = ItemFactory.create(parent=homework1, category='problem', display_name='Problem 1')
+        problem2 = ItemFactory.create(parent=homework2, category='problem', display_name='Problem 2')
+        self.course = self.store.get_course(self.course.id)
+        student = self.students[0]
+        StudentModuleFactory.create(
+            student=student, course_id=self.course.id, module_state_key=problem1.location, grade=1, max_grade=2
+        )
+
+        all_gradesets, _ = self._gradesets_and_errors_for(self.course.id, [student])
+        persisted_grades = {
+            persisted_grade.usage_key.map_into_course(self.course.id): persisted_grade
+            for persisted_grade in PersistentSubsectionGrade.objects.filter(user=student, course_id=self.course.id)
+        }
+        self.assertEqual(set(persisted_grades), {homework1.location, homework2.location})
+        # Unattempted subsections aren't persisted
+        self.assertEqual(persisted_grades[homework2.location].grading_version, '')
+        self.assertNotEqual(persisted_grades[homework1.location].grading_version, '')
+
+        # Grading again from the persisted record gives the same result
+        regraded_gradesets, _ = self._gradesets_and_errors_for(self.course.id, [student])
+        self.assertEqual(regraded_gradesets[student]['percent'], all_gradesets[student]['percent'])
+
+        # A new score is stored into the subsection holding the problem, leaving the others alone
+        PersistentSubsectionGrade.update_score(student.id, self.course.id, problem1.location, 2, 2)
+        persisted_grade = PersistentSubsectionGrade.objects.get(pk=persisted_grades[homework1.location].pk)
+        self.assertEqual(persisted_grade.revision, persisted_grades[homework1.location].revision + 1)
+        self.assertEqual(
+            PersistentSubsectionGrade.objects.get(pk=persisted_grades[homework2.location].pk).revision,
+            persisted_grades[homework2.location].revision
+        )
+        StudentModule.objects.filter(student=student, module_state_key=problem1.location).update(grade=2)
+        regraded_gradesets, _ = self._gradesets_and_errors_for(self.course.id, [student])
+        self.assertEqual(
+            [score.earned for score in regraded_gradesets[student]['totaled_scores']['Homework']], [2.0, 0.0]
+        )
+        self.assertEqual(
+            PersistentSubsectionGrade.objects.get(pk=persisted_grade.pk).revision, persisted_grade.revision
+        )
+
+        # Deleting the student's state for the problem makes the subsection be graded again
+        StudentModule.objects.get(student=student, module_state_key=problem1.location).delete()
+        self.assertFalse(PersistentSubsectionGrade.objects.filter(pk=persisted_grade.pk).exists())
+        self.assertTrue(PersistentSubsectionGrade.objects.filter(pk=persisted_grades[homework2.location].pk).exists())
+
+    def test_changed_grade_is_not_persisted(self):
+        """A grade computed from scores read before one of the student's scores changed is dropped"""
+        student = self.students[0]
+        usage_key = self.course.location.replace(category='sequential', name='Homework_1')
+        problem_key = self.course.location.replace(category='problem', name='Problem_1')
+
+        persisted_grade = reserve_persisted_grades(self.course.id, [student], [usage_key])[student.id][usage_key]
+        self.assertEqual(persisted_grade.grading_version, '')
+
+        # One of the student's scores changes while they are being graded
+        PersistentSubsectionGrade.update_score(student.id, self.course.id, problem_key, 1, 1)
+
+        self.assertFalse(_persist_subsection_grade(persisted_grade, 'version', []))
+        self.assertEqual(PersistentSubsectionGrade.objects.get(pk=persisted_grade.pk).grading_version, '')
+
     ################################# Helpers #################################
     def _gradesets_and_errors_for(self, course_id, students):
         """Simple helper method to iterate through student grades and give us
@@ -435,3 +435,19 @@ class GroupAccessTestCase(ModuleStoreTestCase):
         # Finally, add back in a cohort user_partition
         self.set_user_partitions(self.vertical_location, [split_test_partition, self.animal_partition])
         self.check_access(self.red_cat, self.vertical_location, False)
+
+    def test_filter_by_access(self):
+        """
+        Test that filtering blocks by access gives the same answers as has_access.
+        """
+        self.set_group_access(self.chapter_location, {self.animal_partition.id: [self.cat_group.id, self.dog_group.id]})
+        self.set_group_access(self.component_location, {self.color_partition.id: [self.red_group.id]})
+        locations = [self.chapter_location, self.section_location, self.vertical_location, self.component_location]
+        blocks = [modulestore().get_item(location) for location in locations]
+
+        for user in (self.red_cat, self.blue_dog, self.white_mouse, self.gray_worm, self.staff):
+            self.assertEqual(
+                access.filter_by_access(user, 'load', blocks, self.course.id),
+                [block for block in blocks if access.has_access(user, 'load', block, self.course.id)],
+            )
+        self.assertEqual(access.filter_by_access(self.blue_dog, 'load', blocks, self.course.id), blocks[:3])
@@ -4,12 +4,13 @@ Tests for courseware middleware
 
 from django.core.urlresolvers import reverse
 from django.test.client import RequestFactory
-from django.http import Http404
+from django.http import Http404, HttpResponse
 from mock import patch
 from nose.plugins.attrib import attr
+from xblock.exceptions import KeyValueMultiSaveError
 
 import courseware.courses as courses
-from courseware.middleware import RedirectUnenrolledMiddleware
+from courseware.middleware import RedirectUnenrolledMiddleware, UserStateWriteBufferMiddleware
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 
@@ -52,3 +53,10 @@ class CoursewareMiddlewareTestCase(ModuleStoreTestCase):
             request, Http404()
         )
         self.assertIsNone(response)
+
+    @patch('courseware.middleware.flush_buffered_user_state', side_effect=KeyValueMultiSaveError([]))
+    def test_failed_user_state_flush(self, _flush):
+        """A failure to save buffered user state fails the request"""
+        request = RequestFactory().get("dummy_url")
+        with self.assertRaises(KeyValueMultiSaveError):
+            UserStateWriteBufferMiddleware().process_response(request, HttpResponse())
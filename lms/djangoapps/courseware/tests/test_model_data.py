@@ -8,7 +8,8 @@ from functools import partial
 
 from courseware.model_data import DjangoKeyValueStore
 from courseware.model_data import InvalidScopeError, FieldDataCache
-from courseware.models import StudentModule
+from courseware.model_data import flush_buffered_user_state, user_state_rows_written
+from courseware.models import StudentModule, StudentModuleHistory
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
 from student.tests.factories import UserFactory
@@ -19,8 +20,10 @@ from courseware.tests.factories import StudentPrefsFactory, StudentInfoFactory
 from xblock.fields import Scope, BlockScope, ScopeIds
 from xblock.exceptions import KeyValueMultiSaveError
 from xblock.core import XBlock
+from django.conf import settings
 from django.test import TestCase
 from django.db import DatabaseError
+from request_cache.middleware import RequestCache
 
 
 def mock_field(scope, name):
@@ -216,7 +219,7 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
         for key in kv_dict:
             self.kvs.set(key, 'test_value')
 
-        with patch('django.db.models.Model.save', side_effect=DatabaseError):
+        with patch('courseware.user_state_client._update_student_module_states', side_effect=DatabaseError):
             with self.assertRaises(KeyValueMultiSaveError) as exception_context:
                 self.kvs.set_many(kv_dict)
         self.assertEquals(exception_context.exception.saved_field_names, [])
@@ -262,6 +265,24 @@ class TestMissingStudentModule(TestCase):
         self.assertEquals(location('usage_id').replace(run=None), student_module.module_state_key)
         self.assertEquals(course_id, student_module.course_id)
 
+    def test_set_many_in_missing_student_modules(self):
+        "Test that setting fields in several missing StudentModules inserts them together"
+        kv_dict = {
+            DjangoKeyValueStore.Key(Scope.user_state, 1, location(usage_id), 'a_field'): usage_id
+            for usage_id in ('usage_id', 'other_usage_id')
+        }
+
+        # One read of the existing rows, one insert of both new rows, a re-read of their
+        # ids, and one insert of both of their history entries
+        with self.assertNumQueries(4):
+            self.kvs.set_many(kv_dict)
+
+        self.assertEquals(2, StudentModule.objects.all().count())
+        self.assertEquals(2, StudentModuleHistory.objects.all().count())
+        for key, value in kv_dict.items():
+            student_module = StudentModule.objects.get(module_state_key=key.block_scope_id)
+            self.assertEquals({'a_field': value}, json.loads(student_module.state))
+
     def test_delete_field_from_missing_student_module(self):
         "Test that deleting a field from a missing StudentModule raises a KeyError"
         with self.assertNumQueries(0):
@@ -416,3 +437,88 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+@attr('shard_1')
+class TestCoursePrefetch(TestCase):
+    """Tests for prefetching all of a user's data for a course"""
+
+    def setUp(self):
+        super(TestCoursePrefetch, self).setUp()
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        StudentModuleFactory(
+            student=self.user,
+            module_state_key=location('other_usage_id'),
+            state=json.dumps({'a_field': 'other_value'}),
+        )
+        other_descriptor = mock_descriptor([mock_field(Scope.user_state, 'a_field')])
+        other_descriptor.scope_ids = ScopeIds('user1', 'mock_problem', location('def_id'), location('other_usage_id'))
+        self.descriptors = [mock_descriptor([mock_field(Scope.user_state, 'a_field')]), other_descriptor]
+        self.addCleanup(RequestCache().clear_request_cache)
+
+    def test_single_query_for_course(self):
+        with self.assertNumQueries(1):
+            field_data_cache = FieldDataCache(self.descriptors, course_id, self.user, prefetch_course=True)
+
+        kvs = DjangoKeyValueStore(field_data_cache)
+        with self.assertNumQueries(0):
+            self.assertEquals('a_value', kvs.get(user_state_key('a_field')))
+            self.assertEquals(
+                'other_value',
+                kvs.get(DjangoKeyValueStore.Key(Scope.user_state, 1, location('other_usage_id'), 'a_field'))
+            )
+
+    @patch('courseware.model_data.RequestCache.get_current_request', Mock(return_value=Mock()))
+    def test_reuse_within_request(self):
+        FieldDataCache(self.descriptors, course_id, self.user, prefetch_course=True)
+        with self.assertNumQueries(0):
+            field_data_cache = FieldDataCache(self.descriptors, course_id, self.user, prefetch_course=True)
+        kvs = DjangoKeyValueStore(field_data_cache)
+
+        # Writes drop the prefetched rows, so that later caches see the new state
+        kvs.set(user_state_key('a_field'), 'new_value')
+        with self.assertNumQueries(1):
+            field_data_cache = FieldDataCache(self.descriptors, course_id, self.user, prefetch_course=True)
+        self.assertEquals('new_value', DjangoKeyValueStore(field_data_cache).get(user_state_key('a_field')))
+
+
+@attr('shard_1')
+@patch.dict(settings.FEATURES, {'BUFFER_USER_STATE_WRITES': True})
+@patch('courseware.model_data.RequestCache.get_current_request', Mock(return_value=Mock()))
+class TestBufferedUserStateWrites(TestCase):
+    """Tests for buffering user_state writes until the end of a request"""
+
+    def setUp(self):
+        super(TestBufferedUserStateWrites, self).setUp()
+        student_module = StudentModuleFactory(state=json.dumps({'a_field': 'a_value', 'b_field': 'b_value'}))
+        self.user = student_module.student
+        self.descriptors = [mock_descriptor([mock_field(Scope.user_state, 'a_field')])]
+        self.addCleanup(RequestCache().clear_request_cache)
+
+    def test_writes_are_coalesced(self):
+        kvs = DjangoKeyValueStore(FieldDataCache(self.descriptors, course_id, self.user))
+        with self.assertNumQueries(0):
+            kvs.set(user_state_key('a_field'), 'first_value')
+            kvs.set(user_state_key('a_field'), 'second_value')
+            kvs.set_many({user_state_key('b_field'): 'new_b_value'})
+            self.assertEquals('second_value', kvs.get(user_state_key('a_field')))
+
+        # All three writes are saved with a single read, update and history entry
+        with self.assertNumQueries(3):
+            self.assertEquals(1, flush_buffered_user_state())
+        self.assertEquals(1, user_state_rows_written())
+
+        student_module = StudentModule.objects.get(student=self.user, module_state_key=location('usage_id'))
+        self.assertEquals(
+            {'a_field': 'second_value', 'b_field': 'new_b_value'},
+            json.loads(student_module.state)
+        )
+        self.assertEquals(0, flush_buffered_user_state())
+
+    def test_buffered_writes_visible_to_later_reads(self):
+        kvs = DjangoKeyValueStore(FieldDataCache(self.descriptors, course_id, self.user))
+        kvs.set(user_state_key('a_field'), 'new_value')
+
+        field_data_cache = FieldDataCache(self.descriptors, course_id, self.user)
+        self.assertEquals('new_value', DjangoKeyValueStore(field_data_cache).get(user_state_key('a_field')))
@@ -19,6 +19,7 @@ from mock import MagicMock, patch, Mock
 from opaque_keys.edx.keys import UsageKey, CourseKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from pyquery import PyQuery
+from request_cache.middleware import RequestCache
 from courseware.module_render import hash_resource
 from xblock.field_data import FieldData
 from xblock.runtime import Runtime
@@ -644,6 +645,18 @@ class TestTOC(ModuleStoreTestCase):
             for toc_section in expected:
                 self.assertIn(toc_section, actual)
 
+    def test_toc_roles_looked_up_once(self):
+        with self.store.default_store(ModuleStoreEnum.Type.mongo):
+            self.setup_modulestore(ModuleStoreEnum.Type.mongo, 3, 0)
+            request_cache = RequestCache()
+            request_cache.process_request(Mock())
+            self.addCleanup(request_cache.clear_request_cache)
+
+            # Every chapter and section is bound to the user with the same access checker
+            with patch('courseware.access.CourseBetaTesterRole.has_user', autospec=True, return_value=False) as mock:
+                render.toc_for_course(self.request, self.toy_course, self.chapter, None, self.field_data_cache)
+            self.assertEqual(mock.call_count, 1)
+
 
 @attr('shard_1')
 @ddt.ddt
@@ -970,6 +983,7 @@ class XmlViewInStudioTest(ViewInStudioTest):
 @attr('shard_1')
 @patch.dict('django.conf.settings.FEATURES', {'DISPLAY_DEBUG_INFO_TO_STAFF': True, 'DISPLAY_HISTOGRAMS_TO_STAFF': True})
 @patch('courseware.module_render.has_access', Mock(return_value=True))
+@patch('courseware.module_render.get_block_access_checker', Mock(return_value=Mock(has_access=Mock(return_value=True))))
 class TestStaffDebugInfo(ModuleStoreTestCase):
     """Tests to verify that Staff Debug Info panel and histograms are displayed to staff."""
 
@@ -1100,6 +1114,10 @@ class TestAnonymousStudentId(ModuleStoreTestCase, LoginEnrollmentTestCase):
         self.user = UserFactory()
 
     @patch('courseware.module_render.has_access', Mock(return_value=True))
+    @patch('courseware.module_render.get_block_access_checker', Mock(return_value=Mock(
+        has_access=Mock(return_value=True),
+        is_beta_tester=Mock(return_value=False),
+    )))
     def _get_anonymous_id(self, course_id, xblock_class):
         location = course_id.make_usage_key('dummy_category', 'dummy_name')
         descriptor = Mock(
@@ -1513,6 +1531,11 @@ class TestFilteredChildren(ModuleStoreTestCase):
         patcher.start()
         self.addCleanup(patcher.stop)
 
+        self._old_get_block_access_checker = render.get_block_access_checker
+        patcher = patch('courseware.module_render.get_block_access_checker', self._get_block_access_checker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     @ddt.data(*BLOCK_TYPES)
     @XBlock.register_temp_plugin(PureXBlockWithChildren, identifier='xblock')
     @XBlock.register_temp_plugin(EmptyXModuleDescriptorWithChildren, identifier='xmodule')
@@ -1626,6 +1649,17 @@ class TestFilteredChildren(ModuleStoreTestCase):
             return True
         return key in self.children_for_user[user]
 
+    def _get_block_access_checker(self, user, course_key):
+        """
+        Mock implementation of `get_block_access_checker`, whose checker uses
+        `_has_access` to check which blocks the user can load.
+        """
+        checker = self._old_get_block_access_checker(user, course_key)
+        return Mock(
+            has_access=lambda action, block: self._has_access(user, action, block, course_key),
+            is_beta_tester=checker.is_beta_tester,
+        )
+
     def assertBoundChildren(self, block, user):
         """
         Ensure the bound children are indeed children.
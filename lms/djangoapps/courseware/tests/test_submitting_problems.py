@@ -2,14 +2,17 @@
 """
 Integration tests for submitting problem responses and getting grades.
 """
+from collections import defaultdict
 import json
 import os
 from textwrap import dedent
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test.client import RequestFactory
+from django.test.utils import override_settings
 from mock import patch
 from nose.plugins.attrib import attr
 
@@ -975,6 +978,35 @@ class TestAnswerDistributions(TestSubmittingProblems):
             }
         )
 
+    @override_settings(ANSWER_DISTRIBUTION_CACHE_TIMEOUT=60)
+    def test_cached_distributions(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        distributions = grades.answer_distributions(self.course.id)
+        self.addCleanup(cache.clear)
+
+        # Later calls are answered from the cache, without looking up any problems,
+        # until it expires
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+        with patch('courseware.grades.modulestore') as mock_modulestore:
+            cached_distributions = grades.answer_distributions(self.course.id)
+            self.assertFalse(mock_modulestore.called)
+        self.assertEqual(cached_distributions, distributions)
+        # The same type as an uncached result
+        self.assertIsInstance(cached_distributions, defaultdict)
+
+        cache.clear()
+        self.assertEqual(
+            grades.answer_distributions(self.course.id),
+            {
+                ('p1', 'p1', '{}_2_1'.format(self.p1_html_id)): {
+                    'Correct': 1
+                },
+                ('p2', 'p2', '{}_2_1'.format(self.p2_html_id)): {
+                    'Incorrect': 1
+                }
+            }
+        )
+
     def test_other_data_types(self):
         # We'll submit one problem, and then muck with the student_answers
         # dict inside its state to try different data types (str, int, float,
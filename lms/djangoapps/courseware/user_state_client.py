@@ -11,14 +11,75 @@ try:
 except ImportError:
     import json
 
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
 from xblock.fields import Scope, ScopeBase
 from xblock_user_state.interface import XBlockUserStateClient
-from courseware.models import StudentModule
+from courseware.models import StudentModule, StudentModuleHistory, chunks
 from contracts import contract, new_contract
 from opaque_keys.edx.keys import UsageKey
 
 new_contract('UsageKey', UsageKey)
 
+# The number of rows written by each batched UPDATE, which keeps its parameter
+# count under sqlite's limit of 999
+UPDATE_CHUNK_SIZE = 300
+
+
+def _update_student_module_states(student_modules):
+    """
+    Save the `state` of each of student_modules, which must already exist, with one
+    UPDATE statement per chunk of UPDATE_CHUNK_SIZE rows, and set their `modified` date.
+
+    Like `QuerySet.update`, this doesn't send post_save.
+    """
+    now = timezone.now()
+    quote_name = connection.ops.quote_name
+    modified_field = StudentModule._meta.get_field('modified')  # pylint: disable=protected-access
+    sql = "UPDATE {table} SET {state} = CASE {id} {whens} END, {modified} = %s WHERE {id} IN ({ids})"
+
+    cursor = connection.cursor()
+    for chunk in chunks(student_modules, UPDATE_CHUNK_SIZE):
+        params = []
+        for student_module in chunk:
+            params.extend([student_module.id, student_module.state])
+        params.append(modified_field.get_db_prep_value(now, connection))
+        params.extend(student_module.id for student_module in chunk)
+        cursor.execute(
+            sql.format(
+                table=quote_name(StudentModule._meta.db_table),  # pylint: disable=protected-access
+                state=quote_name('state'),
+                id=quote_name('id'),
+                modified=quote_name('modified'),
+                whens=" ".join(["WHEN %s THEN %s"] * len(chunk)),
+                ids=", ".join(["%s"] * len(chunk)),
+            ),
+            params
+        )
+    transaction.commit_unless_managed()
+
+    for student_module in student_modules:
+        student_module.modified = now
+
+
+def _record_student_module_history(student_modules):
+    """
+    Write the StudentModuleHistory entries that saving student_modules one at a time
+    would have written through post_save, with a single INSERT.
+    """
+    StudentModuleHistory.objects.bulk_create([
+        StudentModuleHistory(
+            student_module=student_module,
+            version=None,
+            created=student_module.modified,
+            state=student_module.state,
+            grade=student_module.grade,
+            max_grade=student_module.max_grade,
+        )
+        for student_module in student_modules
+        if student_module.module_type in StudentModuleHistory.HISTORY_SAVING_TYPES
+    ])
+
 
 class DjangoXBlockUserStateClient(XBlockUserStateClient):
     """
@@ -211,30 +272,94 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
-        # We do a find_or_create for every block (rather than re-using field objects
+        # We re-read every block (rather than re-using field objects
         # that were queried in get_many) so that if the score has
         # been changed by some other piece of the code, we don't overwrite
-        # that score.
-        for usage_key, state in block_keys_to_state.items():
-            student_module, created = StudentModule.objects.get_or_create(
+        # that score. All of the existing rows are read with a single query.
+        existing_modules = {
+            usage_key: student_module
+            for student_module, usage_key in self._get_student_modules(username, block_keys_to_state.keys())
+        }
+        new_states = {
+            usage_key: state
+            for usage_key, state in block_keys_to_state.items()
+            if usage_key not in existing_modules
+        }
+        if new_states:
+            # Rows that another request created since we read are updated instead
+            existing_modules.update(self._create_student_modules(username, new_states))
+
+        updated_modules = []
+        for usage_key, student_module in existing_modules.items():
+            if student_module.state is None:
+                current_state = {}
+            else:
+                current_state = json.loads(student_module.state)
+            current_state.update(block_keys_to_state[usage_key])
+            student_module.state = json.dumps(current_state)
+            updated_modules.append(student_module)
+
+        if updated_modules:
+            _update_student_module_states(updated_modules)
+            _record_student_module_history(updated_modules)
+
+    def _create_student_modules(self, username, block_keys_to_state):
+        """
+        Insert a StudentModule row for each block in block_keys_to_state.
+
+        A single new row is created with `save`. Several new rows are inserted with one
+        `bulk_create`, which doesn't send post_save, so their history is written here.
+
+        Returns: a dict mapping UsageKeys to the StudentModules of the blocks whose rows
+            were created by another request since they were read, and still have to
+            be updated with their new state.
+        """
+        new_modules = [
+            StudentModule(
                 student=self.user,
                 course_id=usage_key.course_key,
                 module_state_key=usage_key,
-                defaults={
-                    'state': json.dumps(state),
-                    'module_type': usage_key.block_type,
-                },
+                state=json.dumps(state),
+                module_type=usage_key.block_type,
             )
-
-            if not created:
-                if student_module.state is None:
-                    current_state = {}
-                else:
-                    current_state = json.loads(student_module.state)
-                current_state.update(state)
-                student_module.state = json.dumps(current_state)
-                # We just read this object, so we know that we can do an update
-                student_module.save(force_update=True)
+            for usage_key, state in block_keys_to_state.items()
+        ]
+        savepoint = transaction.savepoint()
+        try:
+            if len(new_modules) == 1:
+                new_modules[0].save(force_insert=True)
+            else:
+                StudentModule.objects.bulk_create(new_modules)
+            transaction.savepoint_commit(savepoint)
+        except IntegrityError:
+            # Another request created some of these rows since we read; update theirs instead
+            transaction.savepoint_rollback(savepoint)
+            existing_modules = {
+                usage_key: student_module
+                for student_module, usage_key in self._get_student_modules(username, block_keys_to_state.keys())
+            }
+            missing_states = {
+                usage_key: state
+                for usage_key, state in block_keys_to_state.items()
+                if usage_key not in existing_modules
+            }
+            if missing_states:
+                existing_modules.update(self._create_student_modules(username, missing_states))
+            return existing_modules
+
+        if len(new_modules) > 1:
+            # bulk_create doesn't set the ids of the rows it inserts, so re-read the rows
+            # that need a history entry
+            history_keys = [
+                new_module.module_state_key
+                for new_module in new_modules
+                if new_module.module_type in StudentModuleHistory.HISTORY_SAVING_TYPES
+            ]
+            if history_keys:
+                _record_student_module_history(
+                    student_module for student_module, _ in self._get_student_modules(username, history_keys)
+                )
+        return {}
 
     @contract(
         username="basestring",
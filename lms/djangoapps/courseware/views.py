@@ -34,6 +34,7 @@ from courseware.access import has_access, in_preview_mode, _adjust_start_date_fo
 from courseware.courses import (
     get_courses, get_course,
     get_studio_url, get_course_with_access,
+    get_course_overview_with_access,
     sort_by_announcement,
     sort_by_start_date,
 )
@@ -810,7 +811,7 @@ def course_about(request, course_id):
             'COURSE_ABOUT_VISIBILITY_PERMISSION',
             settings.COURSE_ABOUT_VISIBILITY_PERMISSION
         )
-        course = get_course_with_access(request.user, permission_name, course_key)
+        course = get_course_overview_with_access(request.user, permission_name, course_key)
 
         if microsite.get_value('ENABLE_MKTG_SITE', settings.FEATURES.get('ENABLE_MKTG_SITE', False)):
             return redirect(reverse('info', args=[course.id.to_deprecated_string()]))
@@ -0,0 +1,82 @@
+"""
+Tests of the connection pooling and concurrent requests in lms.lib.comment_client.utils.
+"""
+import threading
+
+import mock
+from nose.plugins.attrib import attr
+from django.test import TestCase
+from django.utils import translation
+
+from lms.lib.comment_client import utils as cc_utils
+
+
+@attr('shard_1')
+class SessionTestCase(TestCase):
+    def test_connection_pool_is_reused(self):
+        session = cc_utils.get_session()
+        other_session = cc_utils.get_session()
+        self.assertIsNot(other_session, session)
+        self.assertIs(other_session.get_adapter('http://localhost'), session.get_adapter('http://localhost'))
+
+    def test_cookies_are_refused(self):
+        session = cc_utils.get_session()
+        self.assertEqual(session.cookies.get_policy().allowed_domains(), ())
+
+    @mock.patch('lms.lib.comment_client.utils.requests.Session.request')
+    def test_requests_use_session(self, mock_request):
+        mock_request.return_value = mock.Mock(status_code=200, json=lambda: {'ok': True})
+        self.assertEqual(cc_utils.perform_request('get', 'http://localhost:4567/api/v1/test'), {'ok': True})
+        self.assertEqual(mock_request.call_count, 1)
+
+    def test_new_connection_pool_after_fork(self):
+        adapter = cc_utils.get_session().get_adapter('http://localhost')
+        with mock.patch('lms.lib.comment_client.utils.os.getpid', return_value=-1):
+            self.assertIsNot(cc_utils.get_session().get_adapter('http://localhost'), adapter)
+
+
+@attr('shard_1')
+class PerformConcurrentlyTestCase(TestCase):
+    def test_results_in_order(self):
+        self.assertEqual(cc_utils.perform_concurrently(lambda: 1, lambda: 2, lambda: 3), [1, 2, 3])
+        self.assertEqual(cc_utils.perform_concurrently(lambda: 1), [1])
+        self.assertEqual(cc_utils.perform_concurrently(), [])
+
+    def test_concurrent(self):
+        # Each function waits for the other, so this only finishes if they run at the same time
+        barrier = [threading.Event(), threading.Event()]
+
+        def wait_for(mine, other):
+            """Tell the other function we're running, and wait for it to do the same."""
+            barrier[mine].set()
+            return barrier[other].wait(5)
+
+        self.assertEqual(
+            cc_utils.perform_concurrently(lambda: wait_for(0, 1), lambda: wait_for(1, 0)),
+            [True, True]
+        )
+
+    def test_first_exception_raised(self):
+        def fail(message):
+            """Raise a CommentClientError."""
+            raise cc_utils.CommentClientError(message)
+
+        with self.assertRaises(cc_utils.CommentClientError) as context:
+            cc_utils.perform_concurrently(lambda: 1, lambda: fail('first'), lambda: fail('second'))
+        self.assertEqual(context.exception.message, 'first')
+
+    def test_language(self):
+        with translation.override('eo'):
+            self.assertEqual(
+                cc_utils.perform_concurrently(translation.get_language, translation.get_language),
+                ['eo', 'eo']
+            )
+
+    def test_nested(self):
+        self.assertEqual(
+            cc_utils.perform_concurrently(
+                lambda: cc_utils.perform_concurrently(lambda: 1, lambda: 2),
+                lambda: 3,
+            ),
+            [[1, 2], 3]
+        )
@@ -4,6 +4,7 @@ Student and course analytics.
 Serve miscellaneous course and student data
 """
 import json
+from itertools import count
 from shoppingcart.models import (
     PaidCourseRegistration, CouponRedemption, CourseRegCodeItem,
     RegistrationCodeRedemption, CourseRegistrationCodeInvoiceItem
@@ -24,6 +25,9 @@ PROFILE_FEATURES = ('name', 'language', 'location', 'year_of_birth', 'gender',
 ORDER_ITEM_FEATURES = ('list_price', 'unit_cost', 'status')
 ORDER_FEATURES = ('purchase_time',)
 
+# Number of students loaded from the database at a time when they are iterated over
+STUDENTS_BATCH_SIZE = 1000
+
 SALE_FEATURES = ('total_amount', 'company_name', 'company_contact_name', 'company_contact_email', 'recipient_name',
                  'recipient_email', 'customer_reference_number', 'internal_reference')
 
@@ -160,6 +164,14 @@ def enrolled_students_features(course_key, features):
         {'username': 'username3', 'first_name': 'firstname3'}
     ]
     """
+    return list(iter_enrolled_students_features(course_key, features))
+
+
+def iter_enrolled_students_features(course_key, features, batch_size=STUDENTS_BATCH_SIZE):
+    """
+    Like `enrolled_students_features`, but yield the dictionaries one at a time,
+    loading students from the database `batch_size` at a time.
+    """
     include_cohort_column = 'cohort' in features
 
     students = User.objects.filter(
@@ -207,7 +219,12 @@ def enrolled_students_features(course_key, features):
             )
         return student_dict
 
-    return [extract_student(student, features) for student in students]
+    for offset in count(0, batch_size):
+        batch = list(students[offset:offset + batch_size])
+        for student in batch:
+            yield extract_student(student, features)
+        if len(batch) < batch_size:
+            break
 
 
 def list_may_enroll(course_key, features):
@@ -224,6 +241,14 @@ def list_may_enroll(course_key, features):
     Note that result does not include students who may enroll and have
     already done so.
     """
+    return list(iter_may_enroll(course_key, features))
+
+
+def iter_may_enroll(course_key, features):
+    """
+    Like `list_may_enroll`, but yield the dictionaries one at a time, without
+    caching the queried students.
+    """
     may_enroll_and_unenrolled = CourseEnrollmentAllowed.may_enroll_and_unenrolled(course_key)
 
     def extract_student(student, features):
@@ -232,7 +257,8 @@ def list_may_enroll(course_key, features):
         """
         return dict((feature, getattr(student, feature)) for feature in features)
 
-    return [extract_student(student, features) for student in may_enroll_and_unenrolled]
+    for student in may_enroll_and_unenrolled.iterator():
+        yield extract_student(student, features)
 
 
 def coupon_codes_features(features, coupons_list):
@@ -77,6 +77,18 @@ def format_dictlist(dictlist, features):
     return header, datarows
 
 
+def iter_format_dictlist(dicts, features):
+    """
+    Like `format_dictlist`, but `dicts` may be any iterable of dictionaries (e.g.
+    a generator), and the data rows are returned as a generator, so that they
+    can be written out without all being held in memory.
+    """
+    header = features
+    datarows = ([dct[feature] for feature in features if feature in dct] for dct in dicts)
+
+    return header, datarows
+
+
 def format_instances(instances, features):
     """
     Convert a list of instances into a header list and datarows list.
@@ -19,6 +19,7 @@ import csv
 import json
 import hashlib
 import os.path
+import tempfile
 import urllib
 
 from boto.s3.connection import S3Connection
@@ -193,10 +194,13 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. `store_rows()` accepts any iterable of rows and writes them out
+    as they are produced, so report generators don't have to hold the whole
+    dataset in memory.
     """
+    # Suffix of the files holding the chunks of a report that hasn't been merged yet
+    PARTIAL_SUFFIX = '.part'
+
     @classmethod
     def from_config(cls, config_name):
         """
@@ -218,6 +222,23 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_utf8_decoded_rows(self, csv_file):
+        """
+        Given a file-like object containing utf-8 encoded CSV data, yield each
+        of its rows as a list of unicode strings.
+        """
+        for row in csv.reader(csv_file):
+            yield [item.decode('utf-8') for item in row]
+
+    @classmethod
+    def partial_filename(cls, filename, part):
+        """
+        Return the name under which part number `part` of the report `filename`
+        is stored while the report is being generated in chunks. Partial files
+        aren't listed by `links_for()`.
+        """
+        return u"{}.{:06d}{}".format(filename, part, cls.PARTIAL_SUFFIX)
+
 
 class S3ReportStore(ReportStore):
     """
@@ -231,6 +252,9 @@ class S3ReportStore(ReportStore):
     conventions on where files are stored to know what to display. Clients using
     this class can name the final file whatever they want.
     """
+    # S3 requires every part of a multipart upload but the last to be at least 5MB
+    MULTIPART_CHUNK_SIZE = 5 * 1024 * 1024
+
     def __init__(self, bucket_name, root_path):
         self.root_path = root_path
 
@@ -308,8 +332,11 @@ class S3ReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        strings), write a gzip'd csv file to S3.
+
+        `rows` may be any iterable, e.g. a generator. The gzip'd data is uploaded
+        in parts of `MULTIPART_CHUNK_SIZE` bytes as the rows are written, so only
+        one part is ever held in memory. Smaller files are uploaded with `store()`.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
@@ -317,10 +344,70 @@ class S3ReportStore(ReportStore):
         output_buffer = StringIO()
         gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
         csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
+        multipart_upload = None
+        part_number = 0
+
+        try:
+            for row in self._get_utf8_encoded_rows(rows):
+                csvwriter.writerow(row)
+                if output_buffer.tell() >= self.MULTIPART_CHUNK_SIZE:
+                    if multipart_upload is None:
+                        multipart_upload = self.bucket.initiate_multipart_upload(
+                            self.key_for(course_id, filename).key,
+                            headers={"Content-Encoding": "gzip", "Content-Type": "text/csv"},
+                        )
+                    part_number += 1
+                    self._upload_part(multipart_upload, part_number, output_buffer)
+            gzip_file.close()
+
+            if multipart_upload is None:
+                self.store(course_id, filename, output_buffer)
+            else:
+                part_number += 1
+                self._upload_part(multipart_upload, part_number, output_buffer)
+                multipart_upload.complete_upload()
+        except Exception:
+            if multipart_upload is not None:
+                multipart_upload.cancel_upload()
+            raise
+
+    def _upload_part(self, multipart_upload, part_number, part_buffer):
+        """
+        Upload the contents of `part_buffer` as part number `part_number` of
+        `multipart_upload`, then empty the buffer.
+        """
+        part_buffer.seek(0)
+        multipart_upload.upload_part_from_file(part_buffer, part_number)
+        part_buffer.seek(0)
+        part_buffer.truncate()
+
+    def read_rows(self, course_id, filename):
+        """
+        Yield the rows of the CSV file `filename` stored by `store_rows()`, as
+        lists of unicode strings.
+        """
+        with tempfile.TemporaryFile() as compressed_file:
+            self.key_for(course_id, filename).get_contents_to_file(compressed_file)
+            compressed_file.seek(0)
+            for row in self._get_utf8_decoded_rows(GzipFile(fileobj=compressed_file, mode="rb")):
+                yield row
 
-        self.store(course_id, filename, output_buffer)
+    def delete(self, course_id, filename):
+        """
+        Delete the stored file `filename`.
+        """
+        self.bucket.delete_key(self.key_for(course_id, filename).key)
+
+    def partial_filenames(self, course_id, filename):
+        """
+        Return the names of the stored parts of the report `filename`, in order.
+        """
+        prefix = self.key_for(course_id, filename).key
+        return sorted(
+            key.key.split("/")[-1]
+            for key in self.bucket.list(prefix=prefix)
+            if key.key.endswith(self.PARTIAL_SUFFIX)
+        )
 
     def links_for(self, course_id):
         """
@@ -331,6 +418,7 @@ class S3ReportStore(ReportStore):
         return [
             (key.key.split("/")[-1], key.generate_url(expires_in=300))
             for key in sorted(self.bucket.list(prefix=course_dir.key), reverse=True, key=lambda k: k.last_modified)
+            if not key.key.endswith(self.PARTIAL_SUFFIX)
         ]
 
 
@@ -379,9 +467,7 @@ class LocalFSReportStore(ReportStore):
         to string using `.getvalue()`).
         """
         full_path = self.path_to(course_id, filename)
-        directory = os.path.dirname(full_path)
-        if not os.path.exists(directory):
-            os.mkdir(directory)
+        self._make_course_dir(course_id)
 
         with open(full_path, "wb") as f:
             f.write(buff.getvalue())
@@ -390,12 +476,58 @@ class LocalFSReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
         write this data out.
+
+        `rows` may be any iterable, e.g. a generator; rows are written to disk as
+        they are produced. The file is only given its name once it is complete.
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        full_path = self.path_to(course_id, filename)
+        self._make_course_dir(course_id)
 
-        self.store(course_id, filename, output_buffer)
+        # Partial files aren't listed by links_for()
+        csv_file = tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(full_path), suffix=self.PARTIAL_SUFFIX, delete=False
+        )
+        try:
+            with csv_file:
+                csvwriter = csv.writer(csv_file)
+                csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            os.rename(csv_file.name, full_path)
+        except Exception:
+            os.remove(csv_file.name)
+            raise
+
+    def _make_course_dir(self, course_id):
+        """Create the directory holding the files of `course_id`, if it doesn't exist."""
+        directory = os.path.dirname(self.path_to(course_id, ''))
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+
+    def read_rows(self, course_id, filename):
+        """
+        Yield the rows of the CSV file `filename` stored by `store_rows()`, as
+        lists of unicode strings.
+        """
+        with open(self.path_to(course_id, filename), "rb") as csv_file:
+            for row in self._get_utf8_decoded_rows(csv_file):
+                yield row
+
+    def delete(self, course_id, filename):
+        """
+        Delete the stored file `filename`.
+        """
+        os.remove(self.path_to(course_id, filename))
+
+    def partial_filenames(self, course_id, filename):
+        """
+        Return the names of the stored parts of the report `filename`, in order.
+        """
+        course_dir = self.path_to(course_id, '')
+        if not os.path.exists(course_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(course_dir)
+            if name.startswith(filename) and name.endswith(self.PARTIAL_SUFFIX)
+        )
 
     def links_for(self, course_id):
         """
@@ -408,7 +540,11 @@ class LocalFSReportStore(ReportStore):
         course_dir = self.path_to(course_id, '')
         if not os.path.exists(course_dir):
             return []
-        files = [(filename, os.path.join(course_dir, filename)) for filename in os.listdir(course_dir)]
+        files = [
+            (filename, os.path.join(course_dir, filename))
+            for filename in os.listdir(course_dir)
+            if not filename.endswith(self.PARTIAL_SUFFIX)
+        ]
         files.sort(key=lambda (filename, full_path): os.path.getmtime(full_path), reverse=True)
 
         return [
@@ -26,6 +26,7 @@ from django.conf import settings
 from django.utils.translation import ugettext_noop
 
 from celery import task
+from celery.states import FAILURE
 from bulk_email.tasks import perform_delegate_email_batches
 from instructor_task.tasks_helper import (
     run_main_task,
@@ -40,7 +41,10 @@ from instructor_task.tasks_helper import (
     cohort_students_and_upload,
     upload_enrollment_report,
     upload_may_enroll_csv,
+    upload_report_chunk,
+    merge_report_chunks,
 )
+from instructor_task.subtasks import SubtaskStatus, check_subtask_is_valid, update_subtask_status
 
 
 TASK_LOG = logging.getLogger('edx.celery.task')
@@ -154,7 +158,7 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(upload_grades_csv, xmodule_instance_args, chunk_task=calculate_report_chunk)
     return run_main_task(entry_id, task_fn, action_name)
 
 
@@ -171,10 +175,48 @@ def calculate_problem_grade_report(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_problem_grade_report, xmodule_instance_args)
+    task_fn = partial(upload_problem_grade_report, xmodule_instance_args, chunk_task=calculate_report_chunk)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_report_chunk(entry_id, csv_name, part, student_ids, timestamp_str, action_name, subtask_status_dict):
+    """
+    Generate the rows of a grade report for a range of students, as a subtask of
+    `calculate_grades_csv` or `calculate_problem_grade_report`. The last chunk to
+    finish merges all of them into the final report.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    TASK_LOG.info(
+        u"Preparing to generate part %s of %s for %d students as subtask %s for instructor task %d",
+        part, csv_name, len(student_ids), current_task_id, entry_id
+    )
+
+    # Check that the requested subtask is actually known to the current InstructorTask
+    # entry and hasn't already run. If this fails, it throws an exception, which should
+    # fail this subtask immediately.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        new_subtask_status = upload_report_chunk(
+            entry_id, csv_name, part, student_ids, timestamp_str, action_name, subtask_status
+        )
+    except Exception:
+        # Count every student in the chunk as failed, so that the other chunks
+        # still get merged once they are done.
+        TASK_LOG.exception(u"Report chunk subtask %s for instructor task %d: failed unexpectedly!", current_task_id, entry_id)
+        subtask_status.increment(failed=len(student_ids), state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status, finish_task=False)
+        merge_report_chunks(entry_id, csv_name, timestamp_str)
+        raise
+
+    # The InstructorTask is only marked as succeeded once the chunks are merged.
+    update_subtask_status(entry_id, current_task_id, new_subtask_status, finish_task=False)
+    merge_report_chunks(entry_id, csv_name, timestamp_str)
+    return new_subtask_status.to_dict()
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
@@ -7,14 +7,16 @@ import json
 from collections import OrderedDict
 from datetime import datetime
 from eventtracking import tracker
-from itertools import chain
+from itertools import chain, count, islice
 from time import time
 import unicodecsv
 import logging
 
 from celery import Task, current_task
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 import dogstats_wrapper as dog_stats_api
@@ -32,9 +34,10 @@ from courseware.grades import iterate_grades_for
 from courseware.models import StudentModule
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
-from instructor_analytics.basic import enrolled_students_features, list_may_enroll
-from instructor_analytics.csvs import format_dictlist
+from instructor_analytics.basic import iter_enrolled_students_features, iter_may_enroll
+from instructor_analytics.csvs import iter_format_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import queue_subtasks_for_query
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
@@ -59,6 +62,12 @@ UPDATE_STATUS_SKIPPED = 'skipped'
 # The setting name used for events when "settings" (account settings, preferences, profile information) change.
 REPORT_REQUESTED_EVENT_NAME = u'edx.instructor.report.requested'
 
+# Format of the timestamp in report filenames
+REPORT_TIMESTAMP_FORMAT = "%Y-%m-%d-%H%M"
+
+# Merging the chunks of a report should be done well within this time
+REPORT_MERGE_LOCK_EXPIRE = 60 * 60  # Lock expires in 1 hour
+
 
 class BaseInstructorTask(Task):
     """
@@ -544,23 +553,32 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            Any iterable of rows, such as a generator, can be given; rows
+            are written out as they are produced.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
     report_store = ReportStore.from_config(config_name)
     report_store.store_rows(
         course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
+        _report_filename(csv_name, course_id, timestamp.strftime(REPORT_TIMESTAMP_FORMAT)),
         rows
     )
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+def _report_filename(csv_name, course_id, timestamp_str):
+    """
+    Return the name of the `csv_name` report for `course_id` generated at `timestamp_str`.
+    """
+    return u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp_str
+    )
+
+
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name, chunk_task=None):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -569,15 +587,25 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
+    If `chunk_task` is given and more than `settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK`
+    students are enrolled, the students are instead split between subtasks running
+    `chunk_task` (see `queue_report_chunks`).
+
     As we start to add more CSV downloads, it will probably be worthwhile to
     make a more general CSVDoc class instead of building out the rows like we
     do here.
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    total_enrolled_students = enrolled_students.count()
+
+    if _should_generate_report_in_chunks(chunk_task, total_enrolled_students):
+        return queue_report_chunks(
+            chunk_task, _entry_id, course_id, action_name, 'grade_report', enrolled_students, start_date
+        )
+
+    task_progress = TaskProgress(action_name, total_enrolled_students, start_time)
 
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
@@ -588,6 +616,38 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
+    rows, err_rows = _grade_report_rows(course_id, enrolled_students, task_progress, task_info_string)
+
+    # Perform the actual upload. Students are graded as their rows are written
+    # out, so we never hold more than one of them in memory.
+    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+
+    # By this point, the only rows left to upload are the error rows.
+    current_step = {'step': 'Uploading CSVs'}
+    task_progress.update_task_state(extra_meta=current_step)
+    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+
+    # If there are any error rows (don't count the header), write them out as well
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+
+    # One last update before we close out...
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def _grade_report_rows(course_id, students, task_progress, task_info_string):  # pylint: disable=too-many-statements
+    """
+    Return a tuple of a generator of the grade report rows for `students` in the
+    course `course_id`, and the list of error report rows.
+
+    Students are graded as the generator is consumed, so the error rows are only
+    complete once it is exhausted. Both start with a header row, but the generator
+    yields nothing at all if no student could be graded.
+    """
+    action_name = task_progress.action_name
+    status_interval = 100
+
     course = get_course_by_id(course_id)
     course_is_cohorted = is_course_cohorted(course.id)
     cohorts_header = ['Cohort Name'] if course_is_cohorted else []
@@ -599,119 +659,105 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
     whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
 
-    # Loop over all our students and build our CSV lists in memory
-    header = None
-    rows = []
     err_rows = [["id", "username", "error_msg"]]
     current_step = {'step': 'Calculating Grades'}
+    total_students = task_progress.total
 
-    total_enrolled_students = enrolled_students.count()
-    student_counter = 0
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
-        task_info_string,
-        action_name,
-        current_step,
-        total_enrolled_students
-    )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
-
-        # Now add a log entry after each student is graded to get a sense
-        # of the task's progress
-        student_counter += 1
+    def rows():
+        """Grade the students one at a time, yielding their rows."""
+        header = None
+        student_counter = 0
         TASK_LOG.info(
-            u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+            u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
             task_info_string,
             action_name,
             current_step,
-            student_counter,
-            total_enrolled_students
+            total_students
         )
+        for student, gradeset, err_msg in iterate_grades_for(course_id, students):
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
 
-        if gradeset:
-            # We were able to successfully grade this student for this course.
-            task_progress.succeeded += 1
-            if not header:
-                header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
-                    ["id", "email", "username", "grade"] + header + cohorts_header +
-                    group_configs_header + ['Enrollment Track', 'Verification Status'] + certificate_info_header
-                )
-
-            percents = {
-                section['label']: section.get('percent', 0.0)
-                for section in gradeset[u'section_breakdown']
-                if 'label' in section
-            }
-
-            cohorts_group_name = []
-            if course_is_cohorted:
-                group = get_cohort(student, course_id, assign=False)
-                cohorts_group_name.append(group.name if group else '')
-
-            group_configs_group_names = []
-            for partition in experiment_partitions:
-                group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
-                group_configs_group_names.append(group.name if group else '')
-
-            enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
-            verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
-                student,
-                course_id,
-                enrollment_mode
-            )
-            certificate_info = certificate_info_for_user(
-                student,
-                course_id,
-                gradeset['grade'],
-                student.id in whitelisted_user_ids
+            # Now add a log entry after each student is graded to get a sense
+            # of the task's progress
+            student_counter += 1
+            TASK_LOG.info(
+                u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+                task_info_string,
+                action_name,
+                current_step,
+                student_counter,
+                total_students
             )
 
-            # Not everybody has the same gradable items. If the item is not
-            # found in the user's gradeset, just assume it's a 0. The aggregated
-            # grades for their sections and overall course will be calculated
-            # without regard for the item they didn't have access to, so it's
-            # possible for a student to have a 0.0 show up in their row but
-            # still have 100% for the course.
-            row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
-                [student.id, student.email, student.username, gradeset['percent']] +
-                row_percents + cohorts_group_name + group_configs_group_names +
-                [enrollment_mode] + [verification_status] + certificate_info
-            )
-        else:
-            # An empty gradeset means we failed to grade a student.
-            task_progress.failed += 1
-            err_rows.append([student.id, student.username, err_msg])
+            if gradeset:
+                # We were able to successfully grade this student for this course.
+                task_progress.succeeded += 1
+                if not header:
+                    header = [section['label'] for section in gradeset[u'section_breakdown']]
+                    yield (
+                        ["id", "email", "username", "grade"] + header + cohorts_header +
+                        group_configs_header + ['Enrollment Track', 'Verification Status'] + certificate_info_header
+                    )
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_enrolled_students
-    )
+                percents = {
+                    section['label']: section.get('percent', 0.0)
+                    for section in gradeset[u'section_breakdown']
+                    if 'label' in section
+                }
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+                cohorts_group_name = []
+                if course_is_cohorted:
+                    group = get_cohort(student, course_id, assign=False)
+                    cohorts_group_name.append(group.name if group else '')
+
+                group_configs_group_names = []
+                for partition in experiment_partitions:
+                    group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
+                    group_configs_group_names.append(group.name if group else '')
+
+                enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
+                verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
+                    student,
+                    course_id,
+                    enrollment_mode
+                )
+                certificate_info = certificate_info_for_user(
+                    student,
+                    course_id,
+                    gradeset['grade'],
+                    student.id in whitelisted_user_ids
+                )
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+                # Not everybody has the same gradable items. If the item is not
+                # found in the user's gradeset, just assume it's a 0. The aggregated
+                # grades for their sections and overall course will be calculated
+                # without regard for the item they didn't have access to, so it's
+                # possible for a student to have a 0.0 show up in their row but
+                # still have 100% for the course.
+                row_percents = [percents.get(label, 0.0) for label in header]
+                yield (
+                    [student.id, student.email, student.username, gradeset['percent']] +
+                    row_percents + cohorts_group_name + group_configs_group_names +
+                    [enrollment_mode] + [verification_status] + certificate_info
+                )
+            else:
+                # An empty gradeset means we failed to grade a student.
+                task_progress.failed += 1
+                err_rows.append([student.id, student.username, err_msg])
 
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+        TASK_LOG.info(
+            u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
+            task_info_string,
+            action_name,
+            current_step,
+            student_counter,
+            total_students
+        )
 
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
+    return rows(), err_rows
 
 
 def _order_problems(blocks):
@@ -764,72 +810,37 @@ def _order_problems(blocks):
     return problems
 
 
-def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name, chunk_task=None):
     """
     Generate a CSV containing all students' problem grades within a given
     `course_id`.
+
+    If `chunk_task` is given and more than `settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK`
+    students are enrolled, the students are instead split between subtasks running
+    `chunk_task` (see `queue_report_chunks`).
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
     task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
 
-    # This struct encapsulates both the display names of each static item in the
-    # header row as values as well as the django User field names of those items
-    # as the keys.  It is structured in this way to keep the values related.
-    header_row = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
-
     try:
-        course_structure = CourseStructure.objects.get(course_id=course_id)
-        blocks = course_structure.ordered_blocks
-        problems = _order_problems(blocks)
+        problems = _order_problems(CourseStructure.objects.get(course_id=course_id).ordered_blocks)
     except CourseStructure.DoesNotExist:
         return task_progress.update_task_state(
             extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
         )
 
-    # Just generate the static fields for now.
-    rows = [list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))]
-    error_rows = [list(header_row.values()) + ['error_msg']]
-    current_step = {'step': 'Calculating Grades'}
+    if _should_generate_report_in_chunks(chunk_task, task_progress.total):
+        return queue_report_chunks(
+            chunk_task, _entry_id, course_id, action_name, 'problem_grade_report', enrolled_students, start_date
+        )
 
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True):
-        student_fields = [getattr(student, field_name) for field_name in header_row]
-        task_progress.attempted += 1
-
-        if 'percent' not in gradeset or 'raw_scores' not in gradeset:
-            # There was an error grading this student.
-            # Generally there will be a non-empty err_msg, but that is not always the case.
-            if not err_msg:
-                err_msg = u"Unknown error"
-            error_rows.append(student_fields + [err_msg])
-            task_progress.failed += 1
-            continue
-
-        final_grade = gradeset['percent']
-        # Only consider graded problems
-        problem_scores = {unicode(score.module_id): score for score in gradeset['raw_scores'] if score.graded}
-        earned_possible_values = list()
-        for problem_id in problems:
-            try:
-                problem_score = problem_scores[problem_id]
-                earned_possible_values.append([problem_score.earned, problem_score.possible])
-            except KeyError:
-                # The student has not been graded on this problem.  For example,
-                # iterate_grades_for skips problems that students have never
-                # seen in order to speed up report generation.  It could also be
-                # the case that the student does not have access to it (e.g. A/B
-                # test or cohorted courseware).
-                earned_possible_values.append(['N/A', 'N/A'])
-        rows.append(student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values)))
-
-        task_progress.succeeded += 1
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
+    rows, error_rows = _problem_grade_report_rows(course_id, enrolled_students, task_progress, problems=problems)
 
     # Perform the upload if any students have been successfully graded
-    if len(rows) > 1:
+    has_rows, rows = _peek_rows(rows)
+    if has_rows:
         upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
     # If there are any error rows, write them out as well
     if len(error_rows) > 1:
@@ -838,6 +849,253 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
     return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
 
 
+def _problem_grade_report_rows(course_id, students, task_progress, _task_info_string=None, problems=None):
+    """
+    Return a tuple of a generator of the problem grade report rows for `students`
+    in the course `course_id`, and the list of error report rows.
+
+    Students are graded as the generator is consumed, so the error rows are only
+    complete once it is exhausted. Both start with a header row, but the generator
+    yields nothing at all if no student could be graded.
+
+    `problems` is the result of `_order_problems` for the course; it is computed
+    from the course's `CourseStructure` if not given.
+    """
+    status_interval = 100
+    if problems is None:
+        problems = _order_problems(CourseStructure.objects.get(course_id=course_id).ordered_blocks)
+
+    # This struct encapsulates both the display names of each static item in the
+    # header row as values as well as the django User field names of those items
+    # as the keys.  It is structured in this way to keep the values related.
+    header_row = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
+
+    # Just generate the static fields for now.
+    error_rows = [list(header_row.values()) + ['error_msg']]
+    current_step = {'step': 'Calculating Grades'}
+
+    def rows():
+        """Grade the students one at a time, yielding their rows."""
+        header = list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))
+        for student, gradeset, err_msg in iterate_grades_for(course_id, students, keep_raw_scores=True):
+            student_fields = [getattr(student, field_name) for field_name in header_row]
+            task_progress.attempted += 1
+
+            if 'percent' not in gradeset or 'raw_scores' not in gradeset:
+                # There was an error grading this student.
+                # Generally there will be a non-empty err_msg, but that is not always the case.
+                if not err_msg:
+                    err_msg = u"Unknown error"
+                error_rows.append(student_fields + [err_msg])
+                task_progress.failed += 1
+                continue
+
+            if header is not None:
+                yield header
+                header = None
+
+            final_grade = gradeset['percent']
+            # Only consider graded problems
+            problem_scores = {unicode(score.module_id): score for score in gradeset['raw_scores'] if score.graded}
+            earned_possible_values = list()
+            for problem_id in problems:
+                try:
+                    problem_score = problem_scores[problem_id]
+                    earned_possible_values.append([problem_score.earned, problem_score.possible])
+                except KeyError:
+                    # The student has not been graded on this problem.  For example,
+                    # iterate_grades_for skips problems that students have never
+                    # seen in order to speed up report generation.  It could also be
+                    # the case that the student does not have access to it (e.g. A/B
+                    # test or cohorted courseware).
+                    earned_possible_values.append(['N/A', 'N/A'])
+            yield student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values))
+
+            task_progress.succeeded += 1
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+
+    return rows(), error_rows
+
+
+def _peek_rows(rows):
+    """
+    Return a tuple of whether the iterable `rows` yields any row, and an iterator
+    over all of its rows.
+    """
+    rows = iter(rows)
+    first_rows = list(islice(rows, 1))
+    return bool(first_rows), chain(first_rows, rows)
+
+
+def _should_generate_report_in_chunks(chunk_task, num_students):
+    """
+    Return whether a report over `num_students` students should be split between
+    subtasks running `chunk_task`.
+    """
+    students_per_task = getattr(settings, 'GRADES_DOWNLOAD_STUDENTS_PER_TASK', None)
+    return chunk_task is not None and bool(students_per_task) and num_students > students_per_task
+
+
+def queue_report_chunks(chunk_task, entry_id, course_id, action_name, csv_name, students, start_date):
+    """
+    Split the generation of the `csv_name` report (one of `CHUNKED_REPORTS`) for
+    `students` between subtasks of the InstructorTask `entry_id`, each grading a
+    range of at most `settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK` students.
+
+    `chunk_task` is the celery task that generates a chunk. Its arguments are the
+    `entry_id`, the `csv_name`, the part number of the chunk, the ids of its
+    students, the report's timestamp, the `action_name` and the dict of the
+    subtask's initial SubtaskStatus. It is expected to call `upload_report_chunk`,
+    `update_subtask_status` and then `merge_report_chunks`.
+
+    Returns the task progress as stored in the InstructorTask.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As with bulk email, the task may be requeued after its subtasks have
+    # already been defined, in which case there's nothing left to do.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already queued the chunks of its %s", entry.task_id, csv_name)
+        return json.loads(entry.task_output)
+
+    timestamp_str = start_date.strftime(REPORT_TIMESTAMP_FORMAT)
+    part_numbers = count()
+
+    def _create_report_chunk_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to generate the report rows of the given students."""
+        return chunk_task.subtask(
+            (
+                entry_id,
+                csv_name,
+                next(part_numbers),
+                [student['pk'] for student in student_list],
+                timestamp_str,
+                action_name,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    total_students = students.count()
+    TASK_LOG.info(
+        u"Task %s: Queueing subtasks to generate %s for course %s, %s students",
+        entry.task_id, csv_name, course_id, total_students
+    )
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_report_chunk_subtask,
+        [students.order_by('id')],
+        [],
+        settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK,
+        total_students,
+    )
+
+
+def upload_report_chunk(entry_id, csv_name, part, student_ids, timestamp_str, action_name, subtask_status):
+    """
+    Generate the rows of the `csv_name` report (and of its error report) for the
+    students with ids `student_ids`, and store them in the `ReportStore` as part
+    number `part` of the report.
+
+    Returns the updated `subtask_status`.
+    """
+    start_time = time()
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    students = User.objects.filter(id__in=student_ids).order_by('id')
+    task_progress = TaskProgress(action_name, len(student_ids), start_time)
+
+    fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Part: {part}'
+    task_info_string = fmt.format(task_id=subtask_status.task_id, entry_id=entry_id, course_id=course_id, part=part)
+    TASK_LOG.info(u'%s, Task type: %s, Starting chunk of %s', task_info_string, action_name, csv_name)
+
+    compute_rows, err_csv_name = CHUNKED_REPORTS[csv_name]
+    rows, err_rows = compute_rows(course_id, students, task_progress, task_info_string)
+
+    # Every stored chunk starts with the header row, which is dropped from all but
+    # the first one when they are merged.
+    report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+    has_rows, rows = _peek_rows(rows)
+    if has_rows:
+        filename = _report_filename(csv_name, course_id, timestamp_str)
+        report_store.store_rows(course_id, ReportStore.partial_filename(filename, part), rows)
+    if len(err_rows) > 1:
+        filename = _report_filename(err_csv_name, course_id, timestamp_str)
+        report_store.store_rows(course_id, ReportStore.partial_filename(filename, part), err_rows)
+
+    subtask_status.increment(succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS)
+    TASK_LOG.info(u'%s, Task type: %s, Finished chunk: %s', task_info_string, action_name, subtask_status)
+    return subtask_status
+
+
+def merge_report_chunks(entry_id, csv_name, timestamp_str):
+    """
+    If every subtask of the InstructorTask `entry_id` has finished, merge the stored
+    chunks of the `csv_name` report and of its error report into complete reports.
+
+    Subtasks call this when they finish, and only the first one to see all of
+    them finished performs the merge. The InstructorTask is marked as succeeded
+    once the reports are stored, or as failed if they couldn't be.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    if subtask_dict['succeeded'] + subtask_dict['failed'] < subtask_dict['total']:
+        return
+
+    # cache.add fails if the key already exists
+    if not cache.add("report-merge-{}".format(entry_id), 'true', REPORT_MERGE_LOCK_EXPIRE):
+        return
+
+    _, err_csv_name = CHUNKED_REPORTS[csv_name]
+    try:
+        for name in [csv_name, err_csv_name]:
+            _merge_report_chunks(entry.course_id, name, timestamp_str)
+    except Exception:
+        TASK_LOG.exception(u"InstructorTask ID: %s, failed to merge the chunks of %s", entry_id, csv_name)
+        InstructorTask.objects.filter(pk=entry_id).update(task_state=FAILURE)
+        raise
+
+    # Only the state is updated, so that the progress stored by the subtasks is kept
+    InstructorTask.objects.filter(pk=entry_id).update(task_state=SUCCESS)
+
+
+def _merge_report_chunks(course_id, csv_name, timestamp_str):
+    """
+    Store the concatenation of the chunks of the `csv_name` report as the complete
+    report, then delete the chunks.
+    """
+    report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+    filename = _report_filename(csv_name, course_id, timestamp_str)
+    part_filenames = report_store.partial_filenames(course_id, filename)
+    if not part_filenames:
+        return
+
+    def merged_rows():
+        """Yield the header row of the first chunk, then the other rows of every chunk."""
+        for index, part_filename in enumerate(part_filenames):
+            part_rows = report_store.read_rows(course_id, part_filename)
+            if index > 0:
+                next(part_rows, None)
+            for row in part_rows:
+                yield row
+
+    report_store.store_rows(course_id, filename, merged_rows())
+    for part_filename in part_filenames:
+        report_store.delete(course_id, part_filename)
+    tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
+
+
+# The reports that can be generated in chunks by `queue_report_chunks`, mapped to
+# the function computing the rows of a chunk and the name of their error report.
+CHUNKED_REPORTS = {
+    'grade_report': (_grade_report_rows, 'grade_report_err'),
+    'problem_grade_report': (_problem_grade_report_rows, 'problem_grade_report_err'),
+}
+
+
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing profile
@@ -852,25 +1110,34 @@ def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input
     current_step = {'step': 'Calculating Profile Info'}
     task_progress.update_task_state(extra_meta=current_step)
 
-    # compute the student features table and format it
+    # compute the student features table and format it, a student at a time
     query_features = task_input.get('features')
-    student_data = enrolled_students_features(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
-
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
-
-    rows.insert(0, header)
+    student_data = iter_enrolled_students_features(course_id, query_features)
+    header, rows = iter_format_dictlist(student_data, query_features)
 
     current_step = {'step': 'Uploading CSV'}
     task_progress.update_task_state(extra_meta=current_step)
 
     # Perform the upload
-    upload_csv_to_report_store(rows, 'student_profile_info', course_id, start_date)
+    upload_csv_to_report_store(
+        chain([header], _count_succeeded_rows(rows, task_progress)), 'student_profile_info', course_id, start_date
+    )
+    task_progress.skipped = task_progress.total - task_progress.attempted
 
     return task_progress.update_task_state(extra_meta=current_step)
 
 
+def _count_succeeded_rows(rows, task_progress):
+    """
+    Yield the rows of the iterable `rows`, counting each of them as an attempted
+    and succeeded item of `task_progress`.
+    """
+    for row in rows:
+        task_progress.attempted += 1
+        task_progress.succeeded += 1
+        yield row
+
+
 def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a CSV file containing profile
@@ -892,100 +1159,102 @@ def upload_enrollment_report(_xmodule_instance_args, _entry_id, course_id, _task
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    # Loop over all our students and build our CSV lists in memory
-    rows = []
-    header = None
     current_step = {'step': 'Gathering Profile Information'}
     enrollment_report_provider = PaidCourseEnrollmentReportProvider()
-    total_students = students_in_course.count()
-    student_counter = 0
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, generating detailed enrollment report for total students: %s',
-        task_info_string,
-        action_name,
-        current_step,
-        total_students
-    )
+    total_students = task_progress.total
 
-    for student in students_in_course:
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
+    def rows():
+        """Gather the profile of the students one at a time, yielding their rows."""
+        header = None
+        student_counter = 0
+        TASK_LOG.info(
+            u'%s, Task type: %s, Current step: %s, generating detailed enrollment report for total students: %s',
+            task_info_string,
+            action_name,
+            current_step,
+            total_students
+        )
 
-        # Now add a log entry after certain intervals to get a hint that task is in progress
-        student_counter += 1
-        if student_counter % 100 == 0:
-            TASK_LOG.info(
-                u'%s, Task type: %s, Current step: %s, gathering enrollment profile for students in progress: %s/%s',
-                task_info_string,
-                action_name,
-                current_step,
-                student_counter,
-                total_students
-            )
+        for student in students_in_course.iterator():
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
 
-        user_data = enrollment_report_provider.get_user_profile(student.id)
-        course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
-        payment_data = enrollment_report_provider.get_payment_info(student, course_id)
-
-        # display name map for the column headers
-        enrollment_report_headers = {
-            'User ID': _('User ID'),
-            'Username': _('Username'),
-            'Full Name': _('Full Name'),
-            'First Name': _('First Name'),
-            'Last Name': _('Last Name'),
-            'Company Name': _('Company Name'),
-            'Title': _('Title'),
-            'Language': _('Language'),
-            'Year of Birth': _('Year of Birth'),
-            'Gender': _('Gender'),
-            'Level of Education': _('Level of Education'),
-            'Mailing Address': _('Mailing Address'),
-            'Goals': _('Goals'),
-            'City': _('City'),
-            'Country': _('Country'),
-            'Enrollment Date': _('Enrollment Date'),
-            'Currently Enrolled': _('Currently Enrolled'),
-            'Enrollment Source': _('Enrollment Source'),
-            'Enrollment Role': _('Enrollment Role'),
-            'List Price': _('List Price'),
-            'Payment Amount': _('Payment Amount'),
-            'Coupon Codes Used': _('Coupon Codes Used'),
-            'Registration Code Used': _('Registration Code Used'),
-            'Payment Status': _('Payment Status'),
-            'Transaction Reference Number': _('Transaction Reference Number')
-        }
+            # Now add a log entry after certain intervals to get a hint that task is in progress
+            student_counter += 1
+            if student_counter % 100 == 0:
+                TASK_LOG.info(
+                    u'%s, Task type: %s, Current step: %s, '
+                    u'gathering enrollment profile for students in progress: %s/%s',
+                    task_info_string,
+                    action_name,
+                    current_step,
+                    student_counter,
+                    total_students
+                )
 
-        if not header:
-            header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
-            display_headers = []
-            for header_element in header:
-                # translate header into a localizable display string
-                display_headers.append(enrollment_report_headers.get(header_element, header_element))
-            rows.append(display_headers)
+            user_data = enrollment_report_provider.get_user_profile(student.id)
+            course_enrollment_data = enrollment_report_provider.get_enrollment_info(student, course_id)
+            payment_data = enrollment_report_provider.get_payment_info(student, course_id)
+
+            # display name map for the column headers
+            enrollment_report_headers = {
+                'User ID': _('User ID'),
+                'Username': _('Username'),
+                'Full Name': _('Full Name'),
+                'First Name': _('First Name'),
+                'Last Name': _('Last Name'),
+                'Company Name': _('Company Name'),
+                'Title': _('Title'),
+                'Language': _('Language'),
+                'Year of Birth': _('Year of Birth'),
+                'Gender': _('Gender'),
+                'Level of Education': _('Level of Education'),
+                'Mailing Address': _('Mailing Address'),
+                'Goals': _('Goals'),
+                'City': _('City'),
+                'Country': _('Country'),
+                'Enrollment Date': _('Enrollment Date'),
+                'Currently Enrolled': _('Currently Enrolled'),
+                'Enrollment Source': _('Enrollment Source'),
+                'Enrollment Role': _('Enrollment Role'),
+                'List Price': _('List Price'),
+                'Payment Amount': _('Payment Amount'),
+                'Coupon Codes Used': _('Coupon Codes Used'),
+                'Registration Code Used': _('Registration Code Used'),
+                'Payment Status': _('Payment Status'),
+                'Transaction Reference Number': _('Transaction Reference Number')
+            }
 
-        rows.append(user_data.values() + course_enrollment_data.values() + payment_data.values())
-        task_progress.succeeded += 1
+            if not header:
+                header = user_data.keys() + course_enrollment_data.keys() + payment_data.keys()
+                display_headers = []
+                for header_element in header:
+                    # translate header into a localizable display string
+                    display_headers.append(enrollment_report_headers.get(header_element, header_element))
+                yield display_headers
+
+            yield user_data.values() + course_enrollment_data.values() + payment_data.values()
+            task_progress.succeeded += 1
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_students
-    )
+        TASK_LOG.info(
+            u'%s, Task type: %s, Current step: %s, Detailed enrollment report generated for students: %s/%s',
+            task_info_string,
+            action_name,
+            current_step,
+            student_counter,
+            total_students
+        )
+
+    # Perform the actual upload. The students' profiles are gathered as their
+    # rows are written out.
+    upload_csv_to_report_store(rows(), 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
     current_step = {'step': 'Uploading CSVs'}
     task_progress.update_task_state(extra_meta=current_step)
     TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'enrollment_report', course_id, start_date, config_name='FINANCIAL_REPORTS')
-
     # One last update before we close out...
     TASK_LOG.info(u'%s, Task type: %s, Finalizing detailed enrollment task', task_info_string, action_name)
     return task_progress.update_task_state(extra_meta=current_step)
@@ -1004,21 +1273,19 @@ def upload_may_enroll_csv(_xmodule_instance_args, _entry_id, course_id, task_inp
     current_step = {'step': 'Calculating info about students who may enroll'}
     task_progress.update_task_state(extra_meta=current_step)
 
-    # Compute result table and format it
+    # Compute result table and format it, a student at a time
     query_features = task_input.get('features')
-    student_data = list_may_enroll(course_id, query_features)
-    header, rows = format_dictlist(student_data, query_features)
-
-    task_progress.attempted = task_progress.succeeded = len(rows)
-    task_progress.skipped = task_progress.total - task_progress.attempted
-
-    rows.insert(0, header)
+    student_data = iter_may_enroll(course_id, query_features)
+    header, rows = iter_format_dictlist(student_data, query_features)
 
     current_step = {'step': 'Uploading CSV'}
     task_progress.update_task_state(extra_meta=current_step)
 
     # Perform the upload
-    upload_csv_to_report_store(rows, 'may_enroll_info', course_id, start_date)
+    upload_csv_to_report_store(
+        chain([header], _count_succeeded_rows(rows, task_progress)), 'may_enroll_info', course_id, start_date
+    )
+    task_progress.skipped = task_progress.total - task_progress.attempted
 
     return task_progress.update_task_state(extra_meta=current_step)
 
@@ -3,12 +3,15 @@ Tests for instructor_task/models.py.
 """
 
 from cStringIO import StringIO
+from gzip import GzipFile
+import hashlib
 import mock
+import os
 import time
 from datetime import datetime
 from unittest import TestCase
 
-from instructor_task.models import LocalFSReportStore, S3ReportStore
+from instructor_task.models import LocalFSReportStore, ReportStore, S3ReportStore
 from instructor_task.tests.test_base import TestReportMixin
 from opaque_keys.edx.locator import CourseLocator
 
@@ -43,6 +46,26 @@ class MockBucket(object):
         """ Expected method on a Bucket object. """
         return self.keys
 
+    def initiate_multipart_upload(self, key_name, headers):  # pylint: disable=unused-argument
+        """ Expected method on a Bucket object. """
+        self.multipart_upload = MockMultiPartUpload()
+        return self.multipart_upload
+
+
+class MockMultiPartUpload(object):
+    """ Mocking a boto S3 MultiPartUpload object. """
+    def __init__(self):
+        self.parts = []
+        self.completed = False
+
+    def upload_part_from_file(self, fp, part_num):
+        """ Expected method on a MultiPartUpload object. """
+        self.parts.append((part_num, fp.read()))
+
+    def complete_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        self.completed = True
+
 
 class MockS3Connection(object):
     """ Mocking a boto S3 Connection """
@@ -93,6 +116,43 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config(config_name='GRADES_DOWNLOAD')
 
+    def test_store_rows_from_generator(self):
+        """
+        Test that rows can be streamed from a generator, and are read back as
+        unicode.
+        """
+        report_store = self.create_report_store()
+        rows = ([u'r\xf6w', unicode(index)] for index in range(3))
+        report_store.store_rows(self.course_id, 'report.csv', rows)
+
+        self.assertEqual(
+            list(report_store.read_rows(self.course_id, 'report.csv')),
+            [[u'r\xf6w', u'0'], [u'r\xf6w', u'1'], [u'r\xf6w', u'2']]
+        )
+        # the temporary file written to is gone
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+        self.assertEqual(len(os.listdir(report_store.path_to(self.course_id, ''))), 1)
+
+    def test_partial_files(self):
+        """
+        Test that the parts of a report are listed in order, and aren't linked to.
+        """
+        report_store = self.create_report_store()
+        for part in [1, 0]:
+            report_store.store_rows(self.course_id, ReportStore.partial_filename('report.csv', part), [['row']])
+
+        self.assertEqual(
+            report_store.partial_filenames(self.course_id, 'report.csv'),
+            [ReportStore.partial_filename('report.csv', 0), ReportStore.partial_filename('report.csv', 1)]
+        )
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
+        report_store.delete(self.course_id, ReportStore.partial_filename('report.csv', 0))
+        self.assertEqual(
+            report_store.partial_filenames(self.course_id, 'report.csv'),
+            [ReportStore.partial_filename('report.csv', 1)]
+        )
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +165,27 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+
+    def test_store_rows_in_parts(self):
+        """
+        Test that large reports are uploaded as a multipart upload while the
+        rows are being written.
+        """
+        report_store = self.create_report_store()
+        # hashes, so that the rows don't compress too well
+        rows = ([hashlib.sha1(str(index)).hexdigest()] for index in range(5000))
+        with mock.patch.object(S3ReportStore, 'MULTIPART_CHUNK_SIZE', 64):
+            report_store.store_rows(self.course_id, 'report.csv', rows)
+
+        multipart_upload = report_store.bucket.multipart_upload
+        self.assertTrue(multipart_upload.completed)
+        self.assertGreater(len(multipart_upload.parts), 1)
+        self.assertEqual(
+            [part_num for part_num, _ in multipart_upload.parts],
+            range(1, len(multipart_upload.parts) + 1)
+        )
+
+        contents = GzipFile(fileobj=StringIO(''.join(data for _, data in multipart_upload.parts))).read()
+        self.assertEqual(contents.splitlines(), [hashlib.sha1(str(index)).hexdigest() for index in range(5000)])
+        # the report was not also uploaded in one go
+        self.assertEqual(report_store.bucket.keys, [])
@@ -6,19 +6,26 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 Tests that CSV grade report generation works with unicode emails.
 
 """
+import json
+from uuid import uuid4
+
+from celery.states import FAILURE, SUCCESS
 import ddt
 from mock import Mock, patch
 import tempfile
 import unicodecsv
 from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
 
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from certificates.tests.factories import GeneratedCertificateFactory, CertificateWhitelistFactory
 from course_modes.models import CourseMode
 from courseware.tests.factories import InstructorFactory
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tasks import calculate_report_chunk
 from instructor_task.tasks_helper import cohort_students_and_upload, upload_grades_csv, upload_students_csv, \
     upload_enrollment_report
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin, InstructorTaskModuleTestCase
 from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
@@ -87,6 +94,49 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
         self.assertTrue(any('grade_report_err' in item[0] for item in report_store.links_for(self.course.id)))
 
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_grade_report_in_chunks(self, _mock_current_task):
+        """
+        Test that the grade report of a course with many students is generated
+        by subtasks, whose chunks are merged into a single report.
+        """
+        students = [self.create_student('student{}'.format(i), 'student{}@example.com'.format(i)) for i in range(3)]
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id, task_id=str(uuid4()), task_type='grade_course', task_output=''
+        )
+        with override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2):
+            upload_grades_csv(None, entry.id, self.course.id, None, 'graded', chunk_task=calculate_report_chunk)
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['succeeded'], 2)
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0}, json.loads(entry.task_output))
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        self.assertEqual(report_store.partial_filenames(self.course.id, links[0][0]), [])
+        self.verify_rows_in_csv(
+            [{'username': student.username} for student in students],
+            ignore_other_columns=True
+        )
+
+    @patch('instructor_task.tasks_helper._get_current_task')
+    def test_grade_report_merge_failure(self, _mock_current_task):
+        """
+        Test that the task isn't marked as succeeded when its chunks can't be merged.
+        """
+        for i in range(3):
+            self.create_student('student{}'.format(i), 'student{}@example.com'.format(i))
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id, task_id=str(uuid4()), task_type='grade_course', task_output=''
+        )
+        with override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2):
+            with patch('instructor_task.tasks_helper._merge_report_chunks', side_effect=IOError):
+                upload_grades_csv(None, entry.id, self.course.id, None, 'graded', chunk_task=calculate_report_chunk)
+
+        self.assertEqual(InstructorTask.objects.get(pk=entry.id).task_state, FAILURE)
+
     def _verify_cell_data_for_user(self, username, course_id, column_header, expected_cell_content):
         """
         Verify cell data in the grades CSV for a particular user.
@@ -403,6 +403,14 @@ FEATURES = {
     # Enable OpenBadge support. See the BADGR_* settings later in this file.
     'ENABLE_OPENBADGES': False,
 
+    # Buffer Scope.user_state writes made while serving a request, and write them
+    # out once, when the xblock handler completes or the request ends.
+    'BUFFER_USER_STATE_WRITES': False,
+
+    # Add the digest of their content to the urls of course assets, so that
+    # browsers and CDNs can cache them for a long time.
+    'ENABLE_VERSIONED_ASSET_URLS': False,
+
 }
 
 # Ignore static asset files on import which match this pattern
@@ -414,6 +422,14 @@ DEFAULT_GROUPS = []
 # If this is true, random scores will be generated for the purpose of debugging the profile graphs
 GENERATE_PROFILE_SCORES = False
 
+# How long (in seconds) to cache a course's answer distributions; 0 disables the cache.
+# Submissions made since the distributions were cached aren't counted until it expires.
+ANSWER_DISTRIBUTION_CACHE_TIMEOUT = 15 * 60
+
+# How long (in seconds) a process keeps the configuration model entries it has read
+# before checking in the cache whether they have been changed; 0 disables this.
+CONFIGURATION_MODEL_LOCAL_CACHE_TIMEOUT = 0
+
 # Used with XQueue
 XQUEUE_WAITTIME_BETWEEN_REQUESTS = 5  # seconds
 
@@ -708,6 +724,14 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 
 MODULESTORE_BRANCH = 'published-only'
 CONTENTSTORE = None
+
+# Large assets (1MB or more), which aren't cached in memcached, are cached in files
+# in this directory, using at most MAX_BYTES, when DIRECTORY is set.
+STATIC_CONTENT_DISK_CACHE = {
+    'DIRECTORY': None,
+    'MAX_BYTES': 1024 * 1024 * 1024,
+}
+
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -730,6 +754,7 @@ MODULESTORE = {
                         'default_class': 'xmodule.hidden_module.HiddenDescriptor',
                         'fs_root': DATA_DIR,
                         'render_template': 'edxmako.shortcuts.render_to_string',
+                        'structure_cache_max_bytes': 64 * 1024 * 1024,
                     }
                 },
                 {
@@ -768,6 +793,14 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Warm sandboxed Python processes kept by each LMS process for running capa
+    # code: at most 'size' of them (0 turns the pool off), and a problem waits
+    # at most 'max_wait' seconds for a free one before starting a new process.
+    'worker_pool': {
+        'size': 0,
+        'max_wait': 1,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1119,6 +1152,8 @@ TEMPLATE_LOADERS = (
 
 MIDDLEWARE_CLASSES = (
     'request_cache.middleware.RequestCache',
+    # Must come after RequestCache, so that buffered writes are flushed before it clears the cache
+    'courseware.middleware.UserStateWriteBufferMiddleware',
     'microsite_configuration.middleware.MicrositeMiddleware',
     'django_comment_client.middleware.AjaxExceptionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -1843,6 +1878,7 @@ INSTALLED_APPS = (
 
     'lms.djangoapps.lms_xblock',
 
+    'openedx.core.djangoapps.content.course_overviews',
     'openedx.core.djangoapps.content.course_structures',
     'course_structure_api',
 
@@ -2043,6 +2079,10 @@ BADGR_ISSUER_SLUG = "example-issuer"
 ###################### Grade Downloads ######################
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# Grade reports for courses with more enrolled students than this are generated
+# in parallel by subtasks, each grading at most this many students.
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = 1000
+
 GRADES_DOWNLOAD = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-grades',
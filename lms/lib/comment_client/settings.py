@@ -6,3 +6,7 @@ else:
     SERVICE_HOST = 'http://localhost:4567'
 
 PREFIX = SERVICE_HOST + '/api/v1'
+
+# How many connections to the comments service each process keeps open, which
+# is also how many requests `perform_concurrently` makes at once.
+CONNECTION_POOL_SIZE = getattr(settings, "COMMENTS_SERVICE_CONNECTION_POOL_SIZE", 10)
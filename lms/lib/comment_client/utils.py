@@ -1,12 +1,19 @@
 from contextlib import contextmanager
+import cookielib
 import dogstats_wrapper as dog_stats_api
 import logging
+import os
+import threading
 import requests
 from django.conf import settings
+from multiprocessing.pool import ThreadPool
 from time import time
 from uuid import uuid4
+from django.utils import translation
 from django.utils.translation import get_language
 
+from . import settings as cc_settings
+
 log = logging.getLogger(__name__)
 
 
@@ -50,6 +57,104 @@ def request_timer(request_id, method, url, tags=None):
     )
 
 
+_process_state = threading.local()
+_process_lock = threading.Lock()
+_adapter = None
+_thread_pool = None
+_pid = None
+
+
+def _check_pid():
+    """
+    Forget the connection pool and thread pool if they were made in another process.
+
+    Neither open connections nor threads can be shared with a forked process.
+    Call this with `_process_lock` held.
+    """
+    global _adapter, _thread_pool, _pid  # pylint: disable=global-statement
+    if _pid != os.getpid():
+        _adapter = None
+        _thread_pool = None
+        _pid = os.getpid()
+
+
+def _get_adapter():
+    """
+    Return this process's `HTTPAdapter`, whose pool keeps connections to the
+    comments service open between requests.
+    """
+    global _adapter  # pylint: disable=global-statement
+    with _process_lock:
+        _check_pid()
+        if _adapter is None:
+            _adapter = requests.adapters.HTTPAdapter(pool_maxsize=cc_settings.CONNECTION_POOL_SIZE)
+        return _adapter
+
+
+def get_session():
+    """
+    Return a new `requests.Session` that uses this process's connection pool.
+
+    Only the connections are shared: each session refuses all cookies, so that
+    nothing set by the comments service in one user's request can be sent with
+    another's.
+    """
+    session = requests.Session()
+    session.cookies.set_policy(cookielib.DefaultCookiePolicy(allowed_domains=[]))
+    adapter = _get_adapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _get_thread_pool():
+    """
+    Return this process's pool of threads for `perform_concurrently`.
+    """
+    global _thread_pool  # pylint: disable=global-statement
+    with _process_lock:
+        _check_pid()
+        if _thread_pool is None:
+            _thread_pool = ThreadPool(cc_settings.CONNECTION_POOL_SIZE)
+        return _thread_pool
+
+
+def perform_concurrently(*functions):
+    """
+    Call each of `functions`, which take no arguments, at the same time.
+
+    Use this for independent calls to the comments service, e.g.
+    `perform_concurrently(user.to_dict, thread.retrieve)`.  Return a list of
+    their results, in order.  If any of them raise an exception, raise the
+    exception from the first of those, once they've all finished.
+    """
+    # Calls from the pool's own threads are made directly, so that they can't
+    # end up waiting for themselves.
+    if len(functions) < 2 or getattr(_process_state, 'in_pool', False):
+        return [function() for function in functions]
+
+    language = get_language()
+
+    def call(function):
+        """
+        Call `function` in a thread of the pool, in the caller's language.
+        """
+        _process_state.in_pool = True
+        translation.activate(language)
+        try:
+            return function()
+        finally:
+            translation.deactivate()
+            _process_state.in_pool = False
+
+    pool = _get_thread_pool()
+    with dog_stats_api.timer('comment_client.concurrent.time', tags=[u'count:{}'.format(len(functions))]):
+        async_results = [pool.apply_async(call, (function,)) for function in functions]
+        for async_result in async_results:
+            async_result.wait()
+    return [async_result.get() for async_result in async_results]
+
+
 def perform_request(method, url, data_or_params=None, raw=False,
                     metric_action=None, metric_tags=None, paged_results=False):
 
@@ -76,7 +181,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = get_session().request(
             method,
             url,
             data=data,
@@ -38,6 +38,8 @@ def run():
     if settings.FEATURES.get('ENABLE_THIRD_PARTY_AUTH', False):
         enable_third_party_auth()
 
+    configure_sandbox_worker_pool()
+
     # Initialize Segment.io analytics module. Flushes first time a message is received and
     # every 50 messages thereafter, or if 10 seconds have passed since last flush
     if settings.FEATURES.get('SEGMENT_IO_LMS') and hasattr(settings, 'SEGMENT_IO_LMS_KEY'):
@@ -58,6 +60,16 @@ def add_mimetypes():
     mimetypes.add_type('application/font-woff', '.woff')
 
 
+def configure_sandbox_worker_pool():
+    """
+    Configure capa's pool of warm sandboxed Python processes from CODE_JAIL.
+    """
+    from capa.safe_exec import worker_pool
+
+    pool_settings = settings.CODE_JAIL.get('worker_pool', {})
+    worker_pool.configure(pool_settings.get('size', 0), max_wait=pool_settings.get('max_wait', 1))
+
+
 def enable_theme():
     """
     Enable the settings for a custom theme, whose files should be stored
@@ -0,0 +1,45 @@
+import logging
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore.django import modulestore
+
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    args = '<course_id course_id ...>'
+    help = 'Makes and stores the overview of one or more courses, replacing any there was.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--all',
+                    action='store_true',
+                    default=False,
+                    help='Make overviews of all courses.'),
+    )
+
+    def handle(self, *args, **options):
+
+        if options['all']:
+            course_keys = [course.id for course in modulestore().get_courses()]
+        else:
+            course_keys = [CourseKey.from_string(arg) for arg in args]
+
+        if not course_keys:
+            log.fatal('No courses specified.')
+            return
+
+        log.info('Making overviews of %d courses.', len(course_keys))
+
+        for course_key in course_keys:
+            try:
+                CourseOverview.load_from_module_store(course_key)
+            except Exception as ex:  # pylint: disable=broad-except
+                log.exception('An error occurred while making the overview of %s: %s',
+                              unicode(course_key), ex.message)
+
+        log.info('Finished making course overviews.')
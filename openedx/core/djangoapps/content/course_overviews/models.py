@@ -0,0 +1,352 @@
+"""
+Summaries of courses, kept in SQL so that course listings needn't load every
+course from the modulestore.
+"""
+import json
+import logging
+
+from django.db import IntegrityError
+from django.db.models.fields import (
+    BooleanField, CharField, DateTimeField, FloatField, IntegerField, NullBooleanField, TextField
+)
+from django.utils.translation import ugettext
+from model_utils.models import TimeStampedModel
+
+from util.date_utils import strftime_localized
+from xmodule import course_metadata_utils
+from xmodule.course_module import StringOrDate
+from xmodule.error_module import ErrorDescriptor
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+from xmodule_django.models import CourseKeyField, UsageKeyField
+
+from openedx.core.lib.courses import course_image_url
+
+
+log = logging.getLogger(__name__)
+
+# The ids of the XML courses whose overviews this process has remade.  XML courses
+# are read from disk when the process starts and are never published, so their
+# overviews are remade from the modulestore once per process.
+_REMADE_XML_COURSE_IDS = set()
+
+
+class CourseOverview(TimeStampedModel):
+    """
+    The fields of a course that course listings need: what the dashboard, the
+    catalog and the course about page show, and what access checks on a course
+    look at.
+
+    A CourseOverview has the same attributes and methods as the
+    CourseDescriptor it was made from, for those fields, so it can stand in
+    for the course there.  It's made the first time it's asked for, and
+    remade when the course is published.
+    """
+    # Bump this when fields are added or change, so that overviews made by an
+    # older version are remade.
+    VERSION = 2
+
+    version = IntegerField()
+
+    id = CourseKeyField(db_index=True, primary_key=True, max_length=255)  # pylint: disable=invalid-name
+    _location = UsageKeyField(max_length=255)
+    # The org is part of the course id, but where depends on the kind of id, so it's
+    # kept in its own column for listings to filter on.
+    org = CharField(max_length=255, db_index=True, default='')
+
+    display_name = TextField(null=True)
+    display_number_with_default = TextField()
+    display_org_with_default = TextField()
+
+    start = DateTimeField(null=True)
+    end = DateTimeField(null=True)
+    _advertised_start = TextField(null=True)
+    announcement = DateTimeField(null=True)
+
+    course_image_url = TextField()
+    static_asset_path = TextField(default='')
+    social_sharing_url = TextField(null=True)
+    end_of_course_survey_url = TextField(null=True)
+    course_edit_method = TextField(null=True)
+
+    certificates_display_behavior = TextField(null=True)
+    certificates_show_before_end = BooleanField(default=False)
+    has_any_active_web_certificate = BooleanField(default=False)
+    cert_name_short = TextField()
+    cert_name_long = TextField()
+    lowest_passing_grade = FloatField(null=True)
+
+    days_early_for_beta = FloatField(null=True)
+    mobile_available = BooleanField(default=False)
+    visible_to_staff_only = BooleanField(default=False)
+    ispublic = NullBooleanField()
+    catalog_visibility = TextField(null=True)
+    _pre_requisite_courses_json = TextField()
+
+    enrollment_start = DateTimeField(null=True)
+    enrollment_end = DateTimeField(null=True)
+    enrollment_domain = TextField(null=True)
+    invitation_only = BooleanField(default=False)
+    max_student_enrollments_allowed = IntegerField(null=True)
+    cosmetic_display_price = IntegerField(null=True)
+
+    @classmethod
+    def _create_from_course(cls, course):
+        """
+        Make (but don't save) the CourseOverview of `course`, a CourseDescriptor.
+        """
+        certificates = course.certificates.get('certificates', [])
+        try:
+            lowest_passing_grade = course.lowest_passing_grade
+        except (KeyError, ValueError):
+            lowest_passing_grade = None
+
+        return cls(
+            version=cls.VERSION,
+            id=course.id,
+            _location=course.location,
+            org=course.location.org,
+            display_name=course.display_name,
+            display_number_with_default=course.display_number_with_default,
+            display_org_with_default=course.display_org_with_default,
+
+            start=course.start,
+            end=course.end,
+            _advertised_start=StringOrDate().to_json(course.advertised_start),
+            announcement=course.announcement,
+
+            course_image_url=course_image_url(course),
+            static_asset_path=course.static_asset_path,
+            social_sharing_url=course.social_sharing_url,
+            end_of_course_survey_url=course.end_of_course_survey_url,
+            course_edit_method=course.course_edit_method,
+
+            certificates_display_behavior=course.certificates_display_behavior,
+            certificates_show_before_end=course.certificates_show_before_end,
+            has_any_active_web_certificate=any(config.get('is_active') for config in certificates),
+            cert_name_short=course.cert_name_short,
+            cert_name_long=course.cert_name_long,
+            lowest_passing_grade=lowest_passing_grade,
+
+            days_early_for_beta=course.days_early_for_beta,
+            mobile_available=course.mobile_available,
+            visible_to_staff_only=course.visible_to_staff_only,
+            ispublic=getattr(course, 'ispublic', None),
+            catalog_visibility=course.catalog_visibility,
+            _pre_requisite_courses_json=json.dumps(course.pre_requisite_courses),
+
+            enrollment_start=course.enrollment_start,
+            enrollment_end=course.enrollment_end,
+            enrollment_domain=course.enrollment_domain,
+            invitation_only=course.invitation_only,
+            max_student_enrollments_allowed=course.max_student_enrollments_allowed,
+            cosmetic_display_price=course.cosmetic_display_price,
+        )
+
+    @classmethod
+    def load_from_module_store(cls, course_id):
+        """
+        Make the CourseOverview of the course with `course_id` from the course
+        in the modulestore, and save it, replacing any there was.
+
+        Raises CourseOverview.DoesNotExist if there's no such course, and
+        IOError if it couldn't be loaded.
+        """
+        store = modulestore()
+        with store.bulk_operations(course_id):
+            course = store.get_course(course_id)
+        if course is None:
+            raise cls.DoesNotExist(u"Course not found: {}".format(course_id))
+        if isinstance(course, ErrorDescriptor):
+            raise IOError(u"Error loading course {} from the modulestore".format(course_id))
+
+        course_overview = cls._create_from_course(course)
+        try:
+            course_overview.save()
+        except IntegrityError:
+            # Another process saved it first, which is fine: it's made from
+            # the same course.
+            log.info(u"CourseOverview of %s was saved by another process", course_id)
+        return course_overview
+
+    @classmethod
+    def get_from_id(cls, course_id):
+        """
+        Return the CourseOverview of the course with `course_id`.
+
+        If there isn't one yet, or it was made by an older version of this
+        model, it's made from the course in the modulestore and saved.
+        Raises CourseOverview.DoesNotExist if there's no such course, and
+        IOError if it couldn't be loaded.
+        """
+        if course_id not in _REMADE_XML_COURSE_IDS and \
+                modulestore().get_modulestore_type(course_id) == ModuleStoreEnum.Type.xml:
+            course_overview = cls.load_from_module_store(course_id)
+            _REMADE_XML_COURSE_IDS.add(course_id)
+            return course_overview
+
+        try:
+            course_overview = cls.objects.get(id=course_id)
+            if course_overview.version == cls.VERSION:
+                return course_overview
+            course_overview.delete()
+        except cls.DoesNotExist:
+            pass
+        return cls.load_from_module_store(course_id)
+
+    @classmethod
+    def get_all_courses(cls, org=None):
+        """
+        Return the CourseOverviews of all courses, or of those in `org`.
+
+        Overviews of courses that existed before this model are made by the
+        generate_course_overview command, and of new ones when they're
+        published.  XML courses aren't published, so their overviews are
+        remade from the XML modulestore the first time this is called in each
+        process.  Ones made by an older version of this model are remade.
+        """
+        cls._remake_xml_course_overviews()
+
+        course_overviews = cls.objects.all()
+        if org:
+            course_overviews = course_overviews.filter(org=org)
+
+        result = []
+        for course_overview in course_overviews:
+            if course_overview.version != cls.VERSION:
+                try:
+                    course_overview = cls.load_from_module_store(course_overview.id)
+                except (cls.DoesNotExist, IOError):
+                    continue
+            result.append(course_overview)
+        return result
+
+    @classmethod
+    def _remake_xml_course_overviews(cls):
+        """
+        Remake and save the overviews of the XML courses that this process hasn't
+        remade yet.
+        """
+        store = modulestore()
+        if hasattr(store, '_get_modulestore_by_type'):
+            store = store._get_modulestore_by_type(ModuleStoreEnum.Type.xml)  # pylint: disable=protected-access
+        elif store.get_modulestore_type(None) != ModuleStoreEnum.Type.xml:
+            store = None
+        if store is None:
+            return
+
+        for course in store.get_courses():
+            if course.id in _REMADE_XML_COURSE_IDS or isinstance(course, ErrorDescriptor):
+                continue
+            try:
+                cls._create_from_course(course).save()
+            except IntegrityError:
+                log.info(u"CourseOverview of %s was saved by another process", course.id)
+            _REMADE_XML_COURSE_IDS.add(course.id)
+
+    @property
+    def location(self):
+        """
+        The usage key of the course.
+        """
+        return self._location
+
+    @property
+    def number(self):
+        """
+        The course number, from the course's location.
+        """
+        return self.location.course
+
+    @property
+    def url_name(self):
+        """
+        The name of the course in its location.
+        """
+        return self.location.name
+
+    @property
+    def display_name_with_default(self):
+        """
+        The course's display name, or its url name if it hasn't got one.
+        """
+        name = self.display_name
+        if name is None:
+            name = self.url_name.replace('_', ' ')
+        return name.replace('<', '&lt;').replace('>', '&gt;')
+
+    @property
+    def advertised_start(self):
+        """
+        The start date advertised for the course: a datetime, a string, or None.
+        """
+        return StringOrDate().from_json(self._advertised_start)
+
+    @property
+    def pre_requisite_courses(self):
+        """
+        The ids of the courses to complete before this one.
+        """
+        return json.loads(self._pre_requisite_courses_json)
+
+    @property
+    def start_date_is_still_default(self):
+        """
+        Whether the course's start date hasn't been set.
+        """
+        return course_metadata_utils.course_start_date_is_default(self.start, self.advertised_start)
+
+    def has_started(self):
+        """
+        Return whether the course has started.
+        """
+        return course_metadata_utils.has_course_started(self.start)
+
+    def has_ended(self):
+        """
+        Return whether the course has ended.
+        """
+        return course_metadata_utils.has_course_ended(self.end)
+
+    def may_certify(self):
+        """
+        Return whether it's acceptable to show the student a certificate download link.
+        """
+        return course_metadata_utils.may_certify_for_course(
+            self.certificates_display_behavior,
+            self.certificates_show_before_end,
+            self.has_ended()
+        )
+
+    def start_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Return the text of the course's start date and time in UTC.
+        """
+        return course_metadata_utils.course_start_datetime_text(
+            self.start,
+            self.advertised_start,
+            format_string,
+            ugettext,
+            strftime_localized
+        )
+
+    def end_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Return the text of the course's end date, or date and time.
+        """
+        return course_metadata_utils.course_end_datetime_text(self.end, format_string, strftime_localized)
+
+    @property
+    def sorting_score(self):
+        """
+        A number to sort courses by how "new" they are, lowest first.
+        """
+        return course_metadata_utils.sorting_score(self.start, self.advertised_start, self.announcement)
+
+    def __unicode__(self):
+        return unicode(self.id)
+
+
+# Signals must be imported in a file that is automatically loaded at app startup (e.g. models.py). We import them
+# at the end of this file to avoid circular dependencies.
+import signals  # pylint: disable=unused-import
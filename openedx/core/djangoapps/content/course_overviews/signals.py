@@ -0,0 +1,24 @@
+"""
+Keep CourseOverviews up to date with the courses they summarize.
+"""
+from django.dispatch.dispatcher import receiver
+
+from xmodule.modulestore.django import SignalHandler
+
+
+@receiver(SignalHandler.course_published)
+def listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    # Import tasks here to avoid a circular import.
+    from .tasks import update_course_overview
+
+    # Note: The countdown=0 kwarg is set to to ensure the method below does not attempt to access the course
+    # before the signal emitter has finished all operations.
+    update_course_overview.apply_async([unicode(course_key)], countdown=0)
+
+
+@receiver(SignalHandler.course_deleted)
+def listen_for_course_delete(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    # Import here to avoid a circular import.
+    from .models import CourseOverview
+
+    CourseOverview.objects.filter(id=course_key).delete()
@@ -0,0 +1,33 @@
+"""
+Tasks that make CourseOverviews.
+"""
+import logging
+
+from celery.task import task
+from opaque_keys.edx.keys import CourseKey
+
+
+log = logging.getLogger('edx.celery.task')
+
+
+@task(name=u'openedx.core.djangoapps.content.course_overviews.tasks.update_course_overview')
+def update_course_overview(course_key):
+    """
+    Remake and save the CourseOverview of the course with `course_key`, a string.
+    """
+    # Import here to avoid circular import.
+    from .models import CourseOverview
+
+    # Course keys aren't JSON-serializable, so callers pass them as strings.
+    if not isinstance(course_key, basestring):
+        raise ValueError('course_key must be a string. {} is not acceptable.'.format(type(course_key)))
+
+    course_key = CourseKey.from_string(course_key)
+
+    try:
+        CourseOverview.load_from_module_store(course_key)
+    except CourseOverview.DoesNotExist:
+        log.warning(u'Course %s was published, but no longer exists', course_key)
+    except Exception as ex:
+        log.exception(u'An error occurred while making the overview of course %s: %s', course_key, ex.message)
+        raise
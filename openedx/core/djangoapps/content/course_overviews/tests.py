@@ -0,0 +1,163 @@
+"""
+Tests for CourseOverview.
+"""
+import datetime
+
+import ddt
+import mock
+from django.utils.timezone import UTC
+
+from xmodule.course_module import CATALOG_VISIBILITY_ABOUT
+from xmodule.error_module import ErrorDescriptor
+from xmodule.modulestore import ModuleStoreEnum
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, TEST_DATA_MIXED_TOY_MODULESTORE
+from xmodule.modulestore.tests.factories import CourseFactory
+from openedx.core.djangoapps.content.course_overviews import models
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+
+
+@ddt.ddt
+class CourseOverviewTestCase(ModuleStoreTestCase):
+    """
+    Tests for CourseOverview.
+    """
+    def assert_same_as_course(self, course_overview, course):
+        """
+        Check that the fields and methods of `course_overview` give what the course's do.
+        """
+        for attr in (
+                'id', 'location', 'number', 'org', 'display_name', 'display_name_with_default',
+                'display_number_with_default', 'display_org_with_default', 'start', 'end',
+                'advertised_start', 'announcement', 'static_asset_path', 'social_sharing_url',
+                'end_of_course_survey_url', 'course_edit_method', 'certificates_display_behavior',
+                'certificates_show_before_end', 'cert_name_short', 'cert_name_long', 'lowest_passing_grade',
+                'days_early_for_beta', 'mobile_available', 'visible_to_staff_only', 'catalog_visibility',
+                'pre_requisite_courses', 'enrollment_start', 'enrollment_end', 'enrollment_domain',
+                'invitation_only', 'max_student_enrollments_allowed', 'cosmetic_display_price',
+                'start_date_is_still_default',
+        ):
+            self.assertEqual(getattr(course_overview, attr), getattr(course, attr), attr)
+
+        for method in ('has_started', 'has_ended', 'may_certify', 'start_datetime_text', 'end_datetime_text'):
+            self.assertEqual(getattr(course_overview, method)(), getattr(course, method)(), method)
+
+        self.assertAlmostEqual(course_overview.sorting_score, course.sorting_score, places=3)
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_same_as_course(self, modulestore_type):
+        now = datetime.datetime.now(UTC()).replace(microsecond=0)
+        course = CourseFactory.create(
+            default_store=modulestore_type,
+            display_name='Course <1>',
+            start=now - datetime.timedelta(days=30),
+            end=now + datetime.timedelta(days=30),
+            advertised_start='Spring',
+            enrollment_start=now - datetime.timedelta(days=40),
+            enrollment_end=now + datetime.timedelta(days=10),
+            mobile_available=True,
+            invitation_only=True,
+            catalog_visibility=CATALOG_VISIBILITY_ABOUT,
+            days_early_for_beta=3,
+            pre_requisite_courses=['course-v1:edX+Prereq+Run'],
+            max_student_enrollments_allowed=100,
+            certificates_display_behavior='early_with_info',
+        )
+        self.assert_same_as_course(CourseOverview.get_from_id(course.id), course)
+
+        # And once it's been read back from the database
+        self.assert_same_as_course(CourseOverview.objects.get(id=course.id), course)
+
+    def test_course_defaults(self):
+        course = CourseFactory.create()
+        course_overview = CourseOverview.get_from_id(course.id)
+        self.assert_same_as_course(course_overview, course)
+        self.assertTrue(course_overview.start_date_is_still_default)
+
+    def test_made_once(self):
+        course = CourseFactory.create()
+        CourseOverview.objects.all().delete()
+
+        with mock.patch.object(CourseOverview, 'load_from_module_store', wraps=CourseOverview.load_from_module_store):
+            CourseOverview.get_from_id(course.id)
+            CourseOverview.get_from_id(course.id)
+            self.assertEqual(CourseOverview.load_from_module_store.call_count, 1)
+
+    def test_remade_on_publish(self):
+        course = CourseFactory.create(display_name='Before')
+        self.assertEqual(CourseOverview.get_from_id(course.id).display_name, 'Before')
+
+        course.display_name = 'After'
+        self.store.update_item(course, self.user.id)
+        self.assertEqual(CourseOverview.objects.get(id=course.id).display_name, 'After')
+
+    def test_deleted_with_course(self):
+        course = CourseFactory.create()
+        CourseOverview.get_from_id(course.id)
+
+        self.store.delete_course(course.id, self.user.id)
+        self.assertFalse(CourseOverview.objects.filter(id=course.id).exists())
+        with self.assertRaises(CourseOverview.DoesNotExist):
+            CourseOverview.get_from_id(course.id)
+
+    def test_old_version_remade(self):
+        course = CourseFactory.create(display_name='Current')
+        CourseOverview.objects.filter(id=course.id).update(version=CourseOverview.VERSION - 1, display_name='Old')
+
+        self.assertEqual(CourseOverview.get_from_id(course.id).display_name, 'Current')
+        self.assertEqual(CourseOverview.objects.get(id=course.id).version, CourseOverview.VERSION)
+
+    def test_error_course(self):
+        course = CourseFactory.create(default_store=ModuleStoreEnum.Type.mongo)
+        CourseOverview.objects.all().delete()
+
+        with mock.patch('xmodule.modulestore.mongo.base.MongoKeyValueStore', mock.Mock(side_effect=Exception)):
+            self.assertIsInstance(self.store.get_course(course.id), ErrorDescriptor)
+            with self.assertRaises(IOError):
+                CourseOverview.get_from_id(course.id)
+        self.assertFalse(CourseOverview.objects.filter(id=course.id).exists())
+
+    def test_get_all_courses(self):
+        course_ids = [CourseFactory.create(org=org).id for org in ('TestOrgA', 'TestOrgA', 'TestOrgB')]
+
+        self.assertItemsEqual(
+            [course_overview.id for course_overview in CourseOverview.get_all_courses()],
+            course_ids
+        )
+        self.assertItemsEqual(
+            [course_overview.id for course_overview in CourseOverview.get_all_courses(org='TestOrgA')],
+            course_ids[:2]
+        )
+
+
+class XMLCourseOverviewTestCase(ModuleStoreTestCase):
+    """
+    Tests for the CourseOverviews of XML courses.
+    """
+    MODULESTORE = TEST_DATA_MIXED_TOY_MODULESTORE
+
+    def setUp(self):
+        super(XMLCourseOverviewTestCase, self).setUp()
+        self.course_id = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        # Each test starts as a new process would
+        models._REMADE_XML_COURSE_IDS.clear()  # pylint: disable=protected-access
+        self.addCleanup(models._REMADE_XML_COURSE_IDS.clear)  # pylint: disable=protected-access
+
+    def test_listed_without_overview(self):
+        self.assertFalse(CourseOverview.objects.filter(id=self.course_id).exists())
+        self.assertIn(self.course_id, [course_overview.id for course_overview in CourseOverview.get_all_courses()])
+        self.assertTrue(CourseOverview.objects.filter(id=self.course_id).exists())
+
+    def test_remade_once_per_process(self):
+        CourseOverview.get_all_courses()
+        CourseOverview.objects.filter(id=self.course_id).update(display_name='Stale')
+
+        # This process has already remade the overview
+        self.assertEqual(CourseOverview.get_from_id(self.course_id).display_name, 'Stale')
+
+        # A new process remakes it from the modulestore
+        models._REMADE_XML_COURSE_IDS.clear()  # pylint: disable=protected-access
+        self.assertEqual(
+            CourseOverview.get_from_id(self.course_id).display_name,
+            self.store.get_course(self.course_id).display_name
+        )